@@ -1,26 +1,79 @@
 import os
+import uuid
 import tempfile
 import logging
 import atexit
 import shutil
 import json
+import hashlib
+import unicodedata
+from urllib.parse import quote
+from pathlib import Path
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, Request, Response, render_template, request, redirect, url_for, flash, session
 from werkzeug.utils import secure_filename
+import PyPDF2
 from logging.handlers import RotatingFileHandler
 
 # 導入書籤處理模組
 from bookmark_utils import process_pdf_bookmarks, BookmarkParsingError, PDFProcessingError
 
 # 導入 PDF 分割模組
-from pdf_splitter import split_pdf, get_split_preview, PDFSplittingError, InvalidSplitPointError
+from pdf_splitter import (
+    split_pdf, get_split_preview, validate_pdf_for_splitting, validate_split_points,
+    PDFSplittingError, InvalidSplitPointError, DEFAULT_PROCESS_WORKERS, shutdown_split_process_pool
+)
 
 # 導入 ZIP 處理模組
-from zip_utils import create_zip_from_pdf_split_result, ZipCreationError
+from zip_utils import (
+    stream_zip_from_files, describe_split_zip_stream, generate_split_zip_filename,
+    ZipArchiveWriter, ZipCreationError, COMPRESSION_MODES
+)
+
+# 導入 PDF 讀取器快取模組
+from pdf_cache import prune_reader_cache, get_reader_cache_stats
+
+# 導入分割檔案快取模組
+from part_cache import get_part_cache_stats, compute_file_hash, remember_file_hash
+
+# 導入上傳串流模組
+from upload_stream import PdfUploadStream, UploadRejectedError, open_upload_stream
+
+# 導入記憶體層模組
+from memory_tier import (
+    is_memory_file, put_memory_file, open_source, source_exists, source_size, get_memory_tier_stats
+)
+
+# 導入分段上傳模組
+from chunked_upload import (
+    ChunkedUpload, ChunkedUploadError, ChunkedUploadNotFoundError, ChunkedUploadLimitError, DEFAULT_CHUNK_SIZE
+)
+
+# 導入解析索引模組
+from pdf_index import get_index_path
+
+# 導入書籤資料儲存模組
+from bookmark_store import (
+    save_bookmarks, load_bookmarks, discard_session_bookmarks, get_bookmark_store_stats,
+    get_bookmark_data_path, BookmarkStoreError
+)
+
+# 導入推測分割模組
+from speculative_split import (
+    start_speculative_split, settle_speculative_split, cancel_speculative_split,
+    get_speculative_split_stats
+)
+
+# 導入背景任務模組
+from job_queue import (
+    submit_job, get_job_status, JobQueueError,
+    JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED
+)
 
 # 導入文件清理模組
 from file_cleanup import (
-    create_temp_directory, register_temp_file, cleanup_files_by_context,
+    create_temp_directory, register_temp_file, acquire_temp_file, release_temp_file,
+    cleanup_files_by_context,
     cleanup_expired_files, cleanup_after_request, cleanup_on_error,
     get_cleanup_stats
 )
@@ -39,10 +92,69 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB 最大上傳檔案大小
 ALLOWED_EXTENSIONS = {'pdf'}
 
+class UploadRequest(Request):
+    """
+    上傳路由的檔案內容在接收時直接寫入上傳目錄（同時計算 sha256 並檢查 PDF 檔頭）；
+    請求大小在記憶體層門檻內時在記憶體中接收
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._upload_streams = []
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == 'upload_file':
+            stream = open_upload_stream(app.config['UPLOAD_FOLDER'], filename, total_content_length)
+            self._upload_streams.append(stream)
+            return stream
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+    
+    def close(self):
+        """
+        請求結束時放棄沒有改名到最終位置的上傳串流
+        
+        表單解析中途停止（用戶端斷線、內容不完整或格式錯誤）時串流不會加入 files，
+        Werkzeug 不會關閉它；臨時檔案與記憶體層的預留在這裡釋放。
+        """
+        try:
+            super().close()
+        finally:
+            streams, self._upload_streams = self._upload_streams, []
+            for stream in streams:
+                stream.discard()
+
+app.request_class = UploadRequest
+
 # **環境檢測**
 IS_PRODUCTION = os.environ.get('RENDER') is not None
 PORT = int(os.environ.get('PORT', 5000))
 
+# 分割 PDF 時使用的工作進程數量（大於 1 時啟用並行分割；所有分割任務共用一個進程池）
+SPLIT_PROCESS_WORKERS = int(os.environ.get('SPLIT_PROCESS_WORKERS', DEFAULT_PROCESS_WORKERS))
+
+# 分割引擎：pypdf（預設）或 raw（直接複製原始物件位元組，適合大型掃描檔）
+SPLIT_ENGINE = os.environ.get('SPLIT_ENGINE', 'pypdf')
+
+# ZIP 產生方式：stream（預設，下載時由分割檔案即時串流產生）或
+# pipeline（分割時同步將每個分割檔案加入 ZIP，完成後以一般檔案下載）
+ZIP_MODE = os.environ.get('ZIP_MODE', 'stream')
+
+# ZIP 壓縮策略：auto（預設，已壓縮的 PDF 直接儲存）、store、fast 或 max
+ZIP_COMPRESSION = os.environ.get('ZIP_COMPRESSION', 'auto')
+
+# 是否重複使用相同來源與頁面範圍的已分割檔案（跨 session 共用）
+SPLIT_PART_CACHE = os.environ.get('SPLIT_PART_CACHE', 'true').lower() == 'true'
+
+# 是否在書籤分析後預先分割匹配模式的書籤（結果存入分割檔案快取，需啟用 SPLIT_PART_CACHE）
+SPECULATIVE_SPLIT = os.environ.get('SPECULATIVE_SPLIT', 'true').lower() == 'true'
+
+# 書籤樹 API：選擇頁面初次載入時展開的層數，以及每次請求返回的節點數量上限
+OUTLINE_DEFAULT_DEPTH = int(os.environ.get('OUTLINE_DEFAULT_DEPTH', 2))
+OUTLINE_MAX_NODES = int(os.environ.get('OUTLINE_MAX_NODES', 500))
+
+# 書籤列表 API 每頁返回的書籤數量上限
+BOOKMARK_PAGE_SIZE = int(os.environ.get('BOOKMARK_PAGE_SIZE', 200))
+
 def allowed_file(filename):
     """檢查檔案是否為允許的類型（PDF）"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -69,10 +181,19 @@ def cleanup_session_files():
     try:
         session_id = session.get('session_id')
         if session_id:
+            # 先停止推測分割，避免刪除檔案時仍在讀取
+            cancel_speculative_split(session_id)
+            
             # 使用新的清理機制按會話清理
             cleaned_count = cleanup_files_by_context(session_id)
             if cleaned_count > 0:
                 app.logger.info(f'清理了會話 {session_id} 的 {cleaned_count} 個文件')
+            
+            # 關閉已刪除檔案的快取讀取器
+            prune_reader_cache()
+            
+            # 移除會話的書籤資料快取
+            discard_session_bookmarks(session_id)
         
         # 清理 session 資料
         session.pop('uploaded_file', None)
@@ -88,11 +209,13 @@ def cleanup_session_files():
         session.pop('zip_info', None)
         session.pop('selected_split_points', None)
         session.pop('split_result_path', None)
+        session.pop('split_job_id', None)
     except Exception as e:
         app.logger.error(f'清理 session 檔案時發生錯誤: {str(e)}')
 
 # 註冊應用程式結束時的清理函數
 atexit.register(cleanup_temp_files)
+atexit.register(shutdown_split_process_pool)
 
 @app.route('/')
 def index():
@@ -100,6 +223,72 @@ def index():
     cleanup_session_files()
     return render_template('index.html')
 
+def get_upload_path(file_hash):
+    """上傳檔案以內容雜湊命名：相同內容的上傳共用同一個檔案、解析索引與書籤分析結果"""
+    return os.path.join(app.config['UPLOAD_FOLDER'], f'{file_hash}.pdf')
+
+def store_uploaded_file(upload, upload_info, original_filename, session_id):
+    """
+    將已接收的上傳內容以內容雜湊存入上傳目錄，驗證後記錄到 session（一般上傳與分段上傳共用）
+    
+    相同內容已存在時直接使用既有檔案並放棄這次接收的內容。每個會話在清理系統中持有一個引用，
+    最後一個引用被清理時才刪除檔案，不同會話上傳同名檔案也不會互相覆蓋。
+    
+    Args:
+        upload: 已接收的上傳內容（PdfUploadStream 或 ChunkedUpload）
+        upload_info: 上傳內容的 sha256 與大小
+        original_filename: 用戶端提供的檔案名稱
+        session_id: 會話 ID
+    
+    Returns:
+        Dict: 上傳檔案資訊
+        
+    Raises:
+        UploadRejectedError: 檔案不是有效的 PDF
+    """
+    filename = secure_filename(original_filename)
+    file_hash = upload_info['sha256']
+    filepath = get_upload_path(file_hash)
+    
+    # 先取得引用再檢查檔案是否存在，其他會話的清理不會刪除即將使用的檔案
+    file_id = acquire_temp_file(filepath, context=session_id, max_age_minutes=60)
+    reused = source_exists(filepath)
+    if reused:
+        upload.discard()
+    else:
+        upload.commit(filepath)
+    # 雜湊已在接收時算好，之後不必重新讀取
+    remember_file_hash(filepath, file_hash)
+    
+    # 快速驗證 PDF 結構並取得頁數（只讀取交叉引用表與頁面樹根節點）
+    try:
+        pdf_info = validate_pdf_for_splitting(filepath)
+    except (PDFSplittingError, PyPDF2.errors.PdfReadError) as e:
+        release_temp_file(file_id)
+        raise UploadRejectedError(str(e))
+    
+    # 獲取文件資訊
+    file_size = source_size(filepath)
+    upload_time = datetime.now()
+    
+    # 將文件資訊儲存到 session 中
+    session['uploaded_file'] = {
+        'original_filename': original_filename,
+        'secure_filename': filename,
+        'filepath': filepath,
+        'file_id': file_id,  # 添加文件 ID 用於清理
+        'file_hash': file_hash,
+        'file_size': file_size,
+        'total_pages': pdf_info['total_pages'],
+        'upload_time': upload_time.isoformat(),
+        'mime_type': 'application/pdf'
+    }
+    
+    # 記錄成功上傳
+    app.logger.info(f'檔案上傳成功並儲存到 session: {filename}, 大小: {file_size} 位元組'
+                    f'{"（重複使用相同內容的既有檔案）" if reused else ""}')
+    return session['uploaded_file']
+
 @app.route('/upload', methods=['POST'])
 @cleanup_on_error()
 def upload_file():
@@ -125,34 +314,28 @@ def upload_file():
         # 檢查檔案類型是否正確
         if file and allowed_file(file.filename):
             try:
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                
-                # 註冊文件到清理系統
-                file_id = register_temp_file(filepath, context=session_id, max_age_minutes=60)
+                # 內容已在接收時寫入上傳目錄並計算雜湊，改名到最終位置即可
+                upload = file.stream
+                if not isinstance(upload, PdfUploadStream):
+                    upload = open_upload_stream(app.config['UPLOAD_FOLDER'], file.filename)
+                    try:
+                        shutil.copyfileobj(file.stream, upload)
+                    finally:
+                        file.stream.close()
                 
-                # 獲取文件資訊
-                file_size = os.path.getsize(filepath)
-                upload_time = datetime.now()
-                
-                # 將文件資訊儲存到 session 中
-                session['uploaded_file'] = {
-                    'original_filename': file.filename,
-                    'secure_filename': filename,
-                    'filepath': filepath,
-                    'file_id': file_id,  # 添加文件 ID 用於清理
-                    'file_size': file_size,
-                    'upload_time': upload_time.isoformat(),
-                    'mime_type': 'application/pdf'
-                }
-                
-                # 記錄成功上傳
-                app.logger.info(f'檔案上傳成功並儲存到 session: {filename}, 大小: {file_size} 位元組')
+                try:
+                    store_uploaded_file(upload, upload.finish(), file.filename, session_id)
+                finally:
+                    upload.close()
                 
                 # 重定向到上傳成功頁面
                 return redirect(url_for('upload_success'))
                 
+            except UploadRejectedError as e:
+                app.logger.warning(f'上傳的檔案不是有效的 PDF: {file.filename} ({str(e)})')
+                flash('檔案不是有效的 PDF 或已損壞，請重新選擇檔案', 'error')
+                return redirect(url_for('index'))
+                
             except Exception as e:
                 app.logger.error(f'儲存檔案時發生錯誤: {str(e)}')
                 flash('儲存檔案時發生錯誤，請重試', 'error')
@@ -162,11 +345,129 @@ def upload_file():
             app.logger.warning(f'嘗試上傳非 PDF 檔案: {file.filename}')
             return redirect(url_for('index'))
             
+    except UploadRejectedError as e:
+        # 檔頭不正確：表單解析時已停止接收
+        app.logger.warning(f'拒絕上傳: {str(e)}')
+        flash('檔案不是有效的 PDF 或已損壞，請重新選擇檔案', 'error')
+        return redirect(url_for('index'))
+        
     except Exception as e:
         app.logger.error(f'處理檔案上傳時發生未預期的錯誤: {str(e)}')
         flash('處理檔案時發生錯誤，請重試', 'error')
         return redirect(url_for('index'))
 
+def describe_chunked_upload(upload):
+    """分段上傳狀態與後續請求使用的網址"""
+    status = upload.status()
+    status.update({
+        'success': True,
+        'chunk_url': url_for('chunked_upload_chunk', upload_id=upload.upload_id),
+        'status_url': url_for('chunked_upload_status', upload_id=upload.upload_id),
+        'finalize_url': url_for('chunked_upload_finalize', upload_id=upload.upload_id)
+    })
+    return status
+
+@app.route('/upload/chunked', methods=['POST'])
+def chunked_upload_init():
+    """
+    建立分段上傳
+    
+    請求內容（JSON）：filename、size 與選填的 chunk_size。
+    之後以 PUT 依偏移量上傳各分段，中斷後以 GET 查詢缺少的範圍，全部上傳後呼叫 finalize。
+    """
+    session_id = get_session_id()
+    data = request.get_json(silent=True) or {}
+    filename = str(data.get('filename', ''))
+    
+    try:
+        size = int(data.get('size', 0))
+        chunk_size = int(data.get('chunk_size') or DEFAULT_CHUNK_SIZE)
+    except (TypeError, ValueError):
+        return {'success': False, 'error': '檔案大小無效'}, 400
+    
+    if not allowed_file(filename):
+        return {'success': False, 'error': '只允許上傳 PDF 檔案'}, 400
+    if size > app.config['MAX_CONTENT_LENGTH']:
+        return {'success': False, 'error': '檔案大小超過限制'}, 413
+    
+    try:
+        upload = ChunkedUpload.create(app.config['UPLOAD_FOLDER'], session_id, filename, size, chunk_size)
+    except ChunkedUploadLimitError as e:
+        app.logger.warning(f'拒絕建立分段上傳 (會話: {session_id}): {str(e)}')
+        return {'success': False, 'error': str(e)}, 429
+    except ChunkedUploadError as e:
+        return {'success': False, 'error': str(e)}, 400
+    
+    # 沒有完成的上傳隨會話一起清理
+    for path in upload.paths:
+        register_temp_file(path, context=session_id, max_age_minutes=60)
+    
+    return describe_chunked_upload(upload), 201
+
+@app.route('/upload/chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """查詢分段上傳狀態（包含尚未上傳的位元組範圍）"""
+    try:
+        upload = ChunkedUpload.open(app.config['UPLOAD_FOLDER'], upload_id, get_session_id())
+    except ChunkedUploadNotFoundError as e:
+        return {'success': False, 'error': str(e)}, 404
+    
+    return describe_chunked_upload(upload)
+
+@app.route('/upload/chunked/<upload_id>', methods=['PUT'])
+def chunked_upload_chunk(upload_id):
+    """
+    上傳一個分段
+    
+    參數：offset（分段偏移量）；請求內容為分段的原始位元組，
+    X-Chunk-Sha256 標頭提供分段的 sha256 時會先驗證再寫入。
+    """
+    try:
+        upload = ChunkedUpload.open(app.config['UPLOAD_FOLDER'], upload_id, get_session_id())
+    except ChunkedUploadNotFoundError as e:
+        return {'success': False, 'error': str(e)}, 404
+    
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return {'success': False, 'error': '缺少分段偏移量'}, 400
+    
+    try:
+        index = upload.write_chunk(offset, request.get_data(cache=False),
+                                   request.headers.get('X-Chunk-Sha256'))
+    except UploadRejectedError as e:
+        app.logger.warning(f'拒絕分段上傳 {upload_id}: {str(e)}')
+        upload.discard()
+        return {'success': False, 'error': '檔案不是有效的 PDF'}, 415
+    except ChunkedUploadError as e:
+        return {'success': False, 'error': str(e)}, 400
+    except OSError as e:
+        app.logger.error(f'寫入分段時發生錯誤: {str(e)}')
+        return {'success': False, 'error': '寫入分段失敗，請重試'}, 500
+    
+    return {'success': True, 'chunk_index': index, 'total_chunks': upload.total_chunks}
+
+@app.route('/upload/chunked/<upload_id>/finalize', methods=['POST'])
+def chunked_upload_finalize(upload_id):
+    """完成分段上傳，並與一般上傳相同地驗證、註冊檔案"""
+    session_id = get_session_id()
+    try:
+        upload = ChunkedUpload.open(app.config['UPLOAD_FOLDER'], upload_id, session_id)
+    except ChunkedUploadNotFoundError as e:
+        return {'success': False, 'error': str(e)}, 404
+    
+    original_filename = upload.meta['filename']
+    
+    try:
+        store_uploaded_file(upload, upload.finalize(), original_filename, session_id)
+    except UploadRejectedError as e:
+        app.logger.warning(f'上傳的檔案不是有效的 PDF: {original_filename} ({str(e)})')
+        upload.discard()
+        return {'success': False, 'error': '檔案不是有效的 PDF 或已損壞'}, 415
+    except ChunkedUploadError as e:
+        return {'success': False, 'error': str(e)}, 409
+    
+    return {'success': True, 'redirect_url': url_for('upload_success')}
+
 @app.route('/upload-success')
 def upload_success():
     """顯示上傳成功頁面"""
@@ -178,7 +479,7 @@ def upload_success():
     file_info = session['uploaded_file']
     
     # 驗證檔案是否仍然存在
-    if not os.path.exists(file_info['filepath']):
+    if not source_exists(file_info['filepath']):
         flash('上傳的檔案已遺失，請重新上傳', 'error')
         cleanup_session_files()
         return redirect(url_for('index'))
@@ -197,7 +498,7 @@ def analyze_bookmarks():
     filepath = file_info['filepath']
     
     # 驗證檔案是否仍然存在
-    if not os.path.exists(filepath):
+    if not source_exists(filepath):
         flash('上傳的檔案已遺失，請重新上傳', 'error')
         cleanup_session_files()
         return redirect(url_for('index'))
@@ -205,26 +506,34 @@ def analyze_bookmarks():
     try:
         app.logger.info(f'開始分析 PDF 書籤: {file_info["original_filename"]}')
         
-        # 處理書籤
-        bookmark_result = process_pdf_bookmarks(filepath)
-        
-        if not bookmark_result['success']:
-            flash(f'書籤解析失敗: {bookmark_result["error"]}', 'error')
-            return redirect(url_for('upload_success'))
-        
         # **新方案**：將書籤數據保存到臨時文件，而不是 session
         session_id = get_session_id()
+        file_hash = file_info.get('file_hash') or compute_file_hash(filepath)
         
-        # 創建書籤數據臨時目錄
-        bookmark_temp_dir = create_temp_directory(prefix='bookmarks_', context=f"{session_id}_bookmarks", max_age_minutes=60, base_dir=TEMP_BASE_DIR)
+        # 書籤數據與以內容雜湊命名的上傳檔案放在一起，與上傳檔案相同地由各會話引用
+        bookmark_data_path = get_bookmark_data_path(filepath)
+        acquire_temp_file(bookmark_data_path, context=session_id, max_age_minutes=60)
         
-        # 保存完整書籤數據到 JSON 文件
-        bookmark_data_path = os.path.join(bookmark_temp_dir, 'bookmark_data.json')
-        with open(bookmark_data_path, 'w', encoding='utf-8') as f:
-            json.dump(bookmark_result, f, ensure_ascii=False, indent=2)
+        try:
+            # 相同內容已由其他會話分析過：直接使用分析結果
+            bookmark_result = load_bookmarks(session_id, file_hash, bookmark_data_path).data
+            app.logger.info('重複使用相同內容的書籤分析結果')
+        except (FileNotFoundError, BookmarkStoreError):
+            # 處理書籤
+            bookmark_result = process_pdf_bookmarks(filepath)
+            
+            if not bookmark_result['success']:
+                flash(f'書籤解析失敗: {bookmark_result["error"]}', 'error')
+                return redirect(url_for('upload_success'))
+            
+            # 保存完整書籤數據（精簡二進位格式，並快取在目前 worker；記憶體中的上傳檔案的書籤數據也保存在記憶體）
+            save_bookmarks(session_id, file_hash, bookmark_result, bookmark_data_path,
+                           in_memory=is_memory_file(filepath))
         
-        # 註冊文件到清理系統
-        register_temp_file(bookmark_data_path, context=f"{session_id}_bookmarks", max_age_minutes=60)
+        # 解析索引與上傳檔案放在同一目錄，隨上傳檔案一起清理
+        index_path = get_index_path(filepath)
+        if os.path.exists(index_path):
+            acquire_temp_file(index_path, context=session_id, max_age_minutes=60)
         
         # **在 session 中只存儲文件路徑和基本統計**
         session['bookmark_file_path'] = bookmark_data_path
@@ -232,12 +541,20 @@ def analyze_bookmarks():
             'total_bookmarks': len(bookmark_result.get('bookmarks', [])),
             'matched_bookmarks': len(bookmark_result.get('matched_bookmarks', [])),
             'has_bookmarks': len(bookmark_result.get('bookmarks', [])) > 0,
+            'file_hash': file_hash,
             'timestamp': datetime.now().isoformat()
         }
         
         app.logger.info(f'書籤數據已保存到臨時文件: 找到 {len(bookmark_result["bookmarks"])} 個書籤，'
                        f'其中 {len(bookmark_result["matched_bookmarks"])} 個匹配模式')
         
+        # 大多數使用者直接接受預設選擇：在使用者瀏覽選擇頁面時預先分割匹配的書籤
+        # （記憶體中的小型文件分割很快，不使用寫入磁碟的分割檔案快取）
+        if SPECULATIVE_SPLIT and SPLIT_PART_CACHE and not is_memory_file(filepath):
+            default_split_points = [b['page_num'] for b in bookmark_result['matched_bookmarks'] if b['page_num']]
+            if default_split_points:
+                start_speculative_split(session_id, filepath, default_split_points, SPLIT_ENGINE)
+        
         # 重定向到書籤選擇頁面
         return redirect(url_for('select_bookmarks'))
         
@@ -251,6 +568,14 @@ def analyze_bookmarks():
         flash('分析書籤時發生未預期的錯誤，請重試', 'error')
         return redirect(url_for('upload_success'))
 
+def load_session_bookmarks():
+    """取得目前會話的書籤數據（同一 worker 內直接使用已解碼的快取）"""
+    return load_bookmarks(
+        get_session_id(),
+        session.get('bookmark_summary', {}).get('file_hash', ''),
+        session['bookmark_file_path']
+    )
+
 @app.route('/select-bookmarks')
 def select_bookmarks():
     """顯示書籤選擇頁面"""
@@ -264,20 +589,22 @@ def select_bookmarks():
         bookmark_file_path = session['bookmark_file_path']
         
         # 檢查文件是否存在
-        if not os.path.exists(bookmark_file_path):
+        if not source_exists(bookmark_file_path):
             flash('書籤數據已過期，請重新分析', 'error')
             return redirect(url_for('upload_success'))
         
-        # 讀取完整書籤數據
-        with open(bookmark_file_path, 'r', encoding='utf-8') as f:
-            bookmark_data = json.load(f)
+        # 讀取書籤數據（頁面只顯示統計資訊，書籤樹由 /api/outline 逐層載入）
+        stored = load_session_bookmarks()
+        bookmark_data = stored.data
         
         file_info = session.get('uploaded_file', {})
         
-        app.logger.info(f'從臨時文件加載書籤數據: {len(bookmark_data.get("bookmarks", []))} 個書籤')
+        app.logger.info(f'加載書籤數據: {len(stored.table)} 個書籤')
         
         return render_template('select_bookmarks.html', 
                              bookmark_data=bookmark_data, 
+                             available_levels=stored.table.valid_levels(),
+                             split_base_name=Path(file_info.get('secure_filename', '')).stem,
                              file_info=file_info)
                              
     except Exception as e:
@@ -285,6 +612,272 @@ def select_bookmarks():
         flash('讀取書籤數據失敗，請重新分析', 'error')
         return redirect(url_for('upload_success'))
 
+def load_bookmark_table_for_api():
+    """
+    取得書籤 API 使用的書籤表格
+    
+    Returns:
+        Tuple[Optional[BookmarkTable], Optional[Tuple]]: 書籤表格與錯誤回應（兩者只有一個不是 None）
+    """
+    if 'bookmark_file_path' not in session or 'bookmark_summary' not in session:
+        return None, ({'success': False, 'error': '沒有找到書籤資料'}, 404)
+    
+    try:
+        return load_session_bookmarks().table, None
+    except FileNotFoundError:
+        return None, ({'success': False, 'error': '書籤數據已過期'}, 404)
+    except Exception as e:
+        app.logger.error(f'讀取書籤資料時發生錯誤: {str(e)}')
+        return None, ({'success': False, 'error': '讀取書籤失敗'}, 500)
+
+def bookmark_api_response(table, build_payload):
+    """
+    返回帶有強 ETag 的書籤 API 回應
+    
+    同一檔案內容（sha256）、同一組標題模式與同一查詢參數的回應內容不會改變，
+    因此 ETag 由這三者計算，瀏覽器重新驗證時不必重新產生 JSON。
+    
+    Args:
+        table: 書籤表格
+        build_payload: 產生回應資料的函數（ETag 相符時不會呼叫）
+    """
+    file_hash = session['bookmark_summary'].get('file_hash', '')
+    etag_source = '\0'.join([file_hash, *table.pattern_names, request.full_path])
+    etag = hashlib.sha256(etag_source.encode('utf-8')).hexdigest()[:32]
+    
+    if file_hash and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        payload = build_payload()
+        payload['success'] = True
+        response = app.json.response(payload)
+    
+    if file_hash:
+        response.set_etag(etag)
+        # 會話專屬資料：只允許瀏覽器快取，每次使用前重新驗證
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/api/bookmarks')
+def bookmark_page():
+    """
+    分頁返回有效書籤
+    
+    參數：offset 與 limit（分頁）、matches_pattern（true 或 false）、level（層級）、q（標題搜尋）。
+    """
+    table, error = load_bookmark_table_for_api()
+    if error:
+        return error
+    
+    matches_pattern = request.args.get('matches_pattern')
+    if matches_pattern is not None:
+        matches_pattern = matches_pattern.lower() in ('1', 'true', 'yes')
+    level = request.args.get('level', type=int)
+    query = request.args.get('q', '').strip() or None
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', BOOKMARK_PAGE_SIZE, type=int), 1), BOOKMARK_PAGE_SIZE)
+    
+    def build_payload():
+        rows = table.select_rows(matches_pattern=matches_pattern, level=level, query=query)
+        end = offset + limit
+        return {
+            'total': len(rows),
+            'offset': offset,
+            'limit': limit,
+            'next_offset': end if end < len(rows) else None,
+            'bookmarks': [table.row(row) for row in rows[offset:end]]
+        }
+    
+    return bookmark_api_response(table, build_payload)
+
+@app.route('/api/bookmarks/pages')
+def bookmark_pages():
+    """
+    返回所有書籤的頁碼（索引為書籤 id - 1，0 表示無效頁碼）
+    
+    選擇頁面只在載入時取得一次，之後的分割預覽完全在瀏覽器計算。
+    """
+    table, error = load_bookmark_table_for_api()
+    if error:
+        return error
+    
+    return bookmark_api_response(table, lambda: {'pages': table.pages.tolist()})
+
+@app.route('/api/outline')
+def outline_nodes():
+    """
+    逐層返回書籤樹節點
+    
+    參數：parent（父書籤 id，預設為最上層）、depth（展開層數）、offset 與 limit（子書籤分頁）。
+    每個節點都帶有子書籤數量，沒有一併返回子書籤的節點由前端在展開時再次查詢。
+    """
+    table, error = load_bookmark_table_for_api()
+    if error:
+        return error
+    
+    parent_id = max(request.args.get('parent', 0, type=int), 0)
+    depth = max(request.args.get('depth', OUTLINE_DEFAULT_DEPTH, type=int), 1)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', OUTLINE_MAX_NODES, type=int), 1), OUTLINE_MAX_NODES)
+    
+    if parent_id > len(table):
+        return {'success': False, 'error': '找不到書籤'}, 404
+    
+    return bookmark_api_response(table, lambda: table.outline_nodes(parent_id, depth, offset, limit))
+
+@app.route('/api/outline/selection')
+def outline_selection():
+    """
+    返回批次選擇的書籤 id（只包含有效書籤）
+    
+    參數：mode 為 matched（匹配模式）、all（全部）或 level（指定層級，需提供 level）。
+    """
+    table, error = load_bookmark_table_for_api()
+    if error:
+        return error
+    
+    mode = request.args.get('mode', 'matched')
+    level = request.args.get('level', type=int)
+    if mode not in ('matched', 'all', 'level') or (mode == 'level' and level is None):
+        return {'success': False, 'error': '無效的選擇方式'}, 400
+    
+    def build_payload():
+        rows = table.select_rows(matches_pattern=True if mode == 'matched' else None,
+                                 level=level if mode == 'level' else None)
+        return {'mode': mode, 'level': level, 'ids': [row + 1 for row in rows]}
+    
+    return bookmark_api_response(table, build_payload)
+
+def run_split_job(session_id, pdf_path, split_points, split_count, file_info, progress_callback=None):
+    """
+    背景分割任務：執行 PDF 分割與 ZIP 創建，並將結果保存到臨時文件
+    
+    此函數在工作池線程中執行，不能存取 request 或 session，
+    需要寫回 session 的資訊透過返回值交給請求線程處理。
+    """
+    app.logger.info(f'開始分割 PDF: {len(split_points)} 個分割點')
+    
+    # 上傳檔案以內容雜湊命名，分割檔案與 ZIP 使用上傳時的檔案名稱
+    base_name = Path(file_info['secure_filename']).stem
+    
+    # 記憶體中的上傳檔案：分割檔案與分割結果也保存在記憶體，ZIP 在下載時由記憶體串流產生
+    in_memory = is_memory_file(pdf_path)
+    
+    # 停止此會話的推測分割；已完成的分割段在快取中，下面的分割直接取用
+    speculation = settle_speculative_split(session_id, split_points)
+    if speculation is not None:
+        app.logger.info(f'推測分割{"命中" if speculation["matched"] else "未命中"}: '
+                       f'狀態 {speculation["state"]}，CPU {speculation["cpu_time"]} 秒')
+    
+    # 管線模式：每完成一個分割檔案就直接從記憶體加入 ZIP
+    zip_writer = None
+    if ZIP_MODE == 'pipeline' and not in_memory:
+        zip_dir = create_temp_directory(prefix='zip_output_', context=session_id, max_age_minutes=120, base_dir=TEMP_BASE_DIR)
+        zip_filename = generate_split_zip_filename(file_info['secure_filename'])
+        zip_writer = ZipArchiveWriter(os.path.join(zip_dir, zip_filename), compression=ZIP_COMPRESSION)
+    
+    # 執行 PDF 分割
+    try:
+        split_result = split_pdf(
+            pdf_path, split_points,
+            progress_callback=progress_callback,
+            parallel=SPLIT_PROCESS_WORKERS > 1,
+            max_workers=SPLIT_PROCESS_WORKERS,
+            engine=SPLIT_ENGINE,
+            use_cache=SPLIT_PART_CACHE,
+            part_consumer=(lambda part, data: zip_writer.add(part['filename'], data)) if zip_writer else None,
+            base_name=base_name,
+            in_memory=in_memory
+        )
+        
+        if not split_result['success']:
+            raise PDFSplittingError('PDF 分割失敗，請重試')
+    except Exception:
+        if zip_writer is not None:
+            zip_writer.abort()
+        raise
+    
+    app.logger.info(f'PDF 分割成功: 創建了 {split_result["total_parts"]} 個檔案')
+    
+    warnings = []
+    zip_info = None
+    if zip_writer is not None:
+        try:
+            zip_result = zip_writer.close()
+            app.logger.info(f'ZIP 創建成功: {zip_result["zip_filename"]}, '
+                           f'壓縮率 {zip_result["compression_ratio"]}%')
+            zip_info = {
+                'success': True,
+                'zip_filename': zip_result['zip_filename'],
+                'zip_path': zip_result['zip_path'],
+                'compression_ratio': zip_result.get('compression_ratio', 0),
+                # 為模板添加詳細字段
+                'zip_size_mb': zip_result['zip_size_mb'],
+                'total_files': zip_result['total_files'],
+                'original_size_mb': zip_result['original_size_mb'],
+                'processing_time': zip_result.get('processing_time', 0)
+            }
+        except ZipCreationError as e:
+            # 改用下載時串流產生 ZIP
+            app.logger.error(f'ZIP 創建錯誤: {str(e)}')
+    
+    if zip_info is None:
+        # ZIP 檔案在下載時由分割檔案即時串流產生，不在磁碟上暫存
+        zip_info = describe_split_zip_stream(split_result)
+        if not zip_info['success']:
+            warnings.append('沒有可以打包的分割檔案，請使用個別檔案下載')
+    
+    # 只保存必要的引用信息，避免 session 過大
+    split_summary = {
+        'success': True,
+        'total_parts': split_result['total_parts'],
+        'split_count': split_count,
+        'timestamp': datetime.now().isoformat()
+    }
+    
+    # 註冊分割文件到清理系統
+    for part in split_result['split_files']:
+        register_temp_file(
+            part['filepath'], 
+            context=f"{session_id}_split", 
+            max_age_minutes=120
+        )
+    
+    # 包含模板需要的完整信息
+    download_info = {
+        'split_files': split_result['split_files'],
+        'total_parts': split_result['total_parts'],
+        'success': split_result['success'],
+        # 為模板添加必要的字段
+        'original_info': split_result.get('original_info', {
+            'filename': file_info.get('original_filename', ''),
+            'total_pages': file_info.get('total_pages', 0),
+            'size_mb': round(file_info.get('file_size', 0) / 1024 / 1024, 2)
+        }),
+        'split_summary': split_result.get('split_summary', {
+            'total_output_size': sum(f.get('file_size', 0) for f in split_result.get('split_files', []))
+        }),
+        'processing_time': split_result.get('processing_time', 0)
+    }
+    split_result_data = json.dumps(download_info, ensure_ascii=False, indent=2).encode('utf-8')
+    
+    # 暫時存儲完整結果用於下載（不放在 session 中）；記憶體模式只決定路徑，記憶體層拒絕時才建立臨時目錄
+    split_result_path = os.path.join(TEMP_BASE_DIR, f'split_results_{uuid.uuid4().hex}', 'split_result.json')
+    if not (in_memory and put_memory_file(split_result_path, split_result_data)):
+        temp_dir = create_temp_directory(prefix='split_results_', context=session_id, max_age_minutes=120, base_dir=TEMP_BASE_DIR)
+        split_result_path = os.path.join(temp_dir, 'split_result.json')
+        with open(split_result_path, 'wb') as f:
+            f.write(split_result_data)
+    
+    register_temp_file(split_result_path, context=session_id, max_age_minutes=120)
+    
+    return {
+        'split_summary': split_summary,
+        'zip_info': zip_info,
+        'split_result_path': split_result_path,
+        'warnings': warnings
+    }
+
 @app.route('/process-split', methods=['POST'])
 def process_split():
     """處理分割請求"""
@@ -306,17 +899,12 @@ def process_split():
         
         # 從臨時文件讀取書籤數據
         bookmark_file_path = session['bookmark_file_path']
-        if not os.path.exists(bookmark_file_path):
+        if not source_exists(bookmark_file_path):
             flash('書籤數據已過期，請重新分析', 'error')
             return redirect(url_for('upload_success'))
         
-        with open(bookmark_file_path, 'r', encoding='utf-8') as f:
-            bookmark_data = json.load(f)
-        
-        bookmarks = bookmark_data['bookmarks']
-        
         # 找到選中的書籤
-        selected_bookmarks = [b for b in bookmarks if b['id'] in selected_ids and b['valid']]
+        selected_bookmarks = load_session_bookmarks().select(selected_ids)
         
         if not selected_bookmarks:
             flash('所選書籤無效，請重新選擇', 'error')
@@ -334,66 +922,34 @@ def process_split():
         pdf_path = file_info['filepath']
         
         # 驗證原始檔案是否仍然存在
-        if not os.path.exists(pdf_path):
+        if not source_exists(pdf_path):
             flash('原始 PDF 檔案已遺失，請重新上傳', 'error')
             cleanup_session_files()
             return redirect(url_for('index'))
         
-        app.logger.info(f'開始分割 PDF: {len(split_points)} 個分割點')
-        
-        # 執行 PDF 分割
-        split_result = split_pdf(pdf_path, split_points)
-        
-        if not split_result['success']:
-            flash('PDF 分割失敗，請重試', 'error')
-            return redirect(url_for('select_bookmarks'))
-        
-        app.logger.info(f'PDF 分割成功: 創建了 {split_result["total_parts"]} 個檔案')
-        
-        # 自動創建 ZIP 檔案
-        zip_result = None
-        try:
-            app.logger.info('開始創建 ZIP 檔案...')
-            zip_result = create_zip_from_pdf_split_result(split_result)
-            
-            if zip_result['success']:
-                app.logger.info(f'ZIP 創建成功: {zip_result["zip_filename"]}, '
-                               f'壓縮率 {zip_result["compression_ratio"]}%')
-            else:
-                app.logger.warning('ZIP 創建失敗，但繼續提供單檔下載')
-                
-        except ZipCreationError as e:
-            app.logger.error(f'ZIP 創建錯誤: {str(e)}')
-            flash(f'ZIP 檔案創建失敗: {str(e)}，但您仍可以下載個別檔案', 'warning')
-            
-        except Exception as e:
-            app.logger.error(f'ZIP 創建時發生未預期錯誤: {str(e)}')
-            flash('ZIP 檔案創建時發生錯誤，但您仍可以下載個別檔案', 'warning')
+        # 預覽在瀏覽器計算，提交時以伺服器驗證分割點為準
+        if file_info.get('total_pages'):
+            try:
+                validate_split_points(split_points, file_info['total_pages'])
+            except InvalidSplitPointError as e:
+                flash(f'分割點無效: {str(e)}', 'error')
+                return redirect(url_for('select_bookmarks'))
         
-        # 將分割結果和 ZIP 結果儲存到 session
-        # 只保存必要的引用信息，避免 session 過大
-        session['split_summary'] = {
-            'success': True,
-            'total_parts': split_result['total_parts'],
-            'split_count': len(selected_bookmarks),
-            'timestamp': datetime.now().isoformat()
-        }
+        session_id = get_session_id()
         
-        # 只保存 ZIP 文件的關鍵信息
-        if zip_result and zip_result.get('success'):
-            session['zip_info'] = {
-                'success': True,
-                'zip_filename': zip_result['zip_filename'],
-                'zip_path': zip_result['zip_path'],
-                'compression_ratio': zip_result.get('compression_ratio', 0),
-                # 為模板添加詳細字段
-                'zip_size_mb': round(zip_result.get('zip_size', 0) / 1024 / 1024, 2),
-                'total_files': len(split_result['split_files']),
-                'original_size_mb': round(sum(f.get('file_size', 0) for f in split_result.get('split_files', [])) / 1024 / 1024, 2),
-                'processing_time': zip_result.get('processing_time', 0)
-            }
-        else:
-            session['zip_info'] = {'success': False}
+        # 防止重複提交：同一會話已有處理中的任務時直接返回該任務
+        pending_job = adopt_split_job_result()
+        if pending_job is not None and pending_job['status'] in (JOB_QUEUED, JOB_RUNNING):
+            app.logger.info(f'會話已有處理中的分割任務 {pending_job["id"]}，忽略重複提交')
+            if request.is_json or request.accept_mimetypes.best == 'application/json':
+                return {
+                    'success': True,
+                    'job_id': pending_job['id'],
+                    'status_url': url_for('split_status', job_id=pending_job['id']),
+                    'duplicate': True
+                }
+            flash('分割任務正在處理中，請稍候', 'info')
+            return redirect(url_for('split_results'))
         
         # 保存選中書籤的簡化信息
         session['selected_split_points'] = [
@@ -401,59 +957,36 @@ def process_split():
             for b in selected_bookmarks
         ]
         
-        # 使用文件清理系統來存儲完整的分割結果引用
-        session_id = get_session_id()
-        
-        # 註冊分割文件到清理系統
-        for i, file_info in enumerate(split_result['split_files']):
-            register_temp_file(
-                file_info['filepath'], 
-                context=f"{session_id}_split", 
-                max_age_minutes=120
-            )
+        # 清除上一次的分割結果，避免結果頁面顯示舊資料
+        session.pop('split_summary', None)
+        session.pop('zip_info', None)
+        session.pop('split_result_path', None)
         
-        # 註冊 ZIP 文件
-        if zip_result and zip_result.get('success'):
-            register_temp_file(
-                zip_result['zip_path'], 
-                context=f"{session_id}_zip", 
-                max_age_minutes=120
-            )
+        # **提交背景任務**：分割與壓縮在工作池中執行，請求線程立即返回
+        job_id = submit_job(
+            run_split_job, session_id, pdf_path, split_points,
+            len(selected_bookmarks), dict(file_info),
+            context=session_id, with_progress=True
+        )
+        session['split_job_id'] = job_id
         
-        # 暫時存儲完整結果用於下載（不放在 session 中）
-        # 使用 session_id 作為鍵來存儲到臨時位置
-        temp_dir = create_temp_directory(prefix='split_results_', context=session_id, max_age_minutes=120, base_dir=TEMP_BASE_DIR)
+        app.logger.info(f'已提交分割任務 {job_id}: {len(split_points)} 個分割點')
         
-        # 保存分割結果到臨時文件
-        split_result_path = os.path.join(temp_dir, 'split_result.json')
-        with open(split_result_path, 'w', encoding='utf-8') as f:
-            # 包含模板需要的完整信息
-            download_info = {
-                'split_files': split_result['split_files'],
-                'total_parts': split_result['total_parts'],
-                'success': split_result['success'],
-                # 為模板添加必要的字段
-                'original_info': split_result.get('original_info', {
-                    'filename': file_info.get('original_filename', ''),
-                    'total_pages': 0,  # 這個信息可能不在 split_result 中
-                    'size_mb': round(file_info.get('file_size', 0) / 1024 / 1024, 2)
-                }),
-                'split_summary': split_result.get('split_summary', {
-                    'total_output_size': sum(f.get('file_size', 0) for f in split_result.get('split_files', []))
-                }),
-                'processing_time': split_result.get('processing_time', 0)
+        # API 客戶端直接返回任務 ID
+        if request.is_json or request.accept_mimetypes.best == 'application/json':
+            return {
+                'success': True,
+                'job_id': job_id,
+                'status_url': url_for('split_status', job_id=job_id),
+                'progress_url': url_for('split_progress', job_id=job_id)
             }
-            json.dump(download_info, f, ensure_ascii=False, indent=2)
-        
-        register_temp_file(split_result_path, context=session_id, max_age_minutes=120)
-        session['split_result_path'] = split_result_path
         
-        # 重定向到結果頁面
+        # 重定向到結果頁面（任務完成前顯示處理中狀態）
         return redirect(url_for('split_results'))
         
-    except (PDFSplittingError, InvalidSplitPointError) as e:
-        app.logger.error(f'PDF 分割錯誤: {str(e)}')
-        flash(f'PDF 分割失敗: {str(e)}', 'error')
+    except JobQueueError as e:
+        app.logger.error(f'提交分割任務失敗: {str(e)}')
+        flash('伺服器忙碌中，請稍後重試', 'error')
         return redirect(url_for('select_bookmarks'))
         
     except ValueError:
@@ -465,9 +998,156 @@ def process_split():
         flash('處理分割請求時發生錯誤，請重試', 'error')
         return redirect(url_for('select_bookmarks'))
 
+def adopt_split_job_result():
+    """
+    檢查 session 中的分割任務，任務完成後將結果寫回 session
+    
+    Returns:
+        Optional[Dict]: 任務仍在處理中或失敗時返回任務狀態，否則返回 None
+    """
+    job_id = session.get('split_job_id')
+    if not job_id:
+        return None
+    
+    job = get_job_status(job_id)
+    if job is None or job['context'] != session.get('session_id'):
+        # 任務已過期或不屬於此會話
+        session.pop('split_job_id', None)
+        return None
+    
+    if job['status'] == JOB_DONE:
+        result = job['result']
+        session['split_summary'] = result['split_summary']
+        session['zip_info'] = result['zip_info']
+        session['split_result_path'] = result['split_result_path']
+        for warning in result.get('warnings', []):
+            flash(warning, 'warning')
+        session.pop('split_job_id', None)
+        return None
+    
+    return job
+
+def build_progress_event(job):
+    """
+    將任務狀態轉換為進度事件（頁數、檔案數、寫入位元組與預估剩餘時間）
+    
+    Args:
+        job: get_job_status 返回的任務狀態
+        
+    Returns:
+        Dict: 進度事件資料
+    """
+    progress = job.get('progress', {})
+    split_progress = progress.get('split', {})
+    zip_progress = progress.get('zip', {})
+    stage = progress.get('current_stage', 'split')
+    
+    # 以目前階段的處理速度估算剩餘時間
+    eta_seconds = None
+    if stage == 'split' and split_progress.get('pages_done'):
+        done = split_progress['pages_done']
+        eta_seconds = split_progress['elapsed_time'] * (split_progress['total_pages'] - done) / done
+    elif stage == 'zip' and zip_progress.get('bytes_done'):
+        done = zip_progress['bytes_done']
+        eta_seconds = zip_progress['elapsed_time'] * (zip_progress['total_bytes'] - done) / done
+    
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': stage,
+        'pages_done': split_progress.get('pages_done', 0),
+        'total_pages': split_progress.get('total_pages', 0),
+        'parts_written': split_progress.get('parts_done', 0),
+        'total_parts': split_progress.get('total_parts', 0),
+        'bytes_written': split_progress.get('bytes_written', 0),
+        'zip_files_done': zip_progress.get('files_done', 0),
+        'zip_total_files': zip_progress.get('total_files', 0),
+        'eta_seconds': round(eta_seconds, 1) if eta_seconds is not None else None,
+        'elapsed_time': round(job['elapsed_time'], 2),
+        'error': job['error']
+    }
+
+@app.route('/split-status/<job_id>')
+def split_status(job_id):
+    """查詢分割任務狀態"""
+    job = get_job_status(job_id)
+    
+    if job is None or job['context'] != session.get('session_id'):
+        return {'success': False, 'error': '找不到分割任務'}, 404
+    
+    event = build_progress_event(job)
+    event['success'] = True
+    return event
+
+# SSE 串流的輪詢間隔與最長持續時間（秒），超時後由瀏覽器 EventSource 自動重新連線
+PROGRESS_POLL_INTERVAL = 0.5
+PROGRESS_STREAM_MAX_SECONDS = 300
+
+@app.route('/split-progress/<job_id>')
+def split_progress(job_id):
+    """以 Server-Sent Events 串流分割任務進度"""
+    job = get_job_status(job_id)
+    
+    if job is None or job['context'] != session.get('session_id'):
+        return {'success': False, 'error': '找不到分割任務'}, 404
+    
+    def generate():
+        last_version = None
+        last_send = 0
+        stream_start = time_module.time()
+        
+        while time_module.time() - stream_start < PROGRESS_STREAM_MAX_SECONDS:
+            current = get_job_status(job_id)
+            if current is None:
+                yield 'event: gone\ndata: {}\n\n'
+                return
+            
+            version = (current['status'], current['progress_version'])
+            now = time_module.time()
+            if version != last_version:
+                last_version = version
+                last_send = now
+                event = build_progress_event(current)
+                yield f'data: {json.dumps(event, ensure_ascii=False)}\n\n'
+                
+                if current['status'] in (JOB_DONE, JOB_FAILED):
+                    return
+            elif now - last_send > 15:
+                # 心跳，避免代理伺服器關閉閒置連線
+                last_send = now
+                yield ': keep-alive\n\n'
+            
+            time_module.sleep(PROGRESS_POLL_INTERVAL)
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @app.route('/split-results')
 def split_results():
     """顯示分割結果頁面"""
+    # 如果有背景任務，先檢查其狀態
+    job = adopt_split_job_result()
+    if job is not None:
+        if job['status'] == JOB_FAILED:
+            session.pop('split_job_id', None)
+            app.logger.error(f'分割任務 {job["id"]} 失敗: {job["error"]}')
+            flash(f'PDF 分割失敗: {job["error"]}', 'error')
+            return redirect(url_for('select_bookmarks'))
+        
+        # 任務仍在佇列或執行中，顯示處理中狀態
+        return render_template('split_results.html',
+                             split_job=job,
+                             split_result=None,
+                             zip_result=None,
+                             file_info=session.get('uploaded_file', {}),
+                             selected_bookmarks=session.get('selected_split_points', []))
+    
     # 檢查是否有分割結果摘要
     if 'split_summary' not in session or 'split_result_path' not in session:
         flash('沒有找到分割結果，請重新進行分割', 'warning')
@@ -476,12 +1156,12 @@ def split_results():
     try:
         # 從臨時文件讀取完整的分割結果
         split_result_path = session['split_result_path']
-        if not os.path.exists(split_result_path):
+        if not source_exists(split_result_path):
             flash('分割結果已過期，請重新分割', 'error')
             return redirect(url_for('select_bookmarks'))
         
         import json
-        with open(split_result_path, 'r', encoding='utf-8') as f:
+        with open_source(split_result_path) as f:
             split_result = json.load(f)
         
         # 從 session 獲取其他信息
@@ -490,6 +1170,7 @@ def split_results():
         selected_split_points = session.get('selected_split_points', [])
         
         return render_template('split_results.html', 
+                             split_job=None,
                              split_result=split_result,
                              zip_result=zip_info,  # 使用 zip_info 而不是 zip_result
                              file_info=file_info,
@@ -511,12 +1192,12 @@ def download_file(file_index):
     try:
         # 從臨時文件讀取分割結果
         split_result_path = session['split_result_path']
-        if not os.path.exists(split_result_path):
+        if not source_exists(split_result_path):
             flash('分割結果已過期，請重新分割', 'error')
             return redirect(url_for('split_results'))
         
         import json
-        with open(split_result_path, 'r', encoding='utf-8') as f:
+        with open_source(split_result_path) as f:
             split_result = json.load(f)
         
         split_files = split_result['split_files']
@@ -531,14 +1212,14 @@ def download_file(file_index):
         file_path = file_info['filepath']
         
         # 檢查檔案是否存在
-        if not os.path.exists(file_path):
+        if not source_exists(file_path):
             flash(f'檔案 {file_info["filename"]} 已遺失', 'error')
             return redirect(url_for('split_results'))
         
-        # 使用 Flask 的 send_file 發送檔案
+        # 使用 Flask 的 send_file 發送檔案（記憶體檔案以檔案物件發送）
         from flask import send_file
         return send_file(
-            file_path,
+            open_source(file_path) if is_memory_file(file_path) else file_path,
             as_attachment=True,
             download_name=file_info['filename'],
             mimetype='application/pdf'
@@ -549,6 +1230,15 @@ def download_file(file_index):
         flash('下載檔案時發生錯誤，請重試', 'error')
         return redirect(url_for('split_results'))
 
+def build_attachment_header(filename):
+    """生成附件下載的 Content-Disposition 標頭（支援非 ASCII 檔名）"""
+    try:
+        filename.encode('ascii')
+        return f'attachment; filename="{filename}"'
+    except UnicodeEncodeError:
+        ascii_name = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        return f'attachment; filename="{ascii_name}"; filename*=UTF-8\'\'{quote(filename)}'
+
 @app.route('/download-zip')
 def download_zip():
     """下載 ZIP 檔案"""
@@ -564,24 +1254,55 @@ def download_zip():
         flash('ZIP 檔案創建失敗', 'error')
         return redirect(url_for('split_results'))
     
-    zip_path = zip_info['zip_path']
-    
-    # 檢查 ZIP 檔案是否存在
-    if not os.path.exists(zip_path):
-        flash(f'ZIP 檔案 {zip_info["zip_filename"]} 已遺失', 'error')
-        return redirect(url_for('split_results'))
-    
     try:
-        # 使用 Flask 的 send_file 發送 ZIP 檔案
-        from flask import send_file
+        # 管線模式已在分割時建立 ZIP 檔案
+        if not zip_info.get('streaming'):
+            zip_path = zip_info['zip_path']
+            if not os.path.exists(zip_path):
+                flash(f'ZIP 檔案 {zip_info["zip_filename"]} 已遺失', 'error')
+                return redirect(url_for('split_results'))
+            
+            from flask import send_file
+            
+            app.logger.info(f'開始下載 ZIP 檔案: {zip_info["zip_filename"]}')
+            
+            return send_file(
+                zip_path,
+                as_attachment=True,
+                download_name=zip_info['zip_filename'],
+                mimetype='application/zip'
+            )
         
-        app.logger.info(f'開始下載 ZIP 檔案: {zip_info["zip_filename"]}')
+        # 從臨時文件讀取分割檔案列表
+        split_result_path = session.get('split_result_path')
+        if not split_result_path or not source_exists(split_result_path):
+            flash('分割結果已過期，請重新分割', 'error')
+            return redirect(url_for('split_results'))
         
-        return send_file(
-            zip_path,
-            as_attachment=True,
-            download_name=zip_info['zip_filename'],
-            mimetype='application/zip'
+        with open_source(split_result_path) as f:
+            split_result = json.load(f)
+        
+        file_paths = [part['filepath'] for part in split_result.get('split_files', [])
+                      if source_exists(part['filepath'])]
+        if not file_paths:
+            flash(f'ZIP 檔案 {zip_info["zip_filename"]} 的分割檔案已遺失', 'error')
+            return redirect(url_for('split_results'))
+        
+        # 壓縮策略可由查詢參數覆寫（?compression=store）
+        compression = request.args.get('compression', ZIP_COMPRESSION)
+        if compression not in COMPRESSION_MODES:
+            compression = ZIP_COMPRESSION
+        
+        app.logger.info(f'開始串流下載 ZIP 檔案: {zip_info["zip_filename"]} ({len(file_paths)} 個檔案, 壓縮策略 {compression})')
+        
+        # 邊讀取分割檔案邊壓縮輸出，第一個檔案開始壓縮時即送出第一個位元組
+        return Response(
+            stream_zip_from_files(file_paths, compression=compression),
+            mimetype='application/zip',
+            headers={
+                'Content-Disposition': build_attachment_header(zip_info['zip_filename']),
+                'X-Accel-Buffering': 'no'
+            }
         )
     except Exception as e:
         app.logger.error(f'下載 ZIP 檔案時發生錯誤: {str(e)}')
@@ -590,7 +1311,11 @@ def download_zip():
 
 @app.route('/preview-split', methods=['POST'])
 def preview_split():
-    """預覽分割結果（不實際分割檔案）"""
+    """
+    預覽分割結果（不實際分割檔案）
+    
+    書籤選擇頁面已改為在瀏覽器計算預覽，此端點保留給 API 客戶端取得伺服器端的計算結果。
+    """
     # 檢查是否有必要的資料
     if 'bookmark_file_path' not in session or 'uploaded_file' not in session:
         return {'success': False, 'error': '會話資料遺失'}
@@ -605,16 +1330,11 @@ def preview_split():
         
         # 從臨時文件讀取書籤數據
         bookmark_file_path = session['bookmark_file_path']
-        if not os.path.exists(bookmark_file_path):
+        if not source_exists(bookmark_file_path):
             return {'success': False, 'error': '書籤數據已過期'}
         
-        with open(bookmark_file_path, 'r', encoding='utf-8') as f:
-            bookmark_data = json.load(f)
-        
-        bookmarks = bookmark_data['bookmarks']
-        
         # 找到選中的書籤
-        selected_bookmarks = [b for b in bookmarks if b['id'] in selected_bookmark_ids and b['valid']]
+        selected_bookmarks = load_session_bookmarks().select(int(bid) for bid in selected_bookmark_ids)
         split_points = [b['page_num'] for b in selected_bookmarks if b['page_num']]
         
         # 獲取原始 PDF 檔案路徑
@@ -622,7 +1342,8 @@ def preview_split():
         pdf_path = file_info['filepath']
         
         # 生成預覽
-        preview_result = get_split_preview(pdf_path, split_points)
+        preview_result = get_split_preview(pdf_path, split_points,
+                                           base_name=Path(file_info['secure_filename']).stem)
         return preview_result
         
     except Exception as e:
@@ -645,6 +1366,11 @@ def cleanup_stats():
     stats = get_cleanup_stats()
     return {
         'cleanup_stats': stats,
+        'reader_cache_stats': get_reader_cache_stats(),
+        'part_cache_stats': get_part_cache_stats(),
+        'bookmark_store_stats': get_bookmark_store_stats(),
+        'speculative_split_stats': get_speculative_split_stats(),
+        'memory_tier_stats': get_memory_tier_stats(),
         'message': 'File cleanup statistics'
     }
 
@@ -683,6 +1409,11 @@ def periodic_cleanup():
                 cleaned_count = cleanup_expired_files()
                 if cleaned_count > 0:
                     app.logger.info(f'定期清理: 清理了 {cleaned_count} 個過期文件')
+                
+                # 釋放已刪除檔案的 PDF 讀取器快取（關閉檔案控制代碼）
+                pruned_count = prune_reader_cache()
+                if pruned_count > 0:
+                    app.logger.info(f'定期清理: 移除了 {pruned_count} 個失效的 PDF 讀取器快取')
                     
         except Exception as e:
             if app:
@@ -0,0 +1,253 @@
+"""
+書籤資料儲存模組
+保存書籤分析結果的精簡二進位檔案，並在同一個 worker 內以 LRU 快取已解碼的結果，
+選擇、預覽與分割請求不必每次重新讀取並解析整份 JSON
+
+分析結果只由 PDF 內容決定：檔案與以內容雜湊命名的上傳檔案放在一起，
+再次上傳相同內容的會話直接使用，不必重新分析
+"""
+
+import os
+import marshal
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List
+
+from bookmark_table import BookmarkTable
+from memory_tier import put_memory_file, open_source
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 檔案格式：魔術字串 + marshal 編碼的分析結果（書籤表格以欄位保存）；格式改變時遞增版本
+BOOKMARK_STORE_MAGIC = b'BMS2'
+BOOKMARK_DATA_SUFFIX = '.bookmarks'
+
+# 每個 worker 保留的已解碼結果數量（可透過環境變數調整）
+DEFAULT_MAX_ENTRIES = int(os.environ.get('BOOKMARK_STORE_ENTRIES', 32))
+
+class BookmarkStoreError(Exception):
+    """書籤資料儲存錯誤"""
+    pass
+
+def get_bookmark_data_path(pdf_path: str) -> str:
+    """
+    獲取 PDF 檔案的書籤資料檔案路徑（與 PDF 位於同一目錄）
+
+    Args:
+        pdf_path: PDF 檔案路徑
+
+    Returns:
+        str: 書籤資料檔案路徑
+    """
+    return pdf_path + BOOKMARK_DATA_SUFFIX
+
+def _encode_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """將分析結果轉換為 marshal 可序列化的格式（匹配書籤在載入時由表格重建）"""
+    payload = dict(result)
+    bookmarks = payload.get('bookmarks')
+    if isinstance(bookmarks, BookmarkTable):
+        payload['bookmarks'] = bookmarks.to_columns()
+        payload['matched_bookmarks'] = None
+    return payload
+
+def _decode_result(payload: Any) -> Dict[str, Any]:
+    """還原 _encode_result 的結果"""
+    if not isinstance(payload, dict):
+        raise ValueError("書籤資料不是分析結果")
+    columns = payload.get('bookmarks')
+    if isinstance(columns, dict):
+        table = BookmarkTable.from_columns(columns)
+        payload['bookmarks'] = table
+        payload['matched_bookmarks'] = table.matched()
+    return payload
+
+class StoredBookmarks:
+    """已解碼的書籤分析結果（書籤表格的列索引即為 id 索引）"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.table = BookmarkTable.coerce(data.get('bookmarks', []))
+
+    def select(self, bookmark_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        依書籤 id 取出選中且有效的書籤
+
+        Args:
+            bookmark_ids: 書籤 id 列表
+
+        Returns:
+            List[Dict]: 選中的書籤（依文件順序）
+        """
+        selected = []
+        for bookmark_id in sorted(set(bookmark_ids)):
+            bookmark = self.table.get(bookmark_id)
+            if bookmark is not None and bookmark['valid']:
+                selected.append(bookmark)
+        return selected
+
+class BookmarkStore:
+    """
+    書籤資料儲存 - 以檔案雜湊為鍵的 LRU 快取，檔案作為跨 worker 的備份
+
+    相同內容的會話共用同一個已解碼的結果；每個項目記錄使用中的會話，
+    所有會話都結束後才移除。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+
+    def _put(self, session_id: str, file_hash: str, path: str, stored: StoredBookmarks):
+        """加入快取並淘汰最久未使用的項目"""
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            sessions = entry['sessions'] if entry is not None and entry['path'] == path else set()
+            sessions.add(session_id)
+            self._entries[file_hash] = {'path': path, 'bookmarks': stored, 'sessions': sessions}
+            self._entries.move_to_end(file_hash)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self, session_id: str, file_hash: str, result: Dict[str, Any], path: str,
+             in_memory: bool = False) -> str:
+        """
+        保存書籤分析結果
+
+        Args:
+            session_id: 會話 ID
+            file_hash: PDF 檔案的 sha256
+            result: process_pdf_bookmarks 的結果
+            path: 書籤資料檔案路徑（見 get_bookmark_data_path）
+            in_memory: 是否保存為記憶體檔案（記憶體層拒絕時寫入檔案）
+
+        Returns:
+            str: 書籤資料檔案路徑
+        """
+        data = BOOKMARK_STORE_MAGIC + marshal.dumps(_encode_result(result))
+        if not (in_memory and put_memory_file(path, data)):
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+        self._put(session_id, file_hash, path, StoredBookmarks(result))
+        logger.debug(f"保存書籤資料: {path} ({len(result.get('bookmarks', []))} 個書籤)")
+        return path
+
+    def load(self, session_id: str, file_hash: str, path: str) -> StoredBookmarks:
+        """
+        取得書籤分析結果，快取中沒有時（例如由其他 worker 或其他會話分析）從檔案讀取
+
+        Args:
+            session_id: 會話 ID
+            file_hash: PDF 檔案的 sha256
+            path: 書籤資料檔案路徑
+
+        Returns:
+            StoredBookmarks: 書籤資料
+
+        Raises:
+            FileNotFoundError: 書籤資料檔案不存在
+            BookmarkStoreError: 書籤資料檔案格式不正確
+        """
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is not None and entry['path'] == path:
+                self._entries.move_to_end(file_hash)
+                entry['sessions'].add(session_id)
+                self._hits += 1
+                return entry['bookmarks']
+            self._misses += 1
+
+        with open_source(path) as f:
+            if f.read(len(BOOKMARK_STORE_MAGIC)) != BOOKMARK_STORE_MAGIC:
+                raise BookmarkStoreError(f"不是書籤資料檔案: {path}")
+            try:
+                data = _decode_result(marshal.loads(f.read()))
+            except (EOFError, ValueError, TypeError, KeyError) as e:
+                raise BookmarkStoreError(f"書籤資料檔案已損壞: {str(e)}")
+
+        stored = StoredBookmarks(data)
+        self._put(session_id, file_hash, path, stored)
+        logger.debug(f"從檔案載入書籤資料: {path}")
+        return stored
+
+    def discard_session(self, session_id: str) -> int:
+        """
+        移除會話對快取項目的使用，沒有其他會話使用的項目一併移除
+
+        Args:
+            session_id: 會話 ID
+
+        Returns:
+            int: 移除的項目數量
+        """
+        with self._lock:
+            keys = []
+            for key, entry in self._entries.items():
+                entry['sessions'].discard(session_id)
+                if not entry['sessions']:
+                    keys.append(key)
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        獲取快取統計資訊
+
+        Returns:
+            Dict: 統計資訊
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self._max_entries,
+                'hits': self._hits,
+                'misses': self._misses
+            }
+
+# 全局書籤資料儲存實例
+_global_bookmark_store = BookmarkStore()
+
+def save_bookmarks(session_id: str, file_hash: str, result: Dict[str, Any], path: str,
+                   in_memory: bool = False) -> str:
+    """
+    保存書籤分析結果（使用全局儲存）
+
+    Returns:
+        str: 書籤資料檔案路徑
+    """
+    return _global_bookmark_store.save(session_id, file_hash, result, path, in_memory)
+
+def load_bookmarks(session_id: str, file_hash: str, path: str) -> StoredBookmarks:
+    """
+    取得書籤分析結果（使用全局儲存）
+
+    Returns:
+        StoredBookmarks: 書籤資料
+    """
+    return _global_bookmark_store.load(session_id, file_hash, path)
+
+def discard_session_bookmarks(session_id: str) -> int:
+    """
+    移除會話的書籤資料快取
+
+    Returns:
+        int: 移除的項目數量
+    """
+    return _global_bookmark_store.discard_session(session_id)
+
+def get_bookmark_store_stats() -> Dict[str, Any]:
+    """
+    獲取書籤資料儲存統計資訊
+
+    Returns:
+        Dict: 統計資訊
+    """
+    return _global_bookmark_store.get_stats()
@@ -0,0 +1,398 @@
+"""
+書籤表格模組
+以平行陣列（層級、頁碼、父書籤、匹配模式）與共用的標題列表保存書籤，
+過濾與統計只需單次走訪，模板仍可透過字典視圖逐筆讀取
+"""
+
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+class BookmarkTable(Sequence):
+    """
+    書籤表格 - 第 i 列對應 id 為 i + 1 的書籤
+
+    頁碼與父書籤 id 以 0 表示「無」；頁碼為 0 的書籤即為無效書籤。
+    以索引或走訪取得的每一列都是新建立的字典（與 get_bookmarks_recursive 原本的輸出格式相同），
+    修改字典不會影響表格。
+    """
+
+    def __init__(self, titles: Optional[List[str]] = None, levels: Optional[array] = None,
+                 pages: Optional[array] = None, parents: Optional[array] = None,
+                 patterns: Optional[array] = None, pattern_names: Tuple[str, ...] = ()):
+        self.titles = titles if titles is not None else []
+        self.levels = levels if levels is not None else array('H')
+        self.pages = pages if pages is not None else array('I')
+        self.parents = parents if parents is not None else array('I')
+        # 匹配模式代碼：0 表示不匹配，n 表示 pattern_names[n - 1]
+        self.patterns = patterns if patterns is not None else array('B', bytes(len(self.titles)))
+        self.pattern_names = tuple(pattern_names)
+        self._tree: Optional['OutlineTree'] = None
+
+    def append(self, title: str, page_num: Optional[int], level: int, parent_id: Optional[int]) -> int:
+        """
+        新增一個書籤
+
+        Args:
+            title: 書籤標題
+            page_num: 頁碼（1-based），無法解析時為 None
+            level: 層級
+            parent_id: 父書籤 id
+
+        Returns:
+            int: 新書籤的 id
+        """
+        # 大型文件中重複的標題（例如「定義」、「附則」）共用同一個字串
+        self.titles.append(sys.intern(title))
+        self.levels.append(level)
+        self.pages.append(page_num or 0)
+        self.parents.append(parent_id or 0)
+        self.patterns.append(0)
+        self._tree = None
+        return len(self.titles)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("書籤索引超出範圍")
+        return self.row(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self.titles)):
+            yield self.row(i)
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """
+        取得單一書籤的字典視圖
+
+        Args:
+            index: 列索引（id - 1）
+
+        Returns:
+            Dict: 書籤資料
+        """
+        page_num = self.pages[index]
+        code = self.patterns[index]
+        return {
+            'id': index + 1,
+            'title': self.titles[index],
+            'page_num': page_num or None,
+            'level': self.levels[index],
+            'parent_id': self.parents[index] or None,
+            'valid': page_num != 0,
+            'matches_pattern': code != 0,
+            'matched_pattern': self.pattern_names[code - 1] if code else None
+        }
+
+    def get(self, bookmark_id: int) -> Optional[Dict[str, Any]]:
+        """
+        依 id 取得書籤
+
+        Args:
+            bookmark_id: 書籤 id
+
+        Returns:
+            Optional[Dict]: 書籤資料，id 不存在時返回 None
+        """
+        if 1 <= bookmark_id <= len(self.titles):
+            return self.row(bookmark_id - 1)
+        return None
+
+    def outline_tree(self) -> 'OutlineTree':
+        """獲取父子關係索引（首次使用時建立）"""
+        if self._tree is None:
+            self._tree = OutlineTree(self.parents)
+        return self._tree
+
+    def select_rows(self, matches_pattern: Optional[bool] = None, level: Optional[int] = None,
+                    query: Optional[str] = None) -> array:
+        """
+        依條件篩選有效書籤
+
+        Args:
+            matches_pattern: True 只包含匹配模式的書籤，False 只包含不匹配的書籤，None 不限
+            level: 只包含指定層級的書籤
+            query: 只包含標題含有此文字的書籤（不分大小寫）
+
+        Returns:
+            array: 符合條件的列索引（依文件順序）
+        """
+        needle = query.casefold() if query else None
+        rows = array('I')
+        for i, page_num in enumerate(self.pages):
+            if not page_num:
+                continue
+            if matches_pattern is not None and bool(self.patterns[i]) != matches_pattern:
+                continue
+            if level is not None and self.levels[i] != level:
+                continue
+            if needle is not None and needle not in self.titles[i].casefold():
+                continue
+            rows.append(i)
+        return rows
+
+    def valid_levels(self) -> List[int]:
+        """有效書籤出現過的層級（由小到大）"""
+        return sorted({level for level, page_num in zip(self.levels, self.pages) if page_num})
+
+    def outline_nodes(self, parent_id: int = 0, depth: int = 1, offset: int = 0,
+                      max_nodes: int = 500) -> Dict[str, Any]:
+        """
+        逐層展開書籤樹
+
+        先取 parent_id 的子書籤（從 offset 開始，最多 max_nodes 個），再逐層展開下一層，
+        只有整組子書籤都能放進剩餘的節點數量時才展開，其餘節點由呼叫端在使用者展開時再次查詢。
+
+        Args:
+            parent_id: 父書籤 id，0 表示最上層
+            depth: 展開的層數
+            offset: 子書籤的起始位置
+            max_nodes: 返回的節點數量上限
+
+        Returns:
+            Dict: 節點資料（nodes 為巢狀列表，已展開的節點含 children）
+        """
+        tree = self.outline_tree()
+        siblings = tree.children(parent_id)
+        page = siblings[offset:offset + max_nodes]
+        nodes = [self._outline_node(bookmark_id, tree) for bookmark_id in page]
+
+        budget = max_nodes - len(nodes)
+        frontier = nodes
+        for _ in range(depth - 1):
+            if not frontier:
+                break
+            next_frontier = []
+            for node in frontier:
+                count = node['child_count']
+                if not count or count > budget:
+                    continue
+                node['children'] = [self._outline_node(child_id, tree) for child_id in tree.children(node['id'])]
+                budget -= count
+                next_frontier.extend(node['children'])
+            frontier = next_frontier
+
+        end = offset + len(page)
+        return {
+            'parent_id': parent_id or None,
+            'nodes': nodes,
+            'total_children': len(siblings),
+            'next_offset': end if end < len(siblings) else None
+        }
+
+    def _outline_node(self, bookmark_id: int, tree: 'OutlineTree') -> Dict[str, Any]:
+        node = self.row(bookmark_id - 1)
+        node['child_count'] = tree.child_count(bookmark_id)
+        return node
+
+    def valid_count(self) -> int:
+        """有效書籤（有頁碼）的數量"""
+        return len(self.pages) - self.pages.count(0)
+
+    def apply_patterns(self, patterns: Dict[str, Pattern]) -> Dict[str, Any]:
+        """
+        以單次走訪為所有有效書籤比對標題模式（依字典順序取第一個匹配的模式）
+
+        Args:
+            patterns: 模式名稱 -> 已編譯的正規表達式
+
+        Returns:
+            Dict: 過濾統計資訊
+        """
+        self.pattern_names = tuple(patterns)
+        compiled = list(enumerate(patterns.values(), 1))
+        codes = array('B', bytes(len(self.titles)))
+        counts = [0] * len(compiled)
+
+        for i, (title, page_num) in enumerate(zip(self.titles, self.pages)):
+            if not page_num or not title:
+                continue
+            for code, pattern in compiled:
+                if pattern.match(title):
+                    codes[i] = code
+                    counts[code - 1] += 1
+                    break
+
+        self.patterns = codes
+        matched_count = sum(counts)
+        total = len(self.titles)
+        return {
+            'total_processed': total,
+            'matched_bookmarks': matched_count,
+            'pattern_counts': dict(zip(self.pattern_names, counts)),
+            'has_matches': matched_count > 0,
+            'match_percentage': (matched_count / total) * 100 if total else 0
+        }
+
+    def matched(self) -> 'BookmarkRows':
+        """
+        獲取匹配模式的書籤
+
+        Returns:
+            BookmarkRows: 匹配書籤的唯讀視圖
+        """
+        return BookmarkRows(self, array('I', (i for i, code in enumerate(self.patterns) if code)))
+
+    def structure_stats(self) -> Dict[str, Any]:
+        """
+        分析書籤結構特徵（層級分布與標題長度）
+
+        Returns:
+            Dict: 結構分析結果
+        """
+        if not self.titles:
+            return {
+                'max_level': 0,
+                'level_distribution': {},
+                'average_title_length': 0,
+                'has_hierarchy': False
+            }
+
+        max_level = max(self.levels)
+        title_lengths = [len(title) for title in self.titles if title]
+        return {
+            'max_level': max_level,
+            'level_distribution': dict(Counter(self.levels)),
+            'average_title_length': sum(title_lengths) / len(title_lengths) if title_lengths else 0,
+            'has_hierarchy': max_level > 0,
+            'total_bookmarks': len(self.titles),
+            'title_length_range': (min(title_lengths), max(title_lengths)) if title_lengths else (0, 0)
+        }
+
+    def to_columns(self) -> Dict[str, Any]:
+        """
+        轉換為只包含內建型別的欄位字典（可用 marshal 等格式序列化）
+
+        Returns:
+            Dict: 欄位資料
+        """
+        return {
+            'titles': self.titles,
+            'levels': self.levels.tobytes(),
+            'pages': self.pages.tobytes(),
+            'parents': self.parents.tobytes(),
+            'patterns': self.patterns.tobytes(),
+            'pattern_names': self.pattern_names
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> 'BookmarkTable':
+        """
+        由 to_columns 的結果還原表格
+
+        Args:
+            columns: 欄位資料
+
+        Returns:
+            BookmarkTable: 書籤表格
+
+        Raises:
+            ValueError: 欄位長度不一致
+        """
+        def load(typecode: str, data: bytes) -> array:
+            values = array(typecode)
+            values.frombytes(data)
+            return values
+
+        table = cls(
+            titles=[sys.intern(title) for title in columns['titles']],
+            levels=load('H', columns['levels']),
+            pages=load('I', columns['pages']),
+            parents=load('I', columns['parents']),
+            patterns=load('B', columns['patterns']),
+            pattern_names=columns['pattern_names']
+        )
+        count = len(table.titles)
+        if any(len(column) != count for column in (table.levels, table.pages, table.parents, table.patterns)):
+            raise ValueError("書籤欄位長度不一致")
+        return table
+
+    @classmethod
+    def from_dicts(cls, bookmarks: Iterable[Dict[str, Any]]) -> 'BookmarkTable':
+        """
+        由書籤字典列表建立表格（id 依列表順序重新編號）
+
+        Args:
+            bookmarks: 書籤字典列表
+
+        Returns:
+            BookmarkTable: 書籤表格
+        """
+        table = cls()
+        names: List[str] = []
+        for bookmark in bookmarks:
+            page_num = bookmark.get('page_num') if bookmark.get('valid', True) else None
+            table.append(bookmark.get('title', ''), page_num, bookmark.get('level', 0), bookmark.get('parent_id'))
+            pattern_name = bookmark.get('matched_pattern')
+            if bookmark.get('matches_pattern') and pattern_name:
+                if pattern_name not in names:
+                    names.append(pattern_name)
+                table.patterns[-1] = names.index(pattern_name) + 1
+        table.pattern_names = tuple(names)
+        return table
+
+    @classmethod
+    def coerce(cls, bookmarks: Iterable[Dict[str, Any]]) -> 'BookmarkTable':
+        """書籤表格原樣返回，書籤字典列表則轉換為表格"""
+        if isinstance(bookmarks, cls):
+            return bookmarks
+        return cls.from_dicts(bookmarks)
+
+class BookmarkRows(Sequence):
+    """書籤表格中部分列的唯讀視圖（例如匹配模式的書籤）"""
+
+    def __init__(self, table: BookmarkTable, rows: array):
+        self.table = table
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.table.row(row) for row in self.rows[index]]
+        return self.table.row(self.rows[index])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in self.rows:
+            yield self.table.row(row)
+
+class OutlineTree:
+    """書籤父子關係索引 - 以壓縮列（CSR）格式保存每個書籤的子書籤 id"""
+
+    def __init__(self, parents: array):
+        count = len(parents)
+        # id 0 代表虛擬的根節點；父書籤 id 不合理時視為最上層
+        child_counts = [0] * (count + 1)
+        for parent_id in parents:
+            child_counts[parent_id if parent_id <= count else 0] += 1
+
+        self._offsets = array('I', [0]) * (count + 2)
+        for bookmark_id in range(count + 1):
+            self._offsets[bookmark_id + 1] = self._offsets[bookmark_id] + child_counts[bookmark_id]
+
+        self._children = array('I', [0]) * count
+        positions = array('I', self._offsets[:-1])
+        for row, parent_id in enumerate(parents):
+            if parent_id > count:
+                parent_id = 0
+            self._children[positions[parent_id]] = row + 1
+            positions[parent_id] += 1
+
+    def child_count(self, bookmark_id: int) -> int:
+        """子書籤數量"""
+        return self._offsets[bookmark_id + 1] - self._offsets[bookmark_id]
+
+    def children(self, bookmark_id: int) -> array:
+        """子書籤 id（依文件順序），bookmark_id 為 0 時返回最上層書籤"""
+        if not 0 <= bookmark_id < len(self._offsets) - 1:
+            return array('I')
+        return self._children[self._offsets[bookmark_id]:self._offsets[bookmark_id + 1]]
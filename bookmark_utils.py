@@ -7,10 +7,15 @@ import os
 import re
 import time
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 import PyPDF2
 from PyPDF2 import PdfReader
-from PyPDF2.generic import Destination
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+from pdf_cache import acquire_pdf_reader
+from memory_tier import is_memory_file, source_exists, source_size
+from pdf_index import load_pdf_index, build_pdf_index
+from bookmark_table import BookmarkTable, BookmarkRows
 
 # 配置日誌記錄
 logger = logging.getLogger(__name__)
@@ -49,29 +54,181 @@ def validate_pdf_file(file_path: str) -> bool:
         FileNotFoundError: 檔案不存在
         PermissionError: 無法讀取檔案
     """
-    if not os.path.exists(file_path):
+    if not source_exists(file_path):
         raise FileNotFoundError(f"PDF 檔案不存在: {file_path}")
     
-    if not os.access(file_path, os.R_OK):
+    if not is_memory_file(file_path) and not os.access(file_path, os.R_OK):
         raise PermissionError(f"無法讀取 PDF 檔案: {file_path}")
     
     # 檢查檔案大小
-    file_size = os.path.getsize(file_path)
+    file_size = source_size(file_path)
     if file_size == 0:
         raise ValueError(f"PDF 檔案為空: {file_path}")
     
     logger.debug(f"PDF 檔案驗證成功: {file_path} (大小: {file_size} 位元組)")
     return True
 
-def get_bookmarks_recursive(file_path: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+def build_page_index(reader: PdfReader) -> List[int]:
+    """
+    以單次迭代走訪頁面樹，依頁面順序取得頁面物件編號
+    
+    Args:
+        reader: 已解析的 PdfReader
+        
+    Returns:
+        List[int]: 頁面物件編號列表（第 i 項為第 i + 1 頁）
+    """
+    page_nums = []
+    stack = [reader.trailer['/Root'].raw_get('/Pages')]
+    visited = set()
+    
+    while stack:
+        ref = stack.pop()
+        if isinstance(ref, IndirectObject):
+            if ref.idnum in visited:
+                continue
+            visited.add(ref.idnum)
+        
+        node = ref.get_object()
+        if not isinstance(node, DictionaryObject):
+            continue
+        
+        node_type = node['/Type'] if '/Type' in node else ('/Pages' if '/Kids' in node else '/Page')
+        if node_type == '/Pages':
+            if '/Kids' in node:
+                stack.extend(reversed(node['/Kids']))
+        elif isinstance(ref, IndirectObject):
+            page_nums.append(ref.idnum)
+    
+    return page_nums
+
+def _unwrap_destination(value: Any) -> Any:
+    """目的地可能包在含有 /D 的字典中"""
+    if isinstance(value, DictionaryObject) and '/D' in value:
+        return value['/D']
+    return value
+
+def destination_name_key(name: Any) -> str:
+    """
+    將具名目的地的名稱轉為查詢用的鍵
+    
+    舊式 /Dests 字典以名稱物件（/Chapter1）為鍵，名稱樹以字串為鍵，
+    書籤引用時兩種寫法都可能出現，因此統一去掉名稱物件的斜線，位元組字串以 latin-1 解碼。
+    """
+    if isinstance(name, NameObject):
+        return name[1:]
+    if isinstance(name, bytes):
+        return name.decode('latin-1')
+    return str(name)
+
+def _flatten_name_tree(tree: Any, destinations: Dict[str, Any]):
+    """迭代走訪名稱樹（或舊式 /Dests 字典），將目的地陣列加入 destinations"""
+    stack = [tree]
+    visited = set()
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, DictionaryObject):
+            continue
+        
+        if '/Kids' in node:
+            for kid in reversed(node['/Kids']):
+                if isinstance(kid, IndirectObject):
+                    if kid.idnum in visited:
+                        continue
+                    visited.add(kid.idnum)
+                stack.append(kid.get_object())
+            continue
+        
+        if '/Names' in node:
+            names = node['/Names']
+            entries = ((names[i].get_object(), names[i + 1]) for i in range(0, len(names) - 1, 2))
+        else:
+            # 舊式 /Dests 字典：名稱 -> 目的地
+            entries = node.items()
+        
+        for name, value in entries:
+            dest = _unwrap_destination(value.get_object())
+            if isinstance(dest, ArrayObject) and len(dest) > 0:
+                destinations[destination_name_key(name)] = dest
+
+def build_named_destination_index(reader: PdfReader) -> Dict[str, Any]:
+    """
+    將具名目的地攤平為 名稱 -> 目的地陣列 的字典（分析開始時建立一次，之後以 O(1) 查詢）
+    
+    同時收錄 /Names /Dests 名稱樹與舊式（PDF 1.1）文件目錄 /Dests 字典；
+    名稱重複時以舊式字典為準（與 PyPDF2 的優先順序相同）。
+    
+    Args:
+        reader: 已解析的 PdfReader
+        
+    Returns:
+        Dict[str, Any]: 具名目的地（鍵為 destination_name_key 的結果）
+    """
+    destinations: Dict[str, Any] = {}
+    catalog = reader.trailer['/Root']
+    
+    for source in ('/Names', '/Dests'):
+        try:
+            if source == '/Names':
+                if '/Names' not in catalog or '/Dests' not in catalog['/Names']:
+                    continue
+                tree = catalog['/Names']['/Dests']
+            elif '/Dests' in catalog:
+                tree = catalog['/Dests']
+            else:
+                continue
+            _flatten_name_tree(tree, destinations)
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            logger.warning(f"無法讀取具名目的地 ({source}): {str(e)}")
+    
+    if destinations:
+        logger.debug(f"具名目的地索引: {len(destinations)} 個名稱")
+    return destinations
+
+def resolve_outline_destination(node: DictionaryObject, named_destinations: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
     """
-    遞迴解析 PDF 檔案中的書籤結構
+    取得書籤節點目的地的頁面參照
+    
+    目的地可以直接寫在 /Dest、GoTo 動作的 /D 中，或是透過名稱引用具名目的地。
+    
+    Args:
+        node: 書籤節點字典
+        named_destinations: build_named_destination_index 的結果
+        
+    Returns:
+        Tuple[Any, Optional[str]]: (頁面參照（通常是 IndirectObject），具名目的地名稱)；
+            沒有目的地或無法解析時頁面參照為 None，直接目的地的名稱為 None
+    """
+    dest = None
+    if '/A' in node:
+        # 動作（只支援 GoTo）
+        action = node['/A']
+        if '/S' in action and action['/S'] == '/GoTo' and '/D' in action:
+            dest = _unwrap_destination(action['/D'])
+    elif '/Dest' in node:
+        dest = _unwrap_destination(node['/Dest'])
+    
+    name = None
+    if isinstance(dest, (str, bytes)):
+        name = destination_name_key(dest)
+        dest = named_destinations.get(name)
+    
+    if isinstance(dest, ArrayObject) and len(dest) > 0:
+        return dest[0], name
+    return None, name
+
+def get_bookmarks_recursive(file_path: str) -> Tuple[BookmarkTable, Dict[str, Any]]:
+    """
+    解析 PDF 檔案中的書籤結構（以明確堆疊走訪，頁碼與具名目的地透過一次建立的索引查詢）
+    
+    如果上傳檔案旁已有解析索引（且記錄了書籤），直接由索引還原書籤而不解析 PDF；
+    否則完整解析後寫入索引，供之後的請求與其他 worker 使用。
     
     Args:
         file_path: PDF 檔案路徑
         
     Returns:
-        Tuple[List[Dict], Dict]: (書籤列表, 解析統計資訊)
+        Tuple[BookmarkTable, Dict]: (書籤表格, 解析統計資訊)
         
     Raises:
         BookmarkParsingError: 書籤解析失敗
@@ -85,9 +242,23 @@ def get_bookmarks_recursive(file_path: str) -> Tuple[List[Dict[str, Any]], Dict[
         
         logger.info(f"開始解析 PDF 書籤: {file_path}")
         
-        # 使用 PyPDF2 開啟 PDF
-        with open(file_path, 'rb') as pdf_file:
-            reader = PdfReader(pdf_file)
+        index = load_pdf_index(file_path)
+        if index is not None and index.has_outline:
+            bookmarks = index.outline_bookmarks()
+            valid_bookmarks = bookmarks.valid_count()
+            logger.info(f"由解析索引載入書籤: 總計 {len(bookmarks)} 個書籤，有效 {valid_bookmarks} 個")
+            return bookmarks, {
+                'total_bookmarks': len(bookmarks),
+                'valid_bookmarks': valid_bookmarks,
+                'parsing_time': time.time() - start_time,
+                'total_pages': index.total_pages,
+                'has_bookmarks': len(bookmarks) > 0,
+                'error_count': index.outline_errors,
+                'named_destinations_resolved': index.named_resolved
+            }
+        
+        # 從快取取得已解析的 PDF（首次使用時才解析）
+        with acquire_pdf_reader(file_path) as reader:
             
             # 獲取 PDF 基本資訊
             total_pages = len(reader.pages)
@@ -95,12 +266,13 @@ def get_bookmarks_recursive(file_path: str) -> Tuple[List[Dict[str, Any]], Dict[
             
             # 檢查是否有書籤 - 添加錯誤處理
             try:
-                outline = reader.outline
-                has_outline = outline is not None and len(outline) > 0
+                catalog = reader.trailer['/Root']
+                outlines = catalog['/Outlines'] if '/Outlines' in catalog else None
+                has_outline = isinstance(outlines, DictionaryObject) and '/First' in outlines
             except (KeyError, AttributeError, IndexError, TypeError) as e:
                 logger.warning(f"無法訪問 PDF 書籤結構: {str(e)}")
                 logger.warning("此 PDF 可能有損壞的書籤或使用了不支援的書籤格式")
-                return [], {
+                return BookmarkTable(), {
                     'total_bookmarks': 0,
                     'valid_bookmarks': 0,
                     'parsing_time': time.time() - start_time,
@@ -111,7 +283,7 @@ def get_bookmarks_recursive(file_path: str) -> Tuple[List[Dict[str, Any]], Dict[
                 }
             except Exception as e:
                 logger.error(f"訪問書籤時發生未預期錯誤: {str(e)}")
-                return [], {
+                return BookmarkTable(), {
                     'total_bookmarks': 0,
                     'valid_bookmarks': 0,
                     'parsing_time': time.time() - start_time,
@@ -123,7 +295,8 @@ def get_bookmarks_recursive(file_path: str) -> Tuple[List[Dict[str, Any]], Dict[
             
             if not has_outline:
                 logger.warning(f"PDF 檔案沒有書籤: {file_path}")
-                return [], {
+                build_pdf_index(file_path, reader, BookmarkTable())
+                return BookmarkTable(), {
                     'total_bookmarks': 0,
                     'valid_bookmarks': 0,
                     'parsing_time': time.time() - start_time,
@@ -132,107 +305,108 @@ def get_bookmarks_recursive(file_path: str) -> Tuple[List[Dict[str, Any]], Dict[
                     'error_count': 0
                 }
             
-            # 遞迴解析書籤
-            bookmarks = []
+            # 頁面物件編號 -> 頁碼（0-based）與具名目的地，各只建立一次
+            page_nums = build_page_index(reader)
+            page_numbers = {num: i for i, num in enumerate(page_nums)}
+            named_destinations = build_named_destination_index(reader)
+            
+            bookmarks = BookmarkTable()
             error_count = 0
+            named_resolved = 0
             
-            def parse_outline_item(item, level=0, parent_id=None):
-                nonlocal error_count
+            def parse_outline_node(node, level, parent_id):
+                nonlocal error_count, named_resolved
                 
                 try:
-                    if isinstance(item, Destination):
-                        # 獲取書籤標題
-                        title = str(item.title).strip()
+                    # 獲取書籤標題
+                    title = str(node['/Title']).strip() if '/Title' in node else ''
+                    
+                    # 獲取頁碼 - 添加更強的錯誤處理
+                    try:
+                        page_ref, dest_name = resolve_outline_destination(node, named_destinations)
+                        page_index = page_numbers.get(page_ref.idnum, -1) if isinstance(page_ref, IndirectObject) else -1
                         
-                        # 獲取頁碼 - 添加更強的錯誤處理
-                        try:
-                            page_num = reader.get_destination_page_number(item)
-                            # PyPDF2 返回的是 0-based，轉換為 1-based
-                            page_num += 1
+                        if dest_name is not None and page_index < 0:
+                            # 具名目的地不存在或指向的不是頁面，不再當作第 1 頁
+                            logger.warning(f"書籤 '{title}' 的具名目的地 '{dest_name}' 無法解析")
+                            page_num = None
+                            error_count += 1
+                        else:
+                            if dest_name is not None:
+                                named_resolved += 1
+                            
+                            # 頁面索引是 0-based，轉換為 1-based
+                            page_num = page_index + 1
                             
                             # 特殊處理：如果頁碼仍然是 0，可能是 PDF 的第一頁
                             if page_num == 0:
                                 logger.warning(f"書籤 '{title}' 返回頁碼 0，設置為第 1 頁")
                                 page_num = 1
-                                
-                        except (KeyError, IndexError, TypeError, AttributeError) as e:
-                            logger.warning(f"無法獲取書籤 '{title}' 的頁碼 (兼容性問題): {str(e)}")
-                            page_num = None
-                            error_count += 1
-                        except Exception as e:
-                            logger.warning(f"無法獲取書籤 '{title}' 的頁碼: {str(e)}")
-                            page_num = None
-                            error_count += 1
-                        
-                        # 驗證頁碼有效性
-                        if page_num is not None and (page_num < 1 or page_num > total_pages):
-                            logger.warning(f"書籤 '{title}' 的頁碼 {page_num} 超出範圍 (1-{total_pages})")
-                            page_num = None
-                            error_count += 1
-                        
-                        # 創建書籤資料結構
-                        bookmark = {
-                            'id': len(bookmarks) + 1,
-                            'title': title,
-                            'page_num': page_num,
-                            'level': level,
-                            'parent_id': parent_id,
-                            'valid': page_num is not None,
-                            'matches_pattern': False  # 將在過濾階段設定
-                        }
-                        
-                        bookmarks.append(bookmark)
-                        logger.debug(f"解析書籤: Level {level}, '{title}' -> 頁面 {page_num}")
-                        
-                        return bookmark['id']
-                    else:
-                        logger.warning(f"未知的書籤項目類型: {type(item)}")
+                            
+                    except (KeyError, IndexError, TypeError, AttributeError) as e:
+                        logger.warning(f"無法獲取書籤 '{title}' 的頁碼 (兼容性問題): {str(e)}")
+                        page_num = None
+                        error_count += 1
+                    except Exception as e:
+                        logger.warning(f"無法獲取書籤 '{title}' 的頁碼: {str(e)}")
+                        page_num = None
+                        error_count += 1
+                    
+                    # 驗證頁碼有效性
+                    if page_num is not None and (page_num < 1 or page_num > total_pages):
+                        logger.warning(f"書籤 '{title}' 的頁碼 {page_num} 超出範圍 (1-{total_pages})")
+                        page_num = None
                         error_count += 1
-                        return None
+                    
+                    # 加入書籤表格（匹配模式將在過濾階段設定）
+                    bookmark_id = bookmarks.append(title, page_num, level, parent_id)
+                    logger.debug(f"解析書籤: Level {level}, '{title}' -> 頁面 {page_num}")
+                    
+                    return bookmark_id
                         
                 except Exception as e:
                     logger.error(f"解析書籤項目時發生錯誤: {str(e)}")
                     error_count += 1
                     return None
             
-            def traverse_outline(outline, level=0, parent_id=None):
-                """遞迴遍歷書籤結構 - 添加錯誤處理"""
-                nonlocal error_count
-                
+            # 以明確堆疊依文件順序走訪書籤樹（深層或損壞的書籤不會造成遞迴過深）
+            stack = [(outlines.raw_get('/First'), 0, None)]
+            visited = set()
+            
+            while stack:
+                node_ref, level, parent_id = stack.pop()
                 try:
-                    for item in outline:
-                        try:
-                            if isinstance(item, list):
-                                # 子書籤列表
-                                traverse_outline(item, level + 1, parent_id)
-                            else:
-                                # 單個書籤
-                                bookmark_id = parse_outline_item(item, level, parent_id)
-                                
-                                # 如果有子項目，繼續遍歷
-                                if hasattr(item, 'outline') and item.outline:
-                                    traverse_outline(item.outline, level + 1, bookmark_id)
-                        except (KeyError, IndexError, TypeError, AttributeError) as e:
-                            logger.warning(f"跳過損壞的書籤項目: {str(e)}")
-                            error_count += 1
-                            continue
-                        except Exception as e:
-                            logger.error(f"處理書籤項目時發生錯誤: {str(e)}")
+                    if isinstance(node_ref, IndirectObject):
+                        if node_ref.idnum in visited:
+                            logger.warning(f"書籤結構出現循環參照，跳過物件 {node_ref.idnum}")
                             error_count += 1
                             continue
+                        visited.add(node_ref.idnum)
+                    
+                    node = node_ref.get_object()
+                    if not isinstance(node, DictionaryObject):
+                        logger.warning(f"未知的書籤項目類型: {type(node)}")
+                        error_count += 1
+                        continue
+                    
+                    # 先放入下一個同層書籤，子書籤後放入而先處理
+                    if '/Next' in node:
+                        stack.append((node.raw_get('/Next'), level, parent_id))
+                    
+                    bookmark_id = parse_outline_node(node, level, parent_id)
+                    
+                    if '/First' in node:
+                        stack.append((node.raw_get('/First'), level + 1,
+                                      bookmark_id if bookmark_id is not None else parent_id))
+                except (KeyError, IndexError, TypeError, AttributeError) as e:
+                    logger.warning(f"跳過損壞的書籤項目: {str(e)}")
+                    error_count += 1
                 except Exception as e:
-                    logger.error(f"遍歷書籤結構時發生錯誤: {str(e)}")
+                    logger.error(f"處理書籤項目時發生錯誤: {str(e)}")
                     error_count += 1
             
-            # 開始遍歷
-            try:
-                traverse_outline(outline)
-            except Exception as e:
-                logger.error(f"書籤遍歷過程中發生嚴重錯誤: {str(e)}")
-                # 即使遍歷失敗，也嘗試返回已解析的書籤
-            
             # 計算統計資訊
-            valid_bookmarks = sum(1 for b in bookmarks if b['valid'])
+            valid_bookmarks = bookmarks.valid_count()
             parsing_time = time.time() - start_time
             
             stats = {
@@ -241,12 +415,18 @@ def get_bookmarks_recursive(file_path: str) -> Tuple[List[Dict[str, Any]], Dict[
                 'parsing_time': parsing_time,
                 'total_pages': total_pages,
                 'has_bookmarks': len(bookmarks) > 0,
-                'error_count': error_count
+                'error_count': error_count,
+                'named_destinations_resolved': named_resolved
             }
             
+            if named_resolved > 0:
+                logger.info(f"透過具名目的地索引解析了 {named_resolved} 個書籤")
+            
             if error_count > 0:
                 logger.warning(f"書籤解析完成但有 {error_count} 個錯誤")
             
+            build_pdf_index(file_path, reader, bookmarks, error_count, named_resolved)
+            
             logger.info(f"書籤解析完成: 總計 {len(bookmarks)} 個書籤，有效 {valid_bookmarks} 個，耗時 {parsing_time:.2f} 秒")
             
             return bookmarks, stats
@@ -289,105 +469,57 @@ def matches_any_pattern(title: str) -> Tuple[bool, Optional[str]]:
     
     return False, None
 
-def filter_bookmarks(bookmarks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+def filter_bookmarks(bookmarks: Union[BookmarkTable, List[Dict[str, Any]]]) -> Tuple[BookmarkTable, Dict[str, Any]]:
     """
-    根據預定義模式過濾書籤
+    根據預定義模式過濾書籤（單次走訪書籤表格）
     
     Args:
-        bookmarks: 書籤列表
+        bookmarks: 書籤表格或書籤列表
         
     Returns:
-        Tuple[List[Dict], Dict]: (過濾後的書籤列表, 過濾統計資訊)
+        Tuple[BookmarkTable, Dict]: (已標記匹配模式的書籤表格, 過濾統計資訊)
     """
-    if not bookmarks:
-        return bookmarks, {
+    table = BookmarkTable.coerce(bookmarks)
+    
+    if not table:
+        return table, {
             'total_processed': 0,
             'matched_bookmarks': 0,
             'pattern_counts': {'numbered': 0, 'hierarchical': 0, 'chapter': 0},
             'has_matches': False
         }
     
-    logger.info(f"開始過濾 {len(bookmarks)} 個書籤")
-    
-    matched_count = 0
-    pattern_counts = {'numbered': 0, 'hierarchical': 0, 'chapter': 0}
+    logger.info(f"開始過濾 {len(table)} 個書籤")
     
-    # 為每個書籤檢查模式匹配
-    for bookmark in bookmarks:
-        if not bookmark.get('valid', False):
-            continue
-            
-        title = bookmark.get('title', '')
-        matches, pattern_name = matches_any_pattern(title)
-        
-        bookmark['matches_pattern'] = matches
-        bookmark['matched_pattern'] = pattern_name if matches else None
-        
-        if matches:
-            matched_count += 1
-            if pattern_name in pattern_counts:
-                pattern_counts[pattern_name] += 1
-    
-    # 建立過濾統計資訊
-    filter_stats = {
-        'total_processed': len(bookmarks),
-        'matched_bookmarks': matched_count,
-        'pattern_counts': pattern_counts,
-        'has_matches': matched_count > 0,
-        'match_percentage': (matched_count / len(bookmarks)) * 100 if bookmarks else 0
-    }
+    filter_stats = table.apply_patterns(PATTERNS)
     
-    logger.info(f"書籤過濾完成: {matched_count}/{len(bookmarks)} 個書籤匹配模式 ({filter_stats['match_percentage']:.1f}%)")
+    logger.info(f"書籤過濾完成: {filter_stats['matched_bookmarks']}/{len(table)} 個書籤匹配模式 ({filter_stats['match_percentage']:.1f}%)")
     
-    return bookmarks, filter_stats
+    return table, filter_stats
 
-def get_filtered_bookmarks_only(bookmarks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def get_filtered_bookmarks_only(bookmarks: Union[BookmarkTable, List[Dict[str, Any]]]) -> BookmarkRows:
     """
     獲取只包含匹配模式的書籤列表
     
     Args:
-        bookmarks: 完整書籤列表
+        bookmarks: 已過濾的書籤表格或書籤列表
         
     Returns:
-        List[Dict]: 只包含匹配模式的書籤
+        BookmarkRows: 只包含匹配模式的書籤
     """
-    return [b for b in bookmarks if b.get('matches_pattern', False)]
+    return BookmarkTable.coerce(bookmarks).matched()
 
-def analyze_bookmark_structure(bookmarks: List[Dict[str, Any]]) -> Dict[str, Any]:
+def analyze_bookmark_structure(bookmarks: Union[BookmarkTable, List[Dict[str, Any]]]) -> Dict[str, Any]:
     """
     分析書籤結構特徵
     
     Args:
-        bookmarks: 書籤列表
+        bookmarks: 書籤表格或書籤列表
         
     Returns:
         Dict: 結構分析結果
     """
-    if not bookmarks:
-        return {
-            'max_level': 0,
-            'level_distribution': {},
-            'average_title_length': 0,
-            'has_hierarchy': False
-        }
-    
-    levels = [b.get('level', 0) for b in bookmarks]
-    titles = [b.get('title', '') for b in bookmarks if b.get('title')]
-    
-    level_distribution = {}
-    for level in levels:
-        level_distribution[level] = level_distribution.get(level, 0) + 1
-    
-    analysis = {
-        'max_level': max(levels) if levels else 0,
-        'level_distribution': level_distribution,
-        'average_title_length': sum(len(t) for t in titles) / len(titles) if titles else 0,
-        'has_hierarchy': max(levels) > 0 if levels else False,
-        'total_bookmarks': len(bookmarks),
-        'title_length_range': (min(len(t) for t in titles), max(len(t) for t in titles)) if titles else (0, 0)
-    }
-    
-    return analysis
+    return BookmarkTable.coerce(bookmarks).structure_stats()
 
 def process_pdf_bookmarks(file_path: str) -> Dict[str, Any]:
     """
@@ -0,0 +1,379 @@
+"""
+分段上傳模組
+大型檔案分成固定大小的分段上傳：建立上傳時先建立完整長度的稀疏檔案，之後依偏移量寫入各分段，
+每個分段以 sha256 驗證並記錄；連線中斷後可查詢缺少的範圍並只補傳這些分段
+
+每個會話同時進行的上傳數量與所有進行中上傳的總大小都有上限，避免只建立上傳而不傳送資料佔用磁碟
+
+上傳狀態完全保存在上傳目錄的檔案中，分段請求可以由任何一個 worker 處理
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import struct
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from upload_stream import (
+    UploadRejectedError, PDF_HEADER, PDF_EOF_MARKER, HEADER_SEARCH_BYTES, TRAILER_SEARCH_BYTES
+)
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 預設分段大小（可透過環境變數調整，單位 MB）與允許的範圍
+DEFAULT_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_MB', 8)) * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# 每個會話同時進行的分段上傳數量上限，與所有進行中上傳宣告大小的總和上限（可透過環境變數調整，單位 MB）
+MAX_OPEN_UPLOADS_PER_SESSION = int(os.environ.get('UPLOAD_CHUNKED_MAX_OPEN', 2))
+MAX_RESERVED_BYTES = int(os.environ.get('UPLOAD_CHUNKED_RESERVED_MB', 2048)) * 1024 * 1024
+
+# 分段記錄：是否已接收 + 分段內容的 sha256（每個分段固定長度，可直接以偏移量寫入）
+_CHUNK_RECORD = struct.Struct('<B32s')
+
+# 上傳檔案名稱前綴（資料檔、狀態檔與分段記錄檔）
+CHUNKED_UPLOAD_PREFIX = '.chunked-'
+
+_UPLOAD_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+# 完成上傳時重新驗證分段的讀取大小
+_VERIFY_READ_SIZE = 1024 * 1024
+
+class ChunkedUploadError(Exception):
+    """分段上傳錯誤"""
+    pass
+
+class ChunkedUploadNotFoundError(ChunkedUploadError):
+    """分段上傳不存在或不屬於此會話"""
+    pass
+
+class ChunkedUploadLimitError(ChunkedUploadError):
+    """進行中的上傳數量或總大小超過上限，或磁碟空間不足"""
+    pass
+
+# 同一 worker 內檢查上限與建立上傳之間不被其他線程插入
+_create_lock = threading.Lock()
+
+def list_open_uploads(upload_dir: str) -> List[Dict[str, Any]]:
+    """
+    列出上傳目錄中進行中的分段上傳（依狀態檔）
+
+    Returns:
+        List[Dict]: 各上傳的狀態（session_id、size 等）
+    """
+    uploads = []
+    try:
+        names = os.listdir(upload_dir)
+    except OSError:
+        return uploads
+    for name in names:
+        if not (name.startswith(CHUNKED_UPLOAD_PREFIX) and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(upload_dir, name), 'r', encoding='utf-8') as f:
+                uploads.append(json.load(f))
+        except (OSError, ValueError):
+            # 正在建立或剛被清理的上傳
+            continue
+    return uploads
+
+def _check_limits(upload_dir: str, session_id: str, size: int):
+    """
+    檢查建立新上傳是否超過上限
+
+    Raises:
+        ChunkedUploadLimitError: 會話的上傳數量、總大小或磁碟剩餘空間不足
+    """
+    open_uploads = list_open_uploads(upload_dir)
+    session_uploads = sum(1 for meta in open_uploads if meta.get('session_id') == session_id)
+    if session_uploads >= MAX_OPEN_UPLOADS_PER_SESSION:
+        raise ChunkedUploadLimitError(f"同時進行的上傳最多 {MAX_OPEN_UPLOADS_PER_SESSION} 個，請先完成或取消其他上傳")
+
+    reserved = sum(int(meta.get('size', 0)) for meta in open_uploads)
+    if reserved + size > MAX_RESERVED_BYTES:
+        raise ChunkedUploadLimitError("伺服器上傳空間不足，請稍後重試")
+
+    if shutil.disk_usage(upload_dir).free < size:
+        raise ChunkedUploadLimitError("伺服器磁碟空間不足，請稍後重試")
+
+def _write_all(fd: int, data: bytes, offset: int):
+    """以 pwrite 寫入完整內容（處理部分寫入）"""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+class ChunkedUpload:
+    """分段上傳 - 資料檔（預先配置完整大小）、狀態檔（JSON）與分段記錄檔"""
+
+    def __init__(self, upload_dir: str, upload_id: str, meta: Dict[str, Any]):
+        self.upload_id = upload_id
+        self.meta = meta
+        base = os.path.join(upload_dir, f"{CHUNKED_UPLOAD_PREFIX}{upload_id}")
+        self.data_path = base + '.part'
+        self.meta_path = base + '.json'
+        self.map_path = base + '.chunks'
+
+    @property
+    def size(self) -> int:
+        return self.meta['size']
+
+    @property
+    def chunk_size(self) -> int:
+        return self.meta['chunk_size']
+
+    @property
+    def total_chunks(self) -> int:
+        return self.meta['total_chunks']
+
+    @property
+    def paths(self) -> List[str]:
+        return [self.data_path, self.meta_path, self.map_path]
+
+    @classmethod
+    def create(cls, upload_dir: str, session_id: str, filename: str, size: int,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> 'ChunkedUpload':
+        """
+        建立分段上傳與完整長度的資料檔（稀疏檔案，分段寫入時才實際佔用磁碟空間）
+
+        Args:
+            upload_dir: 上傳目錄
+            session_id: 會話 ID（之後的分段請求必須來自同一會話）
+            filename: 用戶端提供的檔案名稱
+            size: 檔案大小（位元組）
+            chunk_size: 分段大小（位元組）
+
+        Returns:
+            ChunkedUpload: 分段上傳
+
+        Raises:
+            ChunkedUploadLimitError: 進行中的上傳數量或總大小超過上限
+            ChunkedUploadError: 參數無效或無法建立檔案
+        """
+        if size <= 0:
+            raise ChunkedUploadError("檔案大小無效")
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ChunkedUploadError(f"分段大小必須介於 {MIN_CHUNK_SIZE} 與 {MAX_CHUNK_SIZE} 位元組之間")
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            'session_id': session_id,
+            'filename': filename,
+            'size': size,
+            'chunk_size': chunk_size,
+            'total_chunks': (size + chunk_size - 1) // chunk_size,
+            'created_time': time.time()
+        }
+        upload = cls(upload_dir, upload_id, meta)
+
+        with _create_lock:
+            _check_limits(upload_dir, session_id, size)
+            try:
+                # 稀疏檔案：建立上傳時不佔用空間，只建立上傳而不傳送資料的請求不會耗盡磁碟
+                fd = os.open(upload.data_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+                try:
+                    os.ftruncate(fd, size)
+                finally:
+                    os.close(fd)
+
+                with open(upload.map_path, 'wb') as f:
+                    f.truncate(meta['total_chunks'] * _CHUNK_RECORD.size)
+
+                temp_path = f"{upload.meta_path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+                os.replace(temp_path, upload.meta_path)
+            except OSError as e:
+                upload.discard()
+                raise ChunkedUploadError(f"無法建立上傳檔案: {str(e)}")
+
+        logger.info(f"建立分段上傳 {upload_id}: {filename}, {size} 位元組, {meta['total_chunks']} 個分段")
+        return upload
+
+    @classmethod
+    def open(cls, upload_dir: str, upload_id: str, session_id: str) -> 'ChunkedUpload':
+        """
+        開啟既有的分段上傳
+
+        Raises:
+            ChunkedUploadNotFoundError: 上傳不存在、已完成或屬於其他會話
+        """
+        if not _UPLOAD_ID_PATTERN.fullmatch(upload_id):
+            raise ChunkedUploadNotFoundError("找不到上傳")
+
+        upload = cls(upload_dir, upload_id, {})
+        try:
+            with open(upload.meta_path, 'r', encoding='utf-8') as f:
+                upload.meta = json.load(f)
+        except (OSError, ValueError):
+            raise ChunkedUploadNotFoundError("找不到上傳")
+
+        if upload.meta.get('session_id') != session_id:
+            raise ChunkedUploadNotFoundError("找不到上傳")
+        return upload
+
+    def write_chunk(self, offset: int, data: bytes, checksum: Optional[str] = None) -> int:
+        """
+        寫入一個分段
+
+        Args:
+            offset: 分段在檔案中的偏移量（必須是分段大小的倍數）
+            data: 分段內容
+            checksum: 用戶端計算的 sha256（十六進位），提供時必須相符
+
+        Returns:
+            int: 分段索引
+
+        Raises:
+            ChunkedUploadError: 偏移量、長度或校驗碼不正確
+            UploadRejectedError: 第一個分段沒有 PDF 檔頭
+        """
+        if offset < 0 or offset % self.chunk_size:
+            raise ChunkedUploadError(f"偏移量必須是分段大小 {self.chunk_size} 的倍數")
+        index = offset // self.chunk_size
+        if index >= self.total_chunks:
+            raise ChunkedUploadError("偏移量超出檔案大小")
+
+        expected_length = min(self.chunk_size, self.size - offset)
+        if len(data) != expected_length:
+            raise ChunkedUploadError(f"分段長度應為 {expected_length} 位元組，實際為 {len(data)} 位元組")
+
+        digest = hashlib.sha256(data)
+        if checksum and checksum.lower() != digest.hexdigest():
+            raise ChunkedUploadError("分段校驗碼不符")
+
+        if index == 0 and PDF_HEADER not in data[:HEADER_SEARCH_BYTES]:
+            raise UploadRejectedError("檔案開頭沒有 PDF 檔頭")
+
+        # 先寫入資料再記錄分段，記錄存在時資料一定已寫入
+        fd = os.open(self.data_path, os.O_WRONLY)
+        try:
+            _write_all(fd, data, offset)
+        finally:
+            os.close(fd)
+
+        fd = os.open(self.map_path, os.O_WRONLY)
+        try:
+            _write_all(fd, _CHUNK_RECORD.pack(1, digest.digest()), index * _CHUNK_RECORD.size)
+        finally:
+            os.close(fd)
+
+        return index
+
+    def _read_records(self) -> List[Tuple[int, bytes]]:
+        with open(self.map_path, 'rb') as f:
+            data = f.read()
+        return [_CHUNK_RECORD.unpack_from(data, i * _CHUNK_RECORD.size) for i in range(self.total_chunks)]
+
+    def missing_ranges(self, records: Optional[List[Tuple[int, bytes]]] = None) -> List[Tuple[int, int]]:
+        """
+        尚未接收的位元組範圍
+
+        Returns:
+            List[Tuple[int, int]]: (起始偏移量, 結束偏移量) 列表，結束偏移量不包含
+        """
+        ranges = []
+        for index, (received, _) in enumerate(records if records is not None else self._read_records()):
+            if received:
+                continue
+            start = index * self.chunk_size
+            end = min(start + self.chunk_size, self.size)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    def status(self) -> Dict[str, Any]:
+        """
+        獲取上傳狀態
+
+        Returns:
+            Dict: 上傳狀態（包含缺少的範圍）
+        """
+        records = self._read_records()
+        received_chunks = sum(1 for received, _ in records if received)
+        missing = self.missing_ranges(records)
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.meta['filename'],
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'total_chunks': self.total_chunks,
+            'received_chunks': received_chunks,
+            'received_bytes': self.size - sum(end - start for start, end in missing),
+            'missing': missing,
+            'complete': not missing
+        }
+
+    def finalize(self) -> Dict[str, Any]:
+        """
+        完成上傳：確認所有分段都已接收，依分段記錄重新驗證內容並計算整個檔案的 sha256
+        （之後以 commit 放到最終位置，或內容已存在時以 discard 放棄）
+
+        Returns:
+            Dict: 檔案資訊（sha256 與大小）
+
+        Raises:
+            ChunkedUploadError: 仍有缺少的分段或分段內容與記錄不符
+            UploadRejectedError: 檔案結尾沒有 %%EOF 標記
+        """
+        records = self._read_records()
+        missing = self.missing_ranges(records)
+        if missing:
+            raise ChunkedUploadError(f"還有 {len(missing)} 個範圍尚未上傳")
+
+        file_hash = hashlib.sha256()
+        tail = b''
+        with open(self.data_path, 'rb') as f:
+            for index, (_, chunk_digest) in enumerate(records):
+                chunk_hash = hashlib.sha256()
+                remaining = min(self.chunk_size, self.size - index * self.chunk_size)
+                while remaining:
+                    block = f.read(min(_VERIFY_READ_SIZE, remaining))
+                    if not block:
+                        raise ChunkedUploadError("上傳檔案長度不足")
+                    chunk_hash.update(block)
+                    file_hash.update(block)
+                    remaining -= len(block)
+                    tail = (tail + block)[-TRAILER_SEARCH_BYTES:]
+                if chunk_hash.digest() != chunk_digest:
+                    raise ChunkedUploadError(f"第 {index + 1} 個分段的內容與校驗碼不符")
+
+        if PDF_EOF_MARKER not in tail:
+            raise UploadRejectedError("檔案結尾沒有 %%EOF 標記，上傳可能不完整")
+
+        return {'sha256': file_hash.hexdigest(), 'file_size': self.size}
+
+    def commit(self, dest_path: str):
+        """
+        將資料檔改名為最終路徑並刪除狀態檔與分段記錄檔
+
+        Args:
+            dest_path: 最終檔案路徑（與上傳目錄位於同一檔案系統）
+        """
+        os.replace(self.data_path, dest_path)
+        for path in (self.meta_path, self.map_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        logger.info(f"分段上傳完成 {self.upload_id}: {dest_path}")
+
+    def discard(self):
+        """刪除上傳的所有檔案"""
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
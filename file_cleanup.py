@@ -4,15 +4,19 @@
 """
 
 import os
+import heapq
 import shutil
 import time
 import tempfile
 import logging
 import threading
-from typing import Dict, List, Set, Optional, Callable
+import itertools
+from typing import Dict, List, Set, Optional, Callable, Tuple
 from pathlib import Path
 from functools import wraps
 
+from memory_tier import discard_memory_file
+
 # 配置日誌記錄
 logger = logging.getLogger(__name__)
 
@@ -21,11 +25,28 @@ class FileCleanupError(Exception):
     pass
 
 class FileTracker:
-    """文件追蹤器 - 用於追蹤臨時文件和目錄"""
+    """
+    文件追蹤器 - 用於追蹤臨時文件和目錄
+    
+    同一路徑可以被多個上下文註冊（例如以內容雜湊命名、由多個會話共用的上傳檔案），
+    每個註冊是一個引用，只有最後一個引用被清理時才刪除文件。
+    
+    過期時間以最小堆積索引（延遲刪除：取消註冊或重設保留時間後舊的堆積項目在取出時略過），
+    並以上下文索引識別碼，過期清理與會話清理的成本只與實際處理的項目數量成正比。
+    """
+    
+    # 堆積中的失效項目超過有效項目數量時重建堆積（攤銷後每次操作仍為 O(log n)）
+    HEAP_COMPACT_MIN_SIZE = 64
     
     def __init__(self):
         self._tracked_files: Dict[str, Dict] = {}
         self._tracked_dirs: Dict[str, Dict] = {}
+        self._path_refs: Dict[str, int] = {}
+        self._shared_paths = 0
+        self._context_ids: Dict[str, Set[str]] = {}
+        self._acquired_ids: Dict[Tuple[str, str], str] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._id_counter = itertools.count(1)
         self._lock = threading.Lock()
     
     def register_file(self, file_path: str, context: str = "default", 
@@ -42,16 +63,91 @@ class FileTracker:
             str: 文件的唯一識別碼
         """
         with self._lock:
-            file_id = f"{context}_{int(time.time())}_{os.path.basename(file_path)}"
-            self._tracked_files[file_id] = {
-                'path': file_path,
-                'context': context,
-                'created_time': time.time(),
-                'max_age_minutes': max_age_minutes,
-                'access_count': 0,
-                'last_access': time.time()
-            }
-            logger.debug(f"註冊臨時文件: {file_id} -> {file_path}")
+            return self._add_file(file_path, context, max_age_minutes)
+    
+    def _new_entry(self, path: str, context: str, max_age_minutes: int) -> Dict:
+        """建立追蹤項目"""
+        now = time.time()
+        return {
+            'path': path,
+            'context': context,
+            'created_time': now,
+            'max_age_minutes': max_age_minutes,
+            'expires_at': now + max_age_minutes * 60,
+            'access_count': 0,
+            'last_access': now
+        }
+    
+    def _index_entry(self, entry_id: str, info: Dict):
+        """將項目加入上下文索引與過期堆積（呼叫端需持有鎖）"""
+        self._context_ids.setdefault(info['context'], set()).add(entry_id)
+        self._push_expiry(entry_id, info)
+    
+    def _unindex_entry(self, entry_id: str, info: Dict):
+        """將項目移出上下文索引（堆積項目在取出時略過；呼叫端需持有鎖）"""
+        ids = self._context_ids.get(info['context'])
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._context_ids[info['context']]
+    
+    def _push_expiry(self, entry_id: str, info: Dict):
+        """加入過期堆積，失效項目過多時重建（呼叫端需持有鎖）"""
+        heapq.heappush(self._expiry_heap, (info['expires_at'], entry_id))
+        live = len(self._tracked_files) + len(self._tracked_dirs)
+        if len(self._expiry_heap) > max(2 * live, self.HEAP_COMPACT_MIN_SIZE):
+            self._expiry_heap = [(entry['expires_at'], live_id)
+                                 for tracked in (self._tracked_files, self._tracked_dirs)
+                                 for live_id, entry in tracked.items()]
+            heapq.heapify(self._expiry_heap)
+    
+    def _lookup(self, entry_id: str) -> Tuple[Optional[Dict], str]:
+        """以識別碼取得項目與類型（呼叫端需持有鎖）"""
+        info = self._tracked_files.get(entry_id)
+        if info is not None:
+            return info, 'file'
+        return self._tracked_dirs.get(entry_id), 'directory'
+    
+    def _add_file(self, file_path: str, context: str, max_age_minutes: int) -> str:
+        """新增文件引用（呼叫端需持有鎖）"""
+        file_id = f"{context}_{next(self._id_counter)}_{os.path.basename(file_path)}"
+        refs = self._path_refs.get(file_path, 0) + 1
+        self._path_refs[file_path] = refs
+        if refs == 2:
+            self._shared_paths += 1
+        info = self._new_entry(file_path, context, max_age_minutes)
+        self._tracked_files[file_id] = info
+        self._index_entry(file_id, info)
+        logger.debug(f"註冊臨時文件: {file_id} -> {file_path}")
+        return file_id
+    
+    def acquire_file(self, file_path: str, context: str = "default",
+                     max_age_minutes: int = 60) -> str:
+        """
+        取得共用文件的引用（每個上下文對同一路徑最多一個引用）
+        
+        上下文已引用此路徑時只重設保留時間；否則新增引用。
+        需在使用文件之前呼叫，之後其他上下文的清理不會刪除此文件。
+        
+        Args:
+            file_path: 文件路徑
+            context: 文件上下文（例如：session_id）
+            max_age_minutes: 最大保留時間（分鐘）
+            
+        Returns:
+            str: 此引用的識別碼
+        """
+        with self._lock:
+            file_id = self._acquired_ids.get((file_path, context))
+            info = self._tracked_files.get(file_id) if file_id is not None else None
+            if info is not None:
+                info['created_time'] = time.time()
+                info['max_age_minutes'] = max(info['max_age_minutes'], max_age_minutes)
+                info['expires_at'] = info['created_time'] + info['max_age_minutes'] * 60
+                self._push_expiry(file_id, info)
+                return file_id
+            file_id = self._add_file(file_path, context, max_age_minutes)
+            self._acquired_ids[(file_path, context)] = file_id
             return file_id
     
     def register_directory(self, dir_path: str, context: str = "default",
@@ -68,15 +164,10 @@ class FileTracker:
             str: 目錄的唯一識別碼
         """
         with self._lock:
-            dir_id = f"{context}_dir_{int(time.time())}_{os.path.basename(dir_path)}"
-            self._tracked_dirs[dir_id] = {
-                'path': dir_path,
-                'context': context,
-                'created_time': time.time(),
-                'max_age_minutes': max_age_minutes,
-                'access_count': 0,
-                'last_access': time.time()
-            }
+            dir_id = f"{context}_dir_{next(self._id_counter)}_{os.path.basename(dir_path)}"
+            info = self._new_entry(dir_path, context, max_age_minutes)
+            self._tracked_dirs[dir_id] = info
+            self._index_entry(dir_id, info)
             logger.debug(f"註冊臨時目錄: {dir_id} -> {dir_path}")
             return dir_id
     
@@ -97,9 +188,34 @@ class FileTracker:
                 return self._tracked_files[file_id]['path']
             return None
     
+    def _collect_expired(self, current_time: float) -> List[Dict]:
+        """
+        從過期堆積取出已過期的項目（呼叫端需持有鎖）
+        
+        有效的項目放回堆積（清理失敗時下次仍會取出），失效的項目直接丟棄。
+        """
+        expired = []
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            expires_at, entry_id = heapq.heappop(self._expiry_heap)
+            info, entry_type = self._lookup(entry_id)
+            if info is None or info['expires_at'] != expires_at:
+                continue
+            expired.append({
+                'id': entry_id,
+                'path': info['path'],
+                'context': info['context'],
+                'age_minutes': (current_time - info['created_time']) / 60,
+                'type': entry_type,
+                'expires_at': expires_at
+            })
+        
+        for item in expired:
+            heapq.heappush(self._expiry_heap, (item['expires_at'], item['id']))
+        return expired
+    
     def get_expired_files(self, current_time: Optional[float] = None) -> List[Dict]:
         """
-        獲取已過期的文件列表
+        獲取已過期的文件列表（依過期時間排序）
         
         Args:
             current_time: 當前時間（秒），如果為 None 則使用系統時間
@@ -110,32 +226,8 @@ class FileTracker:
         if current_time is None:
             current_time = time.time()
         
-        expired_files = []
-        
         with self._lock:
-            for file_id, info in self._tracked_files.items():
-                age_minutes = (current_time - info['created_time']) / 60
-                if age_minutes > info['max_age_minutes']:
-                    expired_files.append({
-                        'id': file_id,
-                        'path': info['path'],
-                        'context': info['context'],
-                        'age_minutes': age_minutes,
-                        'type': 'file'
-                    })
-            
-            for dir_id, info in self._tracked_dirs.items():
-                age_minutes = (current_time - info['created_time']) / 60
-                if age_minutes > info['max_age_minutes']:
-                    expired_files.append({
-                        'id': dir_id,
-                        'path': info['path'],
-                        'context': info['context'],
-                        'age_minutes': age_minutes,
-                        'type': 'directory'
-                    })
-        
-        return expired_files
+            return self._collect_expired(current_time)
     
     def unregister_file(self, file_id: str) -> bool:
         """
@@ -149,15 +241,52 @@ class FileTracker:
         """
         with self._lock:
             if file_id in self._tracked_files:
-                del self._tracked_files[file_id]
+                self._drop_file(file_id)
                 logger.debug(f"取消註冊文件: {file_id}")
                 return True
             if file_id in self._tracked_dirs:
-                del self._tracked_dirs[file_id]
+                self._unindex_entry(file_id, self._tracked_dirs.pop(file_id))
                 logger.debug(f"取消註冊目錄: {file_id}")
                 return True
             return False
     
+    def _drop_file(self, file_id: str):
+        """移除文件引用（呼叫端需持有鎖）"""
+        info = self._tracked_files.pop(file_id)
+        self._unindex_entry(file_id, info)
+        path = info['path']
+        key = (path, info['context'])
+        if self._acquired_ids.get(key) == file_id:
+            del self._acquired_ids[key]
+        refs = self._path_refs.get(path, 0) - 1
+        if refs == 1:
+            self._shared_paths -= 1
+        if refs > 0:
+            self._path_refs[path] = refs
+        else:
+            self._path_refs.pop(path, None)
+    
+    def release_file(self, file_id: str) -> bool:
+        """
+        釋放文件引用：其他上下文仍引用同一路徑時只取消註冊，否則刪除文件
+        
+        在鎖內判斷並刪除，其他上下文同時取得引用時不會刪除到正在使用的文件。
+        
+        Args:
+            file_id: 文件識別碼
+            
+        Returns:
+            bool: 引用是否已釋放（刪除失敗時保留註冊，之後再次清理）
+        """
+        with self._lock:
+            info = self._tracked_files.get(file_id)
+            if info is None:
+                return False
+            if self._path_refs.get(info['path'], 0) <= 1 and not safe_remove_file(info['path']):
+                return False
+            self._drop_file(file_id)
+            return True
+    
     def cleanup_by_context(self, context: str) -> List[str]:
         """
         清理指定上下文的所有文件
@@ -171,23 +300,20 @@ class FileTracker:
         cleaned_paths = []
         
         with self._lock:
-            # 收集要清理的文件
+            # 從上下文索引收集要清理的文件
             files_to_clean = []
             dirs_to_clean = []
             
-            for file_id, info in self._tracked_files.items():
-                if info['context'] == context:
-                    files_to_clean.append((file_id, info['path']))
-            
-            for dir_id, info in self._tracked_dirs.items():
-                if info['context'] == context:
-                    dirs_to_clean.append((dir_id, info['path']))
+            for entry_id in self._context_ids.get(context, ()):
+                if entry_id in self._tracked_files:
+                    files_to_clean.append((entry_id, self._tracked_files[entry_id]['path']))
+                else:
+                    dirs_to_clean.append((entry_id, self._tracked_dirs[entry_id]['path']))
         
-        # 清理文件
+        # 清理文件（其他上下文仍引用的文件只釋放引用）
         for file_id, file_path in files_to_clean:
-            if safe_remove_file(file_path):
+            if self.release_file(file_id):
                 cleaned_paths.append(file_path)
-                self.unregister_file(file_id)
         
         # 清理目錄
         for dir_id, dir_path in dirs_to_clean:
@@ -197,19 +323,27 @@ class FileTracker:
         
         return cleaned_paths
     
-    def get_stats(self) -> Dict:
+    def get_stats(self, current_time: Optional[float] = None) -> Dict:
         """
         獲取追蹤器統計資訊
         
+        Args:
+            current_time: 計算過期數量使用的當前時間（秒），如果為 None 則使用系統時間
+        
         Returns:
             Dict: 統計資訊
         """
+        if current_time is None:
+            current_time = time.time()
+        
         with self._lock:
             return {
                 'total_files': len(self._tracked_files),
                 'total_directories': len(self._tracked_dirs),
-                'contexts': list(set([info['context'] for info in self._tracked_files.values()] + 
-                                   [info['context'] for info in self._tracked_dirs.values()]))
+                'shared_files': self._shared_paths,
+                'contexts': list(self._context_ids),
+                'expired_count': len(self._collect_expired(current_time)),
+                'expiry_heap_size': len(self._expiry_heap)
             }
 
 # 全局文件追蹤器實例
@@ -225,6 +359,8 @@ def safe_remove_file(file_path: str) -> bool:
     Returns:
         bool: 是否成功刪除
     """
+    if discard_memory_file(file_path):
+        return True
     try:
         if os.path.exists(file_path):
             if os.access(file_path, os.W_OK):
@@ -307,6 +443,33 @@ def register_temp_file(file_path: str, context: str = "default",
     """
     return _global_tracker.register_file(file_path, context, max_age_minutes)
 
+def acquire_temp_file(file_path: str, context: str = "default",
+                      max_age_minutes: int = 60) -> str:
+    """
+    取得共用臨時文件的引用（最後一個引用被清理時才刪除文件）
+    
+    Args:
+        file_path: 文件路徑
+        context: 上下文名稱
+        max_age_minutes: 最大保留時間（分鐘）
+        
+    Returns:
+        str: 引用識別碼
+    """
+    return _global_tracker.acquire_file(file_path, context, max_age_minutes)
+
+def release_temp_file(file_id: str) -> bool:
+    """
+    釋放臨時文件的引用（沒有其他引用時刪除文件）
+    
+    Args:
+        file_id: 引用識別碼
+        
+    Returns:
+        bool: 是否已釋放
+    """
+    return _global_tracker.release_file(file_id)
+
 def cleanup_files_by_context(context: str) -> int:
     """
     按上下文清理文件
@@ -333,8 +496,7 @@ def cleanup_expired_files() -> int:
     
     for file_info in expired_files:
         if file_info['type'] == 'file':
-            if safe_remove_file(file_info['path']):
-                _global_tracker.unregister_file(file_info['id'])
+            if _global_tracker.release_file(file_info['id']):
                 cleaned_count += 1
         elif file_info['type'] == 'directory':
             if safe_remove_directory(file_info['path']):
@@ -353,10 +515,7 @@ def get_cleanup_stats() -> Dict:
     Returns:
         Dict: 統計資訊
     """
-    stats = _global_tracker.get_stats()
-    expired_count = len(_global_tracker.get_expired_files())
-    stats['expired_count'] = expired_count
-    return stats
+    return _global_tracker.get_stats()
 
 # Flask 裝飾器
 def cleanup_after_request(context: Optional[str] = None):
@@ -6,7 +6,9 @@ backlog = 2048
 
 # Worker processes
 workers = 1
-worker_class = "sync"
+# 使用 gthread：分割任務在背景線程執行，進度串流（SSE）不會佔用整個 worker
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -0,0 +1,216 @@
+"""
+背景任務佇列模組
+將耗時的分割與壓縮工作移出請求線程，由本地工作池執行
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 任務狀態
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# 預設工作線程數量（可透過環境變數調整）
+DEFAULT_MAX_WORKERS = int(os.environ.get('SPLIT_JOB_WORKERS', 2))
+
+class JobQueueError(Exception):
+    """任務佇列錯誤"""
+    pass
+
+class JobManager:
+    """任務管理器 - 管理背景任務的提交、執行與狀態查詢"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_age_minutes: int = 120):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='split_job')
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._max_age_minutes = max_age_minutes
+
+    def submit(self, target: Callable[..., Any], *args, context: str = "default",
+               with_progress: bool = False, **kwargs) -> str:
+        """
+        提交一個背景任務
+
+        Args:
+            target: 要執行的函數
+            *args: 傳給函數的位置參數
+            context: 任務上下文（例如：session_id）
+            with_progress: 是否傳入 progress_callback 關鍵字參數，讓函數回報進度
+            **kwargs: 傳給函數的關鍵字參數
+
+        Returns:
+            str: 任務的唯一識別碼
+        """
+        self._prune_finished()
+
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id,
+                'context': context,
+                'status': JOB_QUEUED,
+                'created_time': time.time(),
+                'started_time': None,
+                'finished_time': None,
+                'result': None,
+                'error': None,
+                'progress': {},
+                'progress_version': 0
+            }
+
+        if with_progress:
+            kwargs['progress_callback'] = lambda progress: self.update_progress(job_id, progress)
+
+        try:
+            self._executor.submit(self._run, job_id, target, args, kwargs)
+        except RuntimeError as e:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            raise JobQueueError(f"無法提交任務: {str(e)}")
+
+        logger.info(f"提交背景任務: {job_id} (上下文: {context})")
+        return job_id
+
+    def _run(self, job_id: str, target: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        """在工作線程中執行任務並記錄結果"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['status'] = JOB_RUNNING
+            job['started_time'] = time.time()
+
+        try:
+            result = target(*args, **kwargs)
+            with self._lock:
+                job['result'] = result
+                job['status'] = JOB_DONE
+            logger.info(f"背景任務完成: {job_id}")
+        except Exception as e:
+            logger.error(f"背景任務失敗 {job_id}: {str(e)}", exc_info=True)
+            with self._lock:
+                job['error'] = str(e)
+                job['error_type'] = type(e).__name__
+                job['status'] = JOB_FAILED
+        finally:
+            with self._lock:
+                job['finished_time'] = time.time()
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]):
+        """
+        更新任務進度
+
+        每個處理階段（progress['stage']）保留最新一筆進度，
+        progress['current_stage'] 記錄最近回報的階段。
+
+        Args:
+            job_id: 任務識別碼
+            progress: 進度資訊字典
+        """
+        stage = progress.get('stage', 'default')
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['progress'][stage] = progress
+            job['progress']['current_stage'] = stage
+            job['progress_version'] += 1
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        獲取任務狀態
+
+        Args:
+            job_id: 任務識別碼
+
+        Returns:
+            Optional[Dict]: 任務狀態的副本，如果任務不存在則返回 None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = dict(job)
+            status['progress'] = dict(job['progress'])
+
+        now = time.time()
+        if status['started_time']:
+            status['elapsed_time'] = (status['finished_time'] or now) - status['started_time']
+        else:
+            status['elapsed_time'] = 0
+        return status
+
+    def _prune_finished(self):
+        """移除已完成且超過保留時間的任務"""
+        cutoff = time.time() - self._max_age_minutes * 60
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['finished_time'] is not None and job['finished_time'] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+        if expired:
+            logger.debug(f"移除了 {len(expired)} 個過期任務")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        獲取任務佇列統計資訊
+
+        Returns:
+            Dict: 各狀態的任務數量
+        """
+        with self._lock:
+            counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+            return {'total_jobs': len(self._jobs), 'status_counts': counts}
+
+# 全局任務管理器實例
+_global_job_manager = JobManager()
+
+def submit_job(target: Callable[..., Any], *args, context: str = "default",
+               with_progress: bool = False, **kwargs) -> str:
+    """
+    提交背景任務
+
+    Args:
+        target: 要執行的函數
+        context: 任務上下文
+        with_progress: 是否傳入 progress_callback 讓函數回報進度
+
+    Returns:
+        str: 任務識別碼
+    """
+    return _global_job_manager.submit(target, *args, context=context,
+                                      with_progress=with_progress, **kwargs)
+
+def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    獲取任務狀態
+
+    Args:
+        job_id: 任務識別碼
+
+    Returns:
+        Optional[Dict]: 任務狀態，如果任務不存在則返回 None
+    """
+    return _global_job_manager.get_status(job_id)
+
+def get_job_stats() -> Dict[str, Any]:
+    """
+    獲取任務佇列統計資訊
+
+    Returns:
+        Dict: 統計資訊
+    """
+    return _global_job_manager.get_stats()
@@ -0,0 +1,235 @@
+"""
+記憶體層模組
+小型 PDF 的上傳檔案、書籤資料、分割檔案與分割結果以記憶體緩衝區保存，不寫入暫存目錄
+
+記憶體檔案以原本會使用的檔案路徑為鍵（目錄不必存在），所有記憶體檔案共用一個全局記憶體預算；
+超過單檔大小門檻或預算不足時，呼叫端改用原本的磁碟路徑。讀取端透過 open_source、source_exists
+與 source_size 同時支援記憶體檔案與磁碟檔案。
+"""
+
+import io
+import os
+import logging
+import threading
+from typing import Dict, Any, BinaryIO, Optional
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 記憶體層的總預算與單一檔案的大小門檻（可透過環境變數調整，單位 MB；預算為 0 時停用記憶體層）
+DEFAULT_BUDGET_BYTES = int(os.environ.get('MEMORY_TIER_MB', 128)) * 1024 * 1024
+DEFAULT_MAX_FILE_BYTES = int(os.environ.get('MEMORY_TIER_FILE_MB', 8)) * 1024 * 1024
+
+class MemoryTier:
+    """記憶體層 - 以檔案路徑為鍵的不可變記憶體檔案，總大小受記憶體預算限制"""
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES,
+                 max_file_bytes: int = DEFAULT_MAX_FILE_BYTES):
+        self._files: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._budget_bytes = budget_bytes
+        self._max_file_bytes = max_file_bytes
+        self._used_bytes = 0
+        self._peak_bytes = 0
+        self._stored = 0
+        self._spilled = 0
+
+    @property
+    def max_file_bytes(self) -> int:
+        return self._max_file_bytes
+
+    def reserve(self, size: int) -> bool:
+        """
+        預留記憶體（例如接收上傳內容前依 Content-Length 預留）
+
+        Args:
+            size: 位元組數
+
+        Returns:
+            bool: 是否成功預留；超過單檔門檻或預算不足時返回 False，呼叫端應改用磁碟
+        """
+        with self._lock:
+            if size > self._max_file_bytes or self._used_bytes + size > self._budget_bytes:
+                self._spilled += 1
+                return False
+            self._used_bytes += size
+            self._peak_bytes = max(self._peak_bytes, self._used_bytes)
+            return True
+
+    def release(self, size: int):
+        """釋放預留的記憶體"""
+        with self._lock:
+            self._used_bytes = max(self._used_bytes - size, 0)
+
+    def put(self, path: str, data: bytes, reserved: int = 0) -> bool:
+        """
+        保存記憶體檔案
+
+        Args:
+            path: 檔案路徑（作為鍵，不會建立檔案）
+            data: 檔案內容
+            reserved: 呼叫端已預留的位元組數（轉為此檔案使用，多餘的部分釋放）
+
+        Returns:
+            bool: 是否已保存；返回 False 時預留的記憶體已釋放，呼叫端應寫入磁碟
+        """
+        data = bytes(data)
+        with self._lock:
+            previous = self._files.get(path)
+            freed = reserved + (len(previous) if previous is not None else 0)
+            if len(data) > self._max_file_bytes or self._used_bytes - freed + len(data) > self._budget_bytes:
+                self._used_bytes = max(self._used_bytes - reserved, 0)
+                self._spilled += 1
+                return False
+            self._files[path] = data
+            self._used_bytes += len(data) - freed
+            self._peak_bytes = max(self._peak_bytes, self._used_bytes)
+            self._stored += 1
+        logger.debug(f"保存記憶體檔案: {path} ({len(data)} 位元組)")
+        return True
+
+    def get(self, path: str) -> Optional[bytes]:
+        """
+        取得記憶體檔案的內容
+
+        Returns:
+            Optional[bytes]: 檔案內容，不是記憶體檔案時返回 None
+        """
+        with self._lock:
+            return self._files.get(path)
+
+    def discard(self, path: str) -> bool:
+        """
+        刪除記憶體檔案
+
+        Returns:
+            bool: 是否有記憶體檔案被刪除
+        """
+        with self._lock:
+            data = self._files.pop(path, None)
+            if data is None:
+                return False
+            self._used_bytes = max(self._used_bytes - len(data), 0)
+        logger.debug(f"刪除記憶體檔案: {path}")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        獲取記憶體層統計資訊
+
+        Returns:
+            Dict: 統計資訊
+        """
+        with self._lock:
+            return {
+                'files': len(self._files),
+                'used_mb': round(self._used_bytes / 1024 / 1024, 2),
+                'peak_mb': round(self._peak_bytes / 1024 / 1024, 2),
+                'budget_mb': round(self._budget_bytes / 1024 / 1024, 2),
+                'max_file_mb': round(self._max_file_bytes / 1024 / 1024, 2),
+                'stored': self._stored,
+                'spilled': self._spilled
+            }
+
+# 全局記憶體層實例（每個 worker 進程一份）
+_global_memory_tier = MemoryTier()
+
+def reserve_memory(size: int) -> bool:
+    """
+    預留記憶體（使用全局記憶體層）
+
+    Returns:
+        bool: 是否成功預留
+    """
+    return _global_memory_tier.reserve(size)
+
+def release_memory(size: int):
+    """釋放預留的記憶體（使用全局記憶體層）"""
+    _global_memory_tier.release(size)
+
+def memory_file_limit() -> int:
+    """
+    記憶體檔案的大小門檻
+
+    Returns:
+        int: 位元組數
+    """
+    return _global_memory_tier.max_file_bytes
+
+def put_memory_file(path: str, data: bytes, reserved: int = 0) -> bool:
+    """
+    保存記憶體檔案（使用全局記憶體層）
+
+    Returns:
+        bool: 是否已保存，返回 False 時呼叫端應寫入磁碟
+    """
+    return _global_memory_tier.put(path, data, reserved)
+
+def get_memory_file(path: str) -> Optional[bytes]:
+    """
+    取得記憶體檔案的內容
+
+    Returns:
+        Optional[bytes]: 檔案內容，不是記憶體檔案時返回 None
+    """
+    return _global_memory_tier.get(path)
+
+def is_memory_file(path: str) -> bool:
+    """
+    檢查路徑是否為記憶體檔案
+
+    Returns:
+        bool: 是否為記憶體檔案
+    """
+    return _global_memory_tier.get(path) is not None
+
+def discard_memory_file(path: str) -> bool:
+    """
+    刪除記憶體檔案
+
+    Returns:
+        bool: 是否有記憶體檔案被刪除
+    """
+    return _global_memory_tier.discard(path)
+
+def open_source(path: str) -> BinaryIO:
+    """
+    以二進位模式開啟檔案（記憶體檔案返回共用內容的 BytesIO，不複製）
+
+    Raises:
+        FileNotFoundError: 檔案不存在
+    """
+    data = _global_memory_tier.get(path)
+    if data is not None:
+        return io.BytesIO(data)
+    return open(path, 'rb')
+
+def source_exists(path: str) -> bool:
+    """
+    檢查記憶體檔案或磁碟檔案是否存在
+
+    Returns:
+        bool: 是否存在
+    """
+    return is_memory_file(path) or os.path.exists(path)
+
+def source_size(path: str) -> int:
+    """
+    獲取記憶體檔案或磁碟檔案的大小
+
+    Raises:
+        FileNotFoundError: 檔案不存在
+    """
+    data = _global_memory_tier.get(path)
+    if data is not None:
+        return len(data)
+    return os.path.getsize(path)
+
+def get_memory_tier_stats() -> Dict[str, Any]:
+    """
+    獲取記憶體層統計資訊
+
+    Returns:
+        Dict: 統計資訊
+    """
+    return _global_memory_tier.get_stats()
@@ -0,0 +1,276 @@
+"""
+分割檔案快取模組
+以內容定址的方式保存已寫入的分割檔案，相同來源與頁面範圍的分割段可以直接重複使用
+"""
+
+import os
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from memory_tier import get_memory_file, open_source
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 快取格式版本，輸出格式改變時遞增以避免使用舊檔案
+PART_CACHE_VERSION = 2
+
+# 快取位置與容量上限（可透過環境變數調整）
+DEFAULT_CACHE_DIR = os.environ.get('PART_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pdf_part_cache'))
+DEFAULT_MAX_SIZE_MB = int(os.environ.get('PART_CACHE_MB', 1024))
+
+# 計算雜湊時每次讀取的區塊大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 記住的檔案雜湊數量上限（最近最少使用的記錄先移除，移除後需要時重新計算）
+FILE_HASH_CACHE_ENTRIES = 256
+
+# 檔案雜湊記錄：(實際路徑, 修改時間, 檔案大小) -> sha256，另以路徑對應目前的記錄
+_file_hashes: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+_file_hash_paths: Dict[str, Tuple[str, int, int]] = {}
+_file_hashes_lock = threading.Lock()
+
+def _file_identity(file_path: str) -> Tuple[str, int, int]:
+    data = get_memory_file(file_path)
+    if data is not None:
+        return file_path, 0, len(data)
+    real_path = os.path.realpath(file_path)
+    stat = os.stat(real_path)
+    return real_path, stat.st_mtime_ns, stat.st_size
+
+def compute_file_hash(file_path: str) -> str:
+    """
+    計算檔案的 sha256（同一檔案未修改時只計算一次）
+
+    Args:
+        file_path: 檔案路徑
+
+    Returns:
+        str: sha256 十六進位字串
+    """
+    identity = _file_identity(file_path)
+    with _file_hashes_lock:
+        cached = _file_hashes.get(identity)
+        if cached is not None:
+            _file_hashes.move_to_end(identity)
+    if cached is not None:
+        return cached
+
+    digest = hashlib.sha256()
+    with open_source(identity[0]) as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    file_hash = digest.hexdigest()
+    remember_file_hash(file_path, file_hash)
+    return file_hash
+
+def remember_file_hash(file_path: str, file_hash: str):
+    """
+    記錄已知的檔案雜湊（例如上傳時已經計算過），避免重新讀取整個檔案
+
+    Args:
+        file_path: 檔案路徑
+        file_hash: sha256 十六進位字串
+    """
+    identity = _file_identity(file_path)
+    with _file_hashes_lock:
+        # 移除同一路徑的舊記錄
+        previous = _file_hash_paths.pop(identity[0], None)
+        if previous is not None:
+            _file_hashes.pop(previous, None)
+        _file_hashes[identity] = file_hash
+        _file_hash_paths[identity[0]] = identity
+        while len(_file_hashes) > FILE_HASH_CACHE_ENTRIES:
+            evicted, _ = _file_hashes.popitem(last=False)
+            del _file_hash_paths[evicted[0]]
+
+def make_part_key(source_hash: str, start_page: int, end_page: int, engine: str) -> str:
+    """
+    生成分割檔案的快取鍵
+
+    Args:
+        source_hash: 來源 PDF 的 sha256
+        start_page: 起始頁面（1-based）
+        end_page: 結束頁面（1-based，包含）
+        engine: 分割引擎名稱
+
+    Returns:
+        str: 快取鍵
+    """
+    raw_key = f"v{PART_CACHE_VERSION}|{source_hash}|{start_page}|{end_page}|{engine}"
+    return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+def _link_or_copy(src: str, dst: str):
+    """優先使用硬連結（不複製資料），跨檔案系統時改為複製"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+class PartCache:
+    """分割檔案快取 - 以容量上限控制的 LRU 磁碟快取"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size_mb: int = DEFAULT_MAX_SIZE_MB):
+        self._cache_dir = cache_dir
+        self._max_size_bytes = max_size_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._total_size = 0
+        self._hits = 0
+        self._misses = 0
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        """首次使用時建立快取目錄並載入既有項目（需持有 self._lock）"""
+        if self._loaded:
+            return
+        os.makedirs(self._cache_dir, exist_ok=True)
+        for name in os.listdir(self._cache_dir):
+            if not name.endswith('.pdf'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self._cache_dir, name))
+            except OSError:
+                continue
+            self._entries[name[:-4]] = {'size': stat.st_size, 'last_access': stat.st_mtime}
+            self._total_size += stat.st_size
+        self._loaded = True
+        logger.debug(f"載入分割檔案快取: {len(self._entries)} 個項目")
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.pdf")
+
+    def fetch(self, key: str, output_path: str) -> Optional[int]:
+        """
+        從快取取出分割檔案到指定路徑
+
+        Args:
+            key: 快取鍵
+            output_path: 輸出檔案路徑
+
+        Returns:
+            Optional[int]: 檔案大小，如果快取中沒有則返回 None
+        """
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            entry['last_access'] = time.time()
+
+        cache_path = self._path_for(key)
+        try:
+            _link_or_copy(cache_path, output_path)
+            os.utime(cache_path)
+        except OSError as e:
+            # 快取檔案可能已被其他進程淘汰
+            logger.debug(f"無法從快取取出分割檔案 {key}: {str(e)}")
+            with self._lock:
+                self._forget(key)
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+        return entry['size']
+
+    def store(self, key: str, file_path: str):
+        """
+        將已寫入的分割檔案加入快取
+
+        Args:
+            key: 快取鍵
+            file_path: 分割檔案路徑
+        """
+        cache_path = self._path_for(key)
+
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._entries:
+                return
+
+        try:
+            # 先寫入臨時名稱再改名，避免其他進程讀到不完整的檔案
+            temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            _link_or_copy(file_path, temp_path)
+            os.replace(temp_path, cache_path)
+            size = os.path.getsize(cache_path)
+        except OSError as e:
+            logger.warning(f"無法寫入分割檔案快取: {str(e)}")
+            return
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = {'size': size, 'last_access': time.time()}
+                self._total_size += size
+            self._evict_if_needed()
+
+    def _forget(self, key: str):
+        """從索引移除項目（需持有 self._lock）"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_size -= entry['size']
+
+    def _evict_if_needed(self):
+        """依最近存取時間淘汰項目，直到低於容量上限（需持有 self._lock）"""
+        if self._total_size <= self._max_size_bytes:
+            return
+
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1]['last_access']):
+            if self._total_size <= self._max_size_bytes:
+                break
+            try:
+                os.remove(self._path_for(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"無法淘汰分割檔案快取 {key}: {str(e)}")
+                continue
+            self._forget(key)
+            logger.debug(f"淘汰分割檔案快取: {key}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        獲取快取統計資訊
+
+        Returns:
+            Dict: 統計資訊
+        """
+        with self._lock:
+            return {
+                'cache_dir': self._cache_dir,
+                'entries': len(self._entries),
+                'total_size_mb': round(self._total_size / 1024 / 1024, 2),
+                'max_size_mb': round(self._max_size_bytes / 1024 / 1024, 2),
+                'hits': self._hits,
+                'misses': self._misses
+            }
+
+# 全局分割檔案快取實例
+_global_part_cache = PartCache()
+
+def get_part_cache() -> PartCache:
+    """
+    獲取全局分割檔案快取
+
+    Returns:
+        PartCache: 快取實例
+    """
+    return _global_part_cache
+
+def get_part_cache_stats() -> Dict[str, Any]:
+    """
+    獲取分割檔案快取統計資訊
+
+    Returns:
+        Dict: 統計資訊
+    """
+    return _global_part_cache.get_stats()
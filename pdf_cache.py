@@ -0,0 +1,253 @@
+"""
+PDF 讀取器快取模組
+在同一個 worker 內重複使用已解析的 PdfReader，避免每個請求重新解析 xref 與頁面樹
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Tuple
+from PyPDF2 import PdfReader
+from PyPDF2.generic import StreamObject
+
+from memory_tier import get_memory_file, open_source
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 記憶體估算參數：每個 xref 項目與每個已解析物件的平均佔用（位元組）
+XREF_ENTRY_BYTES = 150
+RESOLVED_OBJECT_BYTES = 1024
+PAGE_BYTES = 2048
+
+# 快取上限（可透過環境變數調整）
+DEFAULT_MAX_MEMORY_MB = int(os.environ.get('PDF_READER_CACHE_MB', 256))
+DEFAULT_MAX_ENTRIES = int(os.environ.get('PDF_READER_CACHE_ENTRIES', 16))
+
+def _make_cache_key(pdf_path: str) -> Tuple[str, int, int]:
+    """
+    生成快取鍵：實際路徑 + 修改時間 + 檔案大小（記憶體檔案為路徑 + 0 + 內容大小）
+
+    Raises:
+        FileNotFoundError: 檔案不存在
+    """
+    data = get_memory_file(pdf_path)
+    if data is not None:
+        return pdf_path, 0, len(data)
+    real_path = os.path.realpath(pdf_path)
+    stat = os.stat(real_path)
+    return real_path, stat.st_mtime_ns, stat.st_size
+
+def _stream_data_size(obj: StreamObject) -> int:
+    """串流物件保留的資料大小（包含 PyPDF2 快取的解碼結果）"""
+    size = len(obj._data or b'')
+    decoded = getattr(obj, 'decoded_self', None)
+    if decoded is not None:
+        size += len(decoded._data or b'')
+    return size
+
+def _estimate_reader_size(reader: PdfReader) -> int:
+    """估算已解析讀取器佔用的記憶體（位元組）：結構的平均佔用加上已解析串流物件的實際資料大小"""
+    xref_count = sum(len(entries) for entries in reader.xref.values()) + len(reader.xref_objStm)
+    page_count = len(reader.flattened_pages) if reader.flattened_pages is not None else 0
+    stream_bytes = sum(_stream_data_size(obj) for obj in reader.resolved_objects.values()
+                       if isinstance(obj, StreamObject))
+    return (xref_count * XREF_ENTRY_BYTES
+            + len(reader.resolved_objects) * RESOLVED_OBJECT_BYTES
+            + page_count * PAGE_BYTES
+            + stream_bytes)
+
+class ReaderCache:
+    """PdfReader 快取 - 以記憶體上限控制的 LRU 快取"""
+
+    def __init__(self, max_memory_mb: int = DEFAULT_MAX_MEMORY_MB, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._entries: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @contextmanager
+    def acquire(self, pdf_path: str) -> Iterator[PdfReader]:
+        """
+        取得已解析的 PdfReader（上下文管理器）
+
+        同一份文件的讀取器在使用期間會被鎖定，PdfReader 本身不是線程安全的。
+
+        Args:
+            pdf_path: PDF 檔案路徑
+
+        Yields:
+            PdfReader: 已解析的讀取器
+
+        Raises:
+            FileNotFoundError: 檔案不存在
+            PyPDF2.errors.PdfReadError: PDF 讀取錯誤
+        """
+        key = _make_cache_key(pdf_path)
+        stale_entries = []
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+                # 同一路徑的舊版本（檔案已被覆寫）直接淘汰
+                for old_key in [k for k in self._entries if k[0] == key[0]]:
+                    stale_entries.append(self._detach(old_key))
+                entry = {
+                    'lock': threading.RLock(),
+                    'reader': None,
+                    'stream': None,
+                    'size': 0,
+                    'refs': 0,
+                    'evicted': False
+                }
+                self._entries[key] = entry
+            entry['refs'] += 1
+
+        self._close_entries(stale_entries)
+
+        try:
+            with entry['lock']:
+                if entry['reader'] is None:
+                    stream = open_source(key[0])
+                    try:
+                        entry['reader'] = PdfReader(stream)
+                        entry['stream'] = stream
+                    except Exception:
+                        stream.close()
+                        with self._lock:
+                            if self._entries.get(key) is entry:
+                                self._detach(key)
+                        raise
+                    logger.debug(f"解析並快取 PDF 讀取器: {key[0]}")
+
+                try:
+                    yield entry['reader']
+                finally:
+                    entry['size'] = _estimate_reader_size(entry['reader'])
+        finally:
+            with self._lock:
+                entry['refs'] -= 1
+                close_now = entry['evicted'] and entry['refs'] == 0
+            if close_now:
+                self._close_entries([entry])
+            self._evict_if_needed()
+
+    def _detach(self, key: Tuple[str, int, int]) -> Dict[str, Any]:
+        """
+        從快取移除項目（需持有 self._lock）
+
+        Returns:
+            Dict: 被移除的項目；如果仍在使用中則返回 None，由最後一個使用者負責關閉
+        """
+        entry = self._entries.pop(key)
+        entry['evicted'] = True
+        self._evictions += 1
+        return entry if entry['refs'] == 0 else None
+
+    def _close_entries(self, entries):
+        """關閉已移除項目的檔案串流"""
+        for entry in entries:
+            if entry is None:
+                continue
+            stream = entry.get('stream')
+            entry['reader'] = None
+            entry['stream'] = None
+            if stream is not None:
+                try:
+                    stream.close()
+                except Exception as e:
+                    logger.warning(f"關閉快取的 PDF 檔案時發生錯誤: {str(e)}")
+
+    def _evict_if_needed(self):
+        """依 LRU 順序淘汰項目，直到符合記憶體與數量上限（最近使用的項目總是保留）"""
+        to_close = []
+
+        with self._lock:
+            total_size = sum(entry['size'] for entry in self._entries.values())
+            while len(self._entries) > 1 and (total_size > self._max_memory_bytes or len(self._entries) > self._max_entries):
+                oldest_key = next(iter(self._entries))
+                total_size -= self._entries[oldest_key]['size']
+                to_close.append(self._detach(oldest_key))
+                logger.debug(f"淘汰 PDF 讀取器快取: {oldest_key[0]}")
+
+        self._close_entries(to_close)
+
+    def prune(self) -> int:
+        """
+        移除已失效的項目（檔案已刪除或已被修改）
+
+        Returns:
+            int: 移除的項目數量
+        """
+        to_close = []
+
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    current_key = _make_cache_key(key[0])
+                except OSError:
+                    current_key = None
+                if current_key != key:
+                    to_close.append(self._detach(key))
+
+        self._close_entries(to_close)
+        return len(to_close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        獲取快取統計資訊
+
+        Returns:
+            Dict: 統計資訊
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'estimated_memory_mb': round(sum(e['size'] for e in self._entries.values()) / 1024 / 1024, 2),
+                'max_memory_mb': round(self._max_memory_bytes / 1024 / 1024, 2),
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions
+            }
+
+# 全局讀取器快取實例（每個 worker 進程一份）
+_global_reader_cache = ReaderCache()
+
+def acquire_pdf_reader(pdf_path: str):
+    """
+    取得已解析的 PdfReader，用法：with acquire_pdf_reader(path) as reader
+
+    Args:
+        pdf_path: PDF 檔案路徑
+
+    Returns:
+        上下文管理器，產出 PdfReader
+    """
+    return _global_reader_cache.acquire(pdf_path)
+
+def prune_reader_cache() -> int:
+    """
+    移除已刪除或已修改檔案的快取項目
+
+    Returns:
+        int: 移除的項目數量
+    """
+    return _global_reader_cache.prune()
+
+def get_reader_cache_stats() -> Dict[str, Any]:
+    """
+    獲取讀取器快取統計資訊
+
+    Returns:
+        Dict: 統計資訊
+    """
+    return _global_reader_cache.get_stats()
@@ -0,0 +1,271 @@
+"""
+PDF 解析索引模組
+將解析 PDF 得到的結果（頁數、已解析的書籤與內容雜湊）以精簡的二進位格式保存在上傳檔案旁邊，
+驗證上傳、分割與重新啟動的 worker 直接讀取而不必重新解析
+
+索引只保存實際被讀取的資料：分割時仍需要 PdfReader（或原始物件複製引擎自己的交叉引用表），
+因此不保存物件偏移量與頁面物件編號
+"""
+
+import os
+import sys
+import struct
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from part_cache import compute_file_hash, remember_file_hash
+from memory_tier import get_memory_file
+from bookmark_table import BookmarkTable
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 索引檔案格式：檔頭 + 書籤區段；格式改變時遞增版本以避免讀取舊檔案
+INDEX_MAGIC = b'PDFIDX'
+INDEX_VERSION = 3
+INDEX_SUFFIX = '.idx'
+
+# 檔頭：魔術字串、版本、位元組順序、來源大小、來源修改時間、總頁數、sha256、
+# 書籤數、書籤錯誤數、透過具名目的地解析的書籤數、是否已記錄書籤
+_HEADER = struct.Struct('<6sHBqqI32sIIIB')
+
+# 每個 worker 進程保留的已載入索引數量
+INDEX_CACHE_ENTRIES = 64
+
+class PdfIndexError(Exception):
+    """解析索引錯誤"""
+    pass
+
+def get_index_path(pdf_path: str) -> str:
+    """
+    獲取 PDF 檔案的索引檔案路徑（與 PDF 位於同一目錄）
+
+    Args:
+        pdf_path: PDF 檔案路徑
+
+    Returns:
+        str: 索引檔案路徑
+    """
+    return pdf_path + INDEX_SUFFIX
+
+def _source_identity(pdf_path: str) -> Tuple[str, int, int]:
+    """
+    來源檔案的 (實際路徑, 修改時間, 檔案大小)；記憶體檔案為 (路徑, 0, 內容大小)
+
+    Raises:
+        OSError: 檔案不存在
+    """
+    data = get_memory_file(pdf_path)
+    if data is not None:
+        return pdf_path, 0, len(data)
+    real_path = os.path.realpath(pdf_path)
+    stat = os.stat(real_path)
+    return real_path, stat.st_mtime_ns, stat.st_size
+
+def _pack_array(typecode: str, values) -> bytes:
+    return array(typecode, values).tobytes()
+
+def _unpack_array(typecode: str, data: memoryview, offset: int, count: int) -> Tuple[array, int]:
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    if end > len(data):
+        raise PdfIndexError("索引檔案長度不足")
+    values.frombytes(data[offset:end])
+    return values, end
+
+class PdfIndex:
+    """PDF 解析索引 - 頁數與以平行陣列保存的書籤，驗證與書籤分析時不需要 PdfReader"""
+
+    def __init__(self, total_pages: int, file_hash: str,
+                 outline: Optional[BookmarkTable] = None, outline_errors: int = 0,
+                 named_resolved: int = 0):
+        self.total_pages = total_pages
+        self.file_hash = file_hash
+        self.has_outline = outline is not None
+        self.outline = outline if outline is not None else BookmarkTable()
+        self.outline_errors = outline_errors
+        self.named_resolved = named_resolved
+
+    def outline_bookmarks(self) -> BookmarkTable:
+        """
+        還原書籤表格（與 get_bookmarks_recursive 的輸出相同，尚未比對標題模式）
+
+        Returns:
+            BookmarkTable: 書籤表格（每次呼叫返回新的表格，過濾時不會修改索引）
+        """
+        outline = self.outline
+        return BookmarkTable(list(outline.titles), array('H', outline.levels),
+                             array('I', outline.pages), array('I', outline.parents))
+
+    def to_bytes(self, file_size: int, mtime_ns: int) -> bytes:
+        """序列化索引（來源大小與修改時間用於判斷索引是否過期）"""
+        titles = [title.encode('utf-8') for title in self.outline.titles]
+        parts = [
+            _HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 1 if sys.byteorder == 'little' else 0,
+                         file_size, mtime_ns, self.total_pages, bytes.fromhex(self.file_hash),
+                         len(titles), self.outline_errors, self.named_resolved,
+                         1 if self.has_outline else 0)
+        ]
+        if self.has_outline:
+            parts.extend([
+                self.outline.levels.tobytes(),
+                self.outline.parents.tobytes(),
+                self.outline.pages.tobytes(),
+                _pack_array('I', (len(title) for title in titles)),
+                b''.join(titles)
+            ])
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, file_size: int, mtime_ns: int) -> Optional['PdfIndex']:
+        """
+        反序列化索引
+
+        Returns:
+            Optional[PdfIndex]: 索引，版本不符或來源檔案已改變時返回 None
+
+        Raises:
+            PdfIndexError: 索引檔案損壞
+        """
+        if len(data) < _HEADER.size:
+            raise PdfIndexError("索引檔案長度不足")
+        magic, version = struct.unpack_from('<6sH', data)
+        if magic != INDEX_MAGIC:
+            raise PdfIndexError("不是解析索引檔案")
+        if version != INDEX_VERSION:
+            # 其他版本的檔頭格式不同，不再繼續解讀
+            return None
+        (_, _, little_endian, source_size, source_mtime, total_pages, digest,
+         outline_count, outline_errors, named_resolved, has_outline) = _HEADER.unpack_from(data)
+        if little_endian != (sys.byteorder == 'little'):
+            return None
+        if source_size != file_size or source_mtime != mtime_ns:
+            return None
+
+        view = memoryview(data)
+        offset = _HEADER.size
+
+        outline = None
+        if has_outline:
+            levels, offset = _unpack_array('H', view, offset, outline_count)
+            parents, offset = _unpack_array('I', view, offset, outline_count)
+            pages, offset = _unpack_array('I', view, offset, outline_count)
+            lengths, offset = _unpack_array('I', view, offset, outline_count)
+            titles = []
+            for length in lengths:
+                titles.append(sys.intern(bytes(view[offset:offset + length]).decode('utf-8')))
+                offset += length
+            if offset > len(data):
+                raise PdfIndexError("索引檔案長度不足")
+            outline = BookmarkTable(titles, levels, pages, parents)
+
+        if offset != len(data):
+            raise PdfIndexError("索引檔案長度不正確")
+
+        return cls(total_pages, digest.hex(), outline=outline, outline_errors=outline_errors,
+                   named_resolved=named_resolved)
+
+# 已載入的索引：(實際路徑, 修改時間, 檔案大小) -> PdfIndex（記憶體檔案的修改時間為 0）
+_index_cache: 'OrderedDict[Tuple[str, int, int], PdfIndex]' = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+def build_pdf_index(pdf_path: str, reader, bookmarks: Optional[BookmarkTable] = None,
+                    outline_errors: int = 0, named_resolved: int = 0) -> Optional[PdfIndex]:
+    """
+    由已解析的 PdfReader 建立解析索引並寫入索引檔案（記憶體檔案的索引只保留在目前 worker）
+
+    Args:
+        pdf_path: PDF 檔案路徑
+        reader: 已解析的 PdfReader
+        bookmarks: get_bookmarks_recursive 解析出的書籤表格，None 表示不記錄書籤
+        outline_errors: 書籤解析錯誤數量
+        named_resolved: 透過具名目的地解析的書籤數量
+
+    Returns:
+        Optional[PdfIndex]: 索引，無法建立時返回 None（呼叫端照常使用完整解析）
+    """
+    try:
+        key = _source_identity(pdf_path)
+        real_path, mtime_ns, file_size = key
+
+        index = PdfIndex(len(reader.pages), compute_file_hash(real_path), outline=bookmarks,
+                         outline_errors=outline_errors, named_resolved=named_resolved)
+
+        # 先寫入臨時名稱再改名，避免其他 worker 讀到不完整的檔案
+        index_path = get_index_path(pdf_path)
+        if mtime_ns:
+            temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(index.to_bytes(file_size, mtime_ns))
+            os.replace(temp_path, index_path)
+    except (OSError, PdfIndexError, OverflowError, ValueError, AttributeError, KeyError) as e:
+        logger.warning(f"無法建立解析索引 {pdf_path}: {str(e)}")
+        return None
+
+    with _index_cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_ENTRIES:
+            _index_cache.popitem(last=False)
+
+    logger.debug(f"已建立解析索引: {index_path} ({index.total_pages} 頁, {len(index.outline)} 個書籤)")
+    return index
+
+def load_pdf_index(pdf_path: str) -> Optional[PdfIndex]:
+    """
+    載入 PDF 檔案的解析索引
+
+    索引檔案不存在、格式版本不同或 PDF 在建立索引後被修改時返回 None。
+
+    Args:
+        pdf_path: PDF 檔案路徑
+
+    Returns:
+        Optional[PdfIndex]: 索引
+    """
+    try:
+        key = _source_identity(pdf_path)
+    except OSError:
+        return None
+    real_path, mtime_ns, file_size = key
+
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    # 記憶體檔案沒有索引檔案
+    if not mtime_ns:
+        return None
+
+    try:
+        with open(get_index_path(pdf_path), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.debug(f"無法讀取解析索引 {pdf_path}: {str(e)}")
+        return None
+
+    try:
+        index = PdfIndex.from_bytes(data, file_size, mtime_ns)
+    except (PdfIndexError, struct.error, UnicodeDecodeError) as e:
+        logger.warning(f"解析索引損壞，將重新解析 {pdf_path}: {str(e)}")
+        return None
+    if index is None:
+        logger.debug(f"解析索引已過期: {pdf_path}")
+        return None
+
+    # 內容雜湊已知，分割檔案快取不必重新讀取整個檔案
+    remember_file_hash(real_path, index.file_hash)
+
+    with _index_cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_ENTRIES:
+            _index_cache.popitem(last=False)
+
+    logger.debug(f"已載入解析索引: {pdf_path}")
+    return index
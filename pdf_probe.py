@@ -0,0 +1,451 @@
+"""
+PDF 快速探測模組
+只讀取檔頭、交叉引用表、trailer 與頁面樹根節點的 /Count，不建立完整的 PdfReader
+"""
+
+import os
+import re
+import mmap
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional, Tuple
+
+from memory_tier import get_memory_file, open_source
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 位元組層級的 PDF 語法模式
+HEADER_PATTERN = re.compile(rb'%PDF-(\d+\.\d+)')
+STARTXREF_PATTERN = re.compile(rb'startxref\s+(\d+)')
+OBJ_HEADER_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+SUBSECTION_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+')
+XREF_ENTRY_PATTERN = re.compile(rb'(\d{10}) (\d{5}) ([nf])')
+ROOT_PATTERN = re.compile(rb'/Root\s+(\d+)\s+(\d+)\s+R')
+PAGES_PATTERN = re.compile(rb'/Pages\s+(\d+)\s+(\d+)\s+R')
+COUNT_PATTERN = re.compile(rb'/Count\s+(\d+)\b(?:\s+(\d+)\s+R\b)?')
+PREV_PATTERN = re.compile(rb'/Prev\s+(\d+)')
+XREFSTM_PATTERN = re.compile(rb'/XRefStm\s+(\d+)')
+LENGTH_PATTERN = re.compile(rb'/Length\s+(\d+)\b(?:\s+(\d+)\s+R\b)?')
+W_PATTERN = re.compile(rb'/W\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]')
+INDEX_PATTERN = re.compile(rb'/Index\s*\[([\d\s]*)\]')
+SIZE_PATTERN = re.compile(rb'/Size\s+(\d+)')
+FILTER_PATTERN = re.compile(rb'/Filter\s*\[?\s*/(\w+)')
+PREDICTOR_PATTERN = re.compile(rb'/Predictor\s+(\d+)')
+COLUMNS_PATTERN = re.compile(rb'/Columns\s+(\d+)')
+OBJSTM_N_PATTERN = re.compile(rb'/N\s+(\d+)')
+OBJSTM_FIRST_PATTERN = re.compile(rb'/First\s+(\d+)')
+INTEGER_OBJECT_PATTERN = re.compile(rb'\s*(\d+)\s*$')
+
+# 檔頭與 startxref 的搜尋範圍（位元組）
+HEADER_SEARCH_BYTES = 1024
+TRAILER_SEARCH_BYTES = 8192
+
+# 標準交叉引用表每個項目的長度
+XREF_ENTRY_SIZE = 20
+
+# 比對物件檔頭與子區段標題時讀取的長度
+MATCH_SPAN = 128
+
+# 探測結果快取上限（每個 worker 進程）
+PROBE_CACHE_ENTRIES = 256
+
+class PdfProbeError(Exception):
+    """PDF 探測錯誤（檔案結構不符合快速探測的假設，應改用完整解析）"""
+    pass
+
+def _decode_png_predictor(data: bytes, columns: int) -> bytes:
+    """還原 PNG 預測器（交叉引用串流常用 /Predictor 12）"""
+    row_size = columns + 1
+    if len(data) % row_size:
+        raise PdfProbeError("交叉引用串流的預測器資料長度不正確")
+
+    output = bytearray()
+    previous = bytearray(columns)
+    for row_start in range(0, len(data), row_size):
+        filter_type = data[row_start]
+        row = bytearray(data[row_start + 1:row_start + row_size])
+        if filter_type == 1:
+            for i in range(1, columns):
+                row[i] = (row[i] + row[i - 1]) & 0xFF
+        elif filter_type == 2:
+            for i in range(columns):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif filter_type != 0:
+            raise PdfProbeError(f"不支援的 PNG 預測器類型: {filter_type}")
+        output.extend(row)
+        previous = row
+    return bytes(output)
+
+class _XrefSection:
+    """一個交叉引用區段（傳統表格或交叉引用串流）"""
+
+    def __init__(self, kind: str, subsections: List[Tuple[int, int, int]], dictionary: bytes,
+                 table: Optional[bytes] = None, widths: Tuple[int, int, int] = (0, 0, 0)):
+        self.kind = kind
+        self.subsections = subsections
+        self.dictionary = dictionary
+        self.table = table
+        self.widths = widths
+
+    def lookup(self, data, num: int) -> Optional[Tuple[str, int, int]]:
+        """
+        查詢物件位置
+
+        Returns:
+            Optional[Tuple]: ('offset', 偏移量, 0) 或 ('objstm', 物件串流編號, 索引)；
+                ('free', 0, 0) 表示物件已刪除；None 表示此區段沒有記錄
+        """
+        for start, count, position in self.subsections:
+            if not start <= num < start + count:
+                continue
+
+            if self.kind == 'table':
+                entry_start = position + (num - start) * XREF_ENTRY_SIZE
+                entry = XREF_ENTRY_PATTERN.match(data[entry_start:entry_start + XREF_ENTRY_SIZE])
+                if entry is None:
+                    raise PdfProbeError("交叉引用表項目格式不正確")
+                if entry.group(3) == b'f':
+                    return 'free', 0, 0
+                return 'offset', int(entry.group(1)), 0
+
+            entry_size = sum(self.widths)
+            entry_start = position + (num - start) * entry_size
+            fields = []
+            for width in self.widths:
+                fields.append(int.from_bytes(self.table[entry_start:entry_start + width], 'big'))
+                entry_start += width
+            entry_type = fields[0] if self.widths[0] else 1
+            if entry_type == 1:
+                return 'offset', fields[1], 0
+            if entry_type == 2:
+                return 'objstm', fields[1], fields[2]
+            return 'free', 0, 0
+
+        return None
+
+class PdfProbe:
+    """
+    PDF 探測器 - 依交叉引用表直接定位需要的物件
+
+    正規表示式只套用在從映射中複製出的小片段上，避免比對結果持有 mmap 緩衝區而無法關閉。
+    """
+
+    def __init__(self, data):
+        self._data = data
+        self._sections: List[_XrefSection] = []
+
+    def _match_at(self, pattern, position: int, span: int = MATCH_SPAN):
+        """在指定位置比對模式（返回的位置相對於 position）"""
+        return pattern.match(self._data[position:position + span])
+
+    def _object_body_start(self, offset: int, num: Optional[int] = None) -> int:
+        """確認偏移量是物件開頭，返回 obj 關鍵字之後的位置"""
+        header = self._match_at(OBJ_HEADER_PATTERN, offset)
+        if header is None or (num is not None and int(header.group(1)) != num):
+            raise PdfProbeError(f"偏移量 {offset} 不是預期的物件開頭")
+        return offset + header.end()
+
+    def resolve_integer(self, match) -> int:
+        """
+        取得整數值（COUNT_PATTERN 或 LENGTH_PATTERN 的比對結果）；間接引用時讀取被引用的物件
+
+        Raises:
+            PdfProbeError: 被引用的物件不是整數（或交叉引用表尚未載入）
+        """
+        if match.group(2) is None:
+            return int(match.group(1))
+        value = INTEGER_OBJECT_PATTERN.match(self.read_object(int(match.group(1))))
+        if value is None:
+            raise PdfProbeError(f"間接引用的物件 {int(match.group(1))} 不是整數")
+        return int(value.group(1))
+
+    def _find_startxref(self) -> int:
+        data = self._data
+        tail_start = max(0, len(data) - TRAILER_SEARCH_BYTES)
+        matches = list(STARTXREF_PATTERN.finditer(data[tail_start:]))
+        if not matches:
+            raise PdfProbeError("找不到 startxref")
+        return int(matches[-1].group(1))
+
+    def load_xref(self):
+        """從最後一個 startxref 開始沿著 /Prev 載入所有交叉引用區段"""
+        pending = [self._find_startxref()]
+        visited = set()
+
+        while pending:
+            offset = pending.pop(0)
+            if offset in visited:
+                continue
+            visited.add(offset)
+
+            if self._data[offset:offset + 4] == b'xref':
+                section = self._read_table(offset)
+                # 混合式檔案：/XRefStm 指向的交叉引用串流優先於 /Prev
+                xrefstm = XREFSTM_PATTERN.search(section.dictionary)
+                if xrefstm is not None:
+                    pending.insert(0, int(xrefstm.group(1)))
+            else:
+                section = self._read_stream(offset)
+
+            self._sections.append(section)
+            prev = PREV_PATTERN.search(section.dictionary)
+            if prev is not None:
+                pending.append(int(prev.group(1)))
+
+        if not self._sections:
+            raise PdfProbeError("沒有可用的交叉引用區段")
+
+    def _read_table(self, offset: int) -> _XrefSection:
+        """讀取傳統交叉引用表（只記錄子區段位置，不解析每個項目）"""
+        data = self._data
+        position = offset + 4
+        subsections = []
+
+        while True:
+            header = self._match_at(SUBSECTION_PATTERN, position)
+            if header is None:
+                break
+            start, count = int(header.group(1)), int(header.group(2))
+            subsections.append((start, count, position + header.end()))
+            position += header.end() + count * XREF_ENTRY_SIZE
+
+        trailer = data.find(b'trailer', position, position + 64)
+        if trailer < 0:
+            raise PdfProbeError("交叉引用表項目長度不是標準的 20 位元組")
+        end = data.find(b'startxref', trailer)
+        if end < 0:
+            end = min(len(data), trailer + TRAILER_SEARCH_BYTES)
+        return _XrefSection('table', subsections, data[trailer:end])
+
+    def _read_stream(self, offset: int) -> _XrefSection:
+        """讀取交叉引用串流"""
+        dictionary, raw = self._read_stream_object(offset)
+        if b'/XRef' not in dictionary:
+            raise PdfProbeError("startxref 指向的不是交叉引用表")
+
+        widths_match = W_PATTERN.search(dictionary)
+        size_match = SIZE_PATTERN.search(dictionary)
+        if widths_match is None or size_match is None:
+            raise PdfProbeError("交叉引用串流缺少 /W 或 /Size")
+        widths = tuple(int(w) for w in widths_match.groups())
+
+        table = self._decode_stream(dictionary, raw, sum(widths))
+
+        index_match = INDEX_PATTERN.search(dictionary)
+        if index_match is not None:
+            numbers = [int(n) for n in index_match.group(1).split()]
+            pairs = list(zip(numbers[0::2], numbers[1::2]))
+        else:
+            pairs = [(0, int(size_match.group(1)))]
+
+        subsections = []
+        position = 0
+        for start, count in pairs:
+            subsections.append((start, count, position))
+            position += count * sum(widths)
+        if position > len(table):
+            raise PdfProbeError("交叉引用串流資料長度不足")
+
+        return _XrefSection('stream', subsections, dictionary, table, widths)
+
+    def _read_stream_object(self, offset: int) -> Tuple[bytes, bytes]:
+        """讀取串流物件的字典與原始（未解碼）資料"""
+        data = self._data
+        body_start = self._object_body_start(offset)
+        endobj = data.find(b'endobj', body_start)
+        keyword = data.find(b'stream', body_start, endobj if endobj >= 0 else len(data))
+        if keyword < 0:
+            raise PdfProbeError(f"偏移量 {offset} 的物件不是串流")
+
+        # stream 關鍵字之後是 CRLF 或 LF
+        data_start = keyword + len(b'stream')
+        if data[data_start:data_start + 2] == b'\r\n':
+            data_start += 2
+        elif data[data_start:data_start + 1] in (b'\n', b'\r'):
+            data_start += 1
+        else:
+            raise PdfProbeError(f"偏移量 {offset} 的串流關鍵字格式不正確")
+
+        dictionary = data[body_start:keyword]
+        length = LENGTH_PATTERN.search(dictionary)
+        if length is not None:
+            # 交叉引用串流的 /Length 必須是直接值；在載入交叉引用表之前遇到間接引用時 _locate 會拋出錯誤
+            raw = data[data_start:data_start + self.resolve_integer(length)]
+        else:
+            end = data.find(b'endstream', data_start)
+            if end < 0:
+                raise PdfProbeError("找不到 endstream")
+            raw = data[data_start:end]
+        return dictionary, raw
+
+    def _decode_stream(self, dictionary: bytes, raw: bytes, default_columns: int = 0) -> bytes:
+        """解碼串流（只支援 FlateDecode 與 PNG 預測器）"""
+        filter_match = FILTER_PATTERN.search(dictionary)
+        if filter_match is None:
+            decoded = raw
+        elif filter_match.group(1) == b'FlateDecode':
+            decompressor = zlib.decompressobj()
+            try:
+                decoded = decompressor.decompress(raw)
+            except zlib.error as e:
+                raise PdfProbeError(f"無法解壓縮串流: {str(e)}")
+            if not decompressor.eof:
+                # 截斷的壓縮資料不會拋出錯誤，必須檢查是否到達資料結尾
+                raise PdfProbeError("壓縮串流資料不完整")
+        else:
+            raise PdfProbeError(f"不支援的串流篩選器: {filter_match.group(1).decode('latin-1')}")
+
+        predictor = PREDICTOR_PATTERN.search(dictionary)
+        if predictor is not None and int(predictor.group(1)) >= 10:
+            columns = COLUMNS_PATTERN.search(dictionary)
+            decoded = _decode_png_predictor(decoded, int(columns.group(1)) if columns else default_columns)
+        return decoded
+
+    def _locate(self, num: int) -> Tuple[str, int, int]:
+        """依最新到最舊的順序查詢物件位置"""
+        for section in self._sections:
+            location = section.lookup(self._data, num)
+            if location is not None:
+                if location[0] == 'free':
+                    # 混合式檔案的傳統表格會把物件串流中的物件標記為 free，繼續查詢較舊的區段
+                    continue
+                return location
+        raise PdfProbeError(f"交叉引用表中找不到物件 {num}")
+
+    def read_object(self, num: int) -> bytes:
+        """
+        讀取物件內容（不含串流資料）
+
+        Args:
+            num: 物件編號
+
+        Returns:
+            bytes: 物件內容位元組
+        """
+        kind, first, second = self._locate(num)
+
+        if kind == 'offset':
+            data = self._data
+            body_start = self._object_body_start(first, num)
+            end = data.find(b'endobj', body_start)
+            if end < 0:
+                raise PdfProbeError(f"找不到物件 {num} 的 endobj")
+            keyword = data.find(b'stream', body_start, end)
+            return data[body_start:keyword if keyword >= 0 else end]
+
+        # 物件位於物件串流中
+        location = self._locate(first)
+        if location[0] != 'offset':
+            raise PdfProbeError(f"物件串流 {first} 位置無效")
+        dictionary, raw = self._read_stream_object(location[1])
+        decoded = self._decode_stream(dictionary, raw)
+
+        count_match = OBJSTM_N_PATTERN.search(dictionary)
+        first_match = OBJSTM_FIRST_PATTERN.search(dictionary)
+        if count_match is None or first_match is None:
+            raise PdfProbeError(f"物件串流 {first} 缺少 /N 或 /First")
+        first_offset = int(first_match.group(1))
+        numbers = [int(n) for n in decoded[:first_offset].split()]
+        pairs = list(zip(numbers[0::2], numbers[1::2]))[:int(count_match.group(1))]
+
+        for i, (obj_num, obj_offset) in enumerate(pairs):
+            if obj_num == num:
+                end = first_offset + pairs[i + 1][1] if i + 1 < len(pairs) else len(decoded)
+                return decoded[first_offset + obj_offset:end]
+        raise PdfProbeError(f"物件串流 {first} 中找不到物件 {num}")
+
+    def trailer(self) -> bytes:
+        """最新的 trailer 字典（交叉引用串流則為串流字典）"""
+        return self._sections[0].dictionary
+
+# 探測結果快取：(實際路徑, 修改時間, 檔案大小) -> 探測結果（記憶體檔案的修改時間為 0）
+_probe_cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+_probe_cache_lock = threading.Lock()
+
+def probe_pdf(pdf_path: str) -> Dict[str, Any]:
+    """
+    快速探測 PDF 檔案的頁數與基本結構
+
+    同一檔案未修改時直接返回快取的結果。
+
+    Args:
+        pdf_path: PDF 檔案路徑
+
+    Returns:
+        Dict: 探測結果
+            - valid: bool，固定為 True
+            - total_pages: int，頁面樹根節點的 /Count
+            - file_size: int，檔案大小
+            - pdf_version: str，檔頭宣告的版本
+
+    Raises:
+        FileNotFoundError: 檔案不存在
+        PdfProbeError: 無法快速探測（加密、損壞或不支援的結構），應改用完整解析
+    """
+    memory_data = get_memory_file(pdf_path)
+    if memory_data is not None:
+        key = (pdf_path, 0, len(memory_data))
+    else:
+        real_path = os.path.realpath(pdf_path)
+        stat = os.stat(real_path)
+        key = (real_path, stat.st_mtime_ns, stat.st_size)
+    file_size = key[2]
+
+    with _probe_cache_lock:
+        cached = _probe_cache.get(key)
+        if cached is not None:
+            _probe_cache.move_to_end(key)
+            return dict(cached)
+
+    if file_size == 0:
+        raise PdfProbeError("檔案是空的")
+
+    with open_source(key[0]) as f:
+        header = HEADER_PATTERN.search(f.read(HEADER_SEARCH_BYTES))
+        if header is None:
+            raise PdfProbeError("找不到 %PDF- 檔頭")
+
+        # 記憶體檔案直接使用其內容，磁碟檔案以 mmap 映射
+        if memory_data is not None:
+            mapping = nullcontext(memory_data)
+        else:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with mapping as data:
+            try:
+                probe = PdfProbe(data)
+                probe.load_xref()
+                trailer = probe.trailer()
+                if b'/Encrypt' in trailer:
+                    raise PdfProbeError("加密的 PDF 需要完整解析")
+
+                root = ROOT_PATTERN.search(trailer)
+                if root is None:
+                    raise PdfProbeError("trailer 缺少 /Root")
+                pages = PAGES_PATTERN.search(probe.read_object(int(root.group(1))))
+                if pages is None:
+                    raise PdfProbeError("文件目錄缺少 /Pages")
+                count = COUNT_PATTERN.search(probe.read_object(int(pages.group(1))))
+                if count is None:
+                    raise PdfProbeError("頁面樹根節點缺少 /Count")
+                total_pages = probe.resolve_integer(count)
+            except (ValueError, IndexError) as e:
+                raise PdfProbeError(f"PDF 結構解析失敗: {str(e)}")
+
+    result = {
+        'valid': True,
+        'total_pages': total_pages,
+        'file_size': file_size,
+        'pdf_version': header.group(1).decode('ascii')
+    }
+
+    with _probe_cache_lock:
+        _probe_cache[key] = result
+        while len(_probe_cache) > PROBE_CACHE_ENTRIES:
+            _probe_cache.popitem(last=False)
+
+    logger.debug(f"PDF 快速探測完成: {result['total_pages']} 頁")
+    return dict(result)
@@ -0,0 +1,422 @@
+"""
+原始物件複製分割引擎
+直接從原始檔案複製物件位元組（內容串流保持壓縮狀態，不解碼也不重新編碼），
+只重寫頁面物件、頁面樹與交叉引用表；指向未複製物件的引用改寫為 null
+"""
+
+import re
+import mmap
+import logging
+from typing import Dict, List, Set, Tuple, Iterable, Any, BinaryIO
+from PyPDF2 import PdfReader
+from PyPDF2.generic import IndirectObject, DictionaryObject, ArrayObject, NameObject, NullObject
+
+from memory_tier import get_memory_file
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 位元組層級的 PDF 語法模式
+OBJ_HEADER_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+# 物件內容中的語法單元：間接引用（前後必須是空白或分隔符號）、字典起點、字串與註解的起點
+SYNTAX_PATTERN = re.compile(
+    rb'(?<![^\x00\t\n\x0c\r \[\]<>(){}/])(\d+)\s+(\d+)\s+R(?![^\x00\t\n\x0c\r \[\]<>(){}/%])'
+    rb'|<<|[(<%]')
+LITERAL_STRING_PATTERN = re.compile(rb'[()\\]')
+LINE_END_PATTERN = re.compile(rb'[\r\n]')
+STREAM_KEYWORD_PATTERN = re.compile(rb'stream(?:\r\n|\n|\r)')
+LENGTH_PATTERN = re.compile(rb'/Length\s+(\d+)(?:\s+(\d+)\s+R)?')
+
+# 頁面字典中不追蹤的鍵：/Parent 會連到整個頁面樹，/B（文章串珠）會連到其他頁面
+PAGE_SKIP_KEYS = {'/Parent', '/B'}
+
+class RawCopyError(Exception):
+    """原始物件複製錯誤"""
+    pass
+
+def _skip_literal_string(data, pos: int, end: int) -> int:
+    """跳過字面字串（pos 為左括號之後），處理巢狀括號與跳脫字元，返回字串結束後的位置"""
+    depth = 1
+    while depth:
+        match = LITERAL_STRING_PATTERN.search(data, pos, end)
+        if match is None:
+            raise RawCopyError("字串沒有結束")
+        token = match.group()
+        if token == b'\\':
+            pos = match.end() + 1
+            continue
+        depth += 1 if token == b'(' else -1
+        pos = match.end()
+    return pos
+
+def _scan_references(data, start: int, end: int) -> List[Tuple[int, int, int]]:
+    """
+    掃描物件內容位元組中的間接引用（略過字面字串、十六進位字串與註解）
+
+    Args:
+        data: 來源位元組（bytes 或 mmap）
+        start: 掃描起點
+        end: 掃描終點（串流物件只掃描字典部分）
+
+    Returns:
+        List[Tuple[int, int, int]]: (引用起點, 引用終點, 物件編號)
+
+    Raises:
+        RawCopyError: 字串或十六進位字串沒有結束
+    """
+    refs: List[Tuple[int, int, int]] = []
+    pos = start
+    while True:
+        match = SYNTAX_PATTERN.search(data, pos, end)
+        if match is None:
+            return refs
+        pos = match.end()
+        if match.group(1) is not None:
+            refs.append((match.start(), pos, int(match.group(1))))
+            continue
+        token = match.group()
+        if token == b'(':
+            pos = _skip_literal_string(data, pos, end)
+        elif token == b'<':
+            close = data.find(b'>', pos, end)
+            if close < 0:
+                raise RawCopyError("十六進位字串沒有結束")
+            pos = close + 1
+        elif token == b'%':
+            line_end = LINE_END_PATTERN.search(data, pos, end)
+            pos = line_end.start() if line_end is not None else end
+
+def _collect_references(obj: Any, refs: List[int]):
+    """遞迴收集 PyPDF2 物件中的間接引用（不解析引用本身）"""
+    if isinstance(obj, IndirectObject):
+        refs.append(obj.idnum)
+    elif isinstance(obj, DictionaryObject):
+        for value in obj.values():
+            _collect_references(value, refs)
+    elif isinstance(obj, ArrayObject):
+        for value in obj:
+            _collect_references(value, refs)
+
+def _replace_missing_references(obj: Any, keep: Set[int]) -> Any:
+    """複製 PyPDF2 物件，將不在輸出檔案中的間接引用改為 null"""
+    if isinstance(obj, IndirectObject):
+        return obj if obj.idnum in keep else NullObject()
+    if isinstance(obj, DictionaryObject):
+        result = DictionaryObject()
+        for key, value in obj.items():
+            result[key] = _replace_missing_references(value, keep)
+        return result
+    if isinstance(obj, ArrayObject):
+        return ArrayObject(_replace_missing_references(value, keep) for value in obj)
+    return obj
+
+class RawObjectCopier:
+    """原始物件複製器 - 從來源 PDF 複製頁面範圍可達的物件位元組"""
+
+    def __init__(self, pdf_path: str, reader: PdfReader):
+        """
+        Args:
+            pdf_path: 來源 PDF 檔案路徑
+            reader: 已解析的來源 PdfReader（用於 xref 與頁面樹）
+
+        Raises:
+            RawCopyError: 來源 PDF 不支援原始物件複製
+        """
+        if reader.is_encrypted:
+            raise RawCopyError("加密的 PDF 不支援原始物件複製")
+
+        self._reader = reader
+        self._header = reader.pdf_header
+
+        # 物件編號 -> (世代號, 檔案偏移量)
+        self._offsets: Dict[int, Tuple[int, int]] = {}
+        for generation, entries in reader.xref.items():
+            for num, offset in entries.items():
+                if num == 0:
+                    continue
+                if num not in self._offsets or generation > self._offsets[num][0]:
+                    self._offsets[num] = (generation, offset)
+
+        # 位於物件串流中的物件（無法逐位元組複製，需要重新序列化）
+        self._compressed: Set[int] = set(reader.xref_objStm)
+        self._max_num = max(list(self._offsets) + list(self._compressed) + [0])
+
+        # 頁面樹：頁面物件編號與所有 /Pages 節點、目錄物件編號
+        self._pages = list(reader.pages)
+        self._page_nums: List[int] = []
+        for page in self._pages:
+            if page.indirect_reference is None:
+                raise RawCopyError("頁面不是間接物件，無法進行原始物件複製")
+            self._page_nums.append(page.indirect_reference.idnum)
+
+        root_ref = reader.trailer.raw_get('/Root')
+        if not isinstance(root_ref, IndirectObject):
+            raise RawCopyError("文件目錄不是間接物件")
+        self._tree_nums: Set[int] = set(self._page_nums)
+        self._tree_nums.add(root_ref.idnum)
+        self._collect_page_tree_nodes(reader.trailer['/Root'].raw_get('/Pages'))
+
+        info_ref = reader.trailer.raw_get('/Info') if '/Info' in reader.trailer else None
+        self._info_num = info_ref.idnum if isinstance(info_ref, IndirectObject) else None
+
+        # 每個物件的位元組範圍、引用位置與存在的引用（跨分割段重複使用）
+        self._spans: Dict[int, Tuple[int, int, int, int]] = {}
+        self._ref_spans: Dict[int, Tuple[Tuple[int, int, int], ...]] = {}
+        self._refs: Dict[int, Tuple[int, ...]] = {}
+
+        # 記憶體檔案直接使用其內容，磁碟檔案以 mmap 映射
+        self._file = None
+        self._data = get_memory_file(pdf_path)
+        if self._data is None:
+            try:
+                self._file = open(pdf_path, 'rb')
+                self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                if self._file is not None:
+                    self._file.close()
+                raise RawCopyError(f"無法映射 PDF 檔案: {str(e)}")
+
+    def _collect_page_tree_nodes(self, node_ref: Any):
+        """收集所有 /Pages 節點的物件編號（迭代遍歷，避免深層遞迴）"""
+        stack = [node_ref]
+        while stack:
+            ref = stack.pop()
+            if not isinstance(ref, IndirectObject) or ref.idnum in self._tree_nums:
+                continue
+            node = ref.get_object()
+            if node.get('/Type') == '/Pages' or '/Kids' in node:
+                self._tree_nums.add(ref.idnum)
+                if '/Kids' in node:
+                    stack.extend(node['/Kids'])
+
+    def close(self):
+        """釋放檔案映射"""
+        if self._file is None:
+            return
+        try:
+            self._data.close()
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _exists(self, num: int) -> bool:
+        return num in self._compressed or num in self._offsets
+
+    def _locate(self, num: int) -> Tuple[int, int, int, int]:
+        """
+        定位未壓縮物件在來源檔案中的位元組範圍
+
+        Returns:
+            Tuple: (物件起點, 物件終點, 字典起點, 字典終點)；串流物件的字典終點為 stream 關鍵字位置
+        """
+        span = self._spans.get(num)
+        if span is not None:
+            return span
+
+        data = self._data
+        offset = self._offsets[num][1]
+        header = OBJ_HEADER_PATTERN.match(data, offset)
+        if header is None or int(header.group(1)) != num:
+            raise RawCopyError(f"物件 {num} 的偏移量無效")
+
+        obj_start = header.start(1)
+        body_start = header.end()
+        endobj = data.find(b'endobj', body_start)
+        if endobj < 0:
+            raise RawCopyError(f"找不到物件 {num} 的 endobj")
+
+        stream_keyword = STREAM_KEYWORD_PATTERN.search(data, body_start, endobj)
+        if stream_keyword is not None:
+            # 串流物件：依 /Length 跳過串流資料，資料中可能含有 endobj 字樣
+            body_end = stream_keyword.start()
+            data_start = stream_keyword.end()
+            length = self._stream_length(data[body_start:body_end])
+            endstream = -1
+            if length is not None:
+                probe = data_start + length
+                if data[probe:probe + 64].lstrip().startswith(b'endstream'):
+                    endstream = probe
+            if endstream < 0:
+                endstream = data.find(b'endstream', data_start)
+                if endstream < 0:
+                    raise RawCopyError(f"找不到物件 {num} 的 endstream")
+            endobj = data.find(b'endobj', endstream)
+            if endobj < 0:
+                raise RawCopyError(f"找不到物件 {num} 的 endobj")
+        else:
+            body_end = endobj
+
+        span = (obj_start, endobj + len(b'endobj'), body_start, body_end)
+        self._spans[num] = span
+        return span
+
+    def _stream_length(self, dictionary: bytes):
+        """從串流字典位元組取得 /Length（可能是間接引用）"""
+        match = LENGTH_PATTERN.search(dictionary)
+        if match is None:
+            return None
+        if match.group(2) is None:
+            return int(match.group(1))
+        try:
+            length = self._reader.get_object(IndirectObject(int(match.group(1)), int(match.group(2)), self._reader))
+            return int(length)
+        except Exception:
+            return None
+
+    def _references(self, num: int) -> Tuple[int, ...]:
+        """獲取物件直接引用的物件編號（已快取）"""
+        refs = self._refs.get(num)
+        if refs is not None:
+            return refs
+
+        if num in self._compressed:
+            found: List[int] = []
+            _collect_references(self._reader.get_object(IndirectObject(num, 0, self._reader)), found)
+        else:
+            _, _, body_start, body_end = self._locate(num)
+            spans = tuple(_scan_references(self._data, body_start, body_end))
+            self._ref_spans[num] = spans
+            found = [ref for _, _, ref in spans]
+
+        refs = tuple(ref for ref in found if self._exists(ref))
+        self._refs[num] = refs
+        return refs
+
+    def _write_raw_object(self, num: int, keep: Set[int], output: BinaryIO):
+        """逐位元組複製未壓縮物件，只把指向未寫入物件的引用改寫為 null"""
+        obj_start, obj_end, _, _ = self._locate(num)
+        self._references(num)
+        data = self._data
+        pos = obj_start
+        for ref_start, ref_end, ref in self._ref_spans[num]:
+            if ref not in keep:
+                output.write(data[pos:ref_start])
+                output.write(b'null')
+                pos = ref_end
+        output.write(data[pos:obj_end])
+
+    def _reachable(self, roots: Iterable[int]) -> Set[int]:
+        """從根物件出發收集可達物件（不進入頁面樹）"""
+        reachable: Set[int] = set()
+        stack = list(roots)
+        while stack:
+            num = stack.pop()
+            if num in reachable or num in self._tree_nums or not self._exists(num):
+                continue
+            reachable.add(num)
+            stack.extend(self._references(num))
+        return reachable
+
+    def write_pages(self, page_indices: List[int], output_path: str) -> int:
+        """
+        將指定頁面寫入新的 PDF 檔案
+
+        Args:
+            page_indices: 頁面索引列表（0-based）
+            output_path: 輸出檔案路徑
+
+        Returns:
+            int: 輸出檔案大小（位元組）
+
+        Raises:
+            RawCopyError: 物件複製失敗
+        """
+        with open(output_path, 'wb') as output:
+            return self.write_pages_to_stream(page_indices, output)
+
+    def write_pages_to_stream(self, page_indices: List[int], output: BinaryIO) -> int:
+        """
+        將指定頁面寫入二進位串流（串流必須從位置 0 開始，xref 偏移量依串流位置計算）
+
+        Args:
+            page_indices: 頁面索引列表（0-based）
+            output: 可寫入的二進位串流
+
+        Returns:
+            int: 寫入的位元組數
+
+        Raises:
+            RawCopyError: 物件複製失敗
+        """
+        pages = [(self._page_nums[i], self._pages[i]) for i in page_indices]
+
+        # 收集頁面字典引用的物件（跳過 /Parent 等連到頁面樹的鍵）
+        roots: List[int] = []
+        for _, page in pages:
+            for key, value in page.items():
+                if key not in PAGE_SKIP_KEYS:
+                    _collect_references(value, roots)
+        if self._info_num is not None:
+            roots.append(self._info_num)
+
+        objects = self._reachable(roots)
+
+        # 新的頁面樹節點與文件目錄使用來源檔案中未使用的物件編號
+        pages_num = self._max_num + 1
+        catalog_num = self._max_num + 2
+        pages_ref = IndirectObject(pages_num, 0, None)
+
+        # 輸出檔案中存在的物件，其他引用（頁面範圍外的頁面、原頁面樹節點等）改寫為 null
+        keep = set(objects)
+        keep.update(num for num, _ in pages)
+        keep.update((pages_num, catalog_num))
+
+        offsets: Dict[int, Tuple[int, int]] = {}
+
+        output.write(self._header.encode('latin-1') + b'\n%\xe2\xe3\xcf\xd3\n')
+
+        for num in sorted(objects):
+            if num in self._compressed:
+                offsets[num] = (output.tell(), 0)
+                output.write(b'%d 0 obj\n' % num)
+                obj = self._reader.get_object(IndirectObject(num, 0, self._reader))
+                _replace_missing_references(obj, keep).write_to_stream(output, None)
+                output.write(b'\nendobj\n')
+            else:
+                # 逐位元組複製，串流資料維持原始編碼
+                offsets[num] = (output.tell(), self._offsets[num][0])
+                self._write_raw_object(num, keep, output)
+                output.write(b'\n')
+
+        # 頁面物件需要改寫 /Parent（繼承的屬性已由 PyPDF2 展開到頁面字典中）
+        for num, page in pages:
+            page_dict = _replace_missing_references(page, keep)
+            page_dict[NameObject('/Parent')] = pages_ref
+            generation = page.indirect_reference.generation
+            offsets[num] = (output.tell(), generation)
+            output.write(b'%d %d obj\n' % (num, generation))
+            page_dict.write_to_stream(output, None)
+            output.write(b'\nendobj\n')
+
+        kids = b' '.join(b'%d %d R' % (num, page.indirect_reference.generation) for num, page in pages)
+        offsets[pages_num] = (output.tell(), 0)
+        output.write(b'%d 0 obj\n<< /Type /Pages /Kids [ %s ] /Count %d >>\nendobj\n'
+                     % (pages_num, kids, len(pages)))
+
+        offsets[catalog_num] = (output.tell(), 0)
+        output.write(b'%d 0 obj\n<< /Type /Catalog /Pages %d 0 R >>\nendobj\n' % (catalog_num, pages_num))
+
+        # 交叉引用表：只列出實際寫入的物件，以連續區段分組
+        xref_offset = output.tell()
+        output.write(b'xref\n0 1\n0000000000 65535 f\r\n')
+        numbers = sorted(offsets)
+        run_start = 0
+        while run_start < len(numbers):
+            run_end = run_start
+            while run_end + 1 < len(numbers) and numbers[run_end + 1] == numbers[run_end] + 1:
+                run_end += 1
+            output.write(b'%d %d\n' % (numbers[run_start], run_end - run_start + 1))
+            output.write(b''.join(b'%010d %05d n\r\n' % offsets[n] for n in numbers[run_start:run_end + 1]))
+            run_start = run_end + 1
+
+        trailer = b'trailer\n<< /Size %d /Root %d 0 R' % (catalog_num + 1, catalog_num)
+        if self._info_num is not None and self._info_num in offsets:
+            trailer += b' /Info %d %d R' % (self._info_num, offsets[self._info_num][1])
+        output.write(trailer + b' >>\nstartxref\n%d\n%%%%EOF\n' % xref_offset)
+
+        return output.tell()
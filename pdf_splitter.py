@@ -3,18 +3,48 @@ PDF 分割工具模組
 實現 PDF 檔案的分割功能
 """
 
+import io
 import os
 import time
+import uuid
+import heapq
 import tempfile
 import logging
-from typing import List, Dict, Any, Tuple, Optional
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Tuple, Optional, Callable, Iterator
 from pathlib import Path
 import PyPDF2
 from PyPDF2 import PdfReader, PdfWriter
 
+from pdf_cache import acquire_pdf_reader
+from pdf_probe import probe_pdf, PdfProbeError
+from pdf_index import load_pdf_index
+from pdf_raw_copy import RawObjectCopier, RawCopyError
+from part_cache import PartCache, get_part_cache, compute_file_hash, make_part_key
+from memory_tier import is_memory_file, put_memory_file, open_source, source_exists, source_size
+
 # 配置日誌記錄
 logger = logging.getLogger(__name__)
 
+# 並行模式的最小頁數，低於此值時進程間傳遞的成本高於並行收益
+PARALLEL_MIN_PAGES = 50
+
+# 共用進程池的預設工作進程數量（每個 worker 進程一個進程池，所有分割任務共用）
+DEFAULT_PROCESS_WORKERS = min(os.cpu_count() or 1, 2)
+
+# 進程池的啟動方式：在多線程的 gunicorn worker 中 fork 會複製其他線程持有的鎖（日誌處理器、
+# 讀取器快取）而可能死結，因此由 forkserver（平台不支援時為 spawn）啟動乾淨的工作進程
+PROCESS_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# 分割引擎：pypdf 透過 PdfWriter 重新序列化頁面；raw 直接複製來源物件位元組
+ENGINE_PYPDF = 'pypdf'
+ENGINE_RAW = 'raw'
+SPLIT_ENGINES = (ENGINE_PYPDF, ENGINE_RAW)
+
 class PDFSplittingError(Exception):
     """PDF 分割錯誤"""
     pass
@@ -23,10 +53,17 @@ class InvalidSplitPointError(Exception):
     """無效分割點錯誤"""
     pass
 
+class SplitCancelledError(PDFSplittingError):
+    """分割已被取消"""
+    pass
+
 def validate_pdf_for_splitting(pdf_path: str) -> Dict[str, Any]:
     """
     驗證 PDF 檔案是否適合分割
     
+    優先使用上傳檔案旁的解析索引，其次使用快速探測（只讀取交叉引用表與頁面樹根節點），
+    探測失敗時（加密、損壞或不支援的結構）改用完整的 PdfReader 解析。
+    
     Args:
         pdf_path: PDF 檔案路徑
         
@@ -38,15 +75,37 @@ def validate_pdf_for_splitting(pdf_path: str) -> Dict[str, Any]:
         PermissionError: 無法讀取檔案
         PyPDF2.errors.PdfReadError: PDF 讀取錯誤
     """
-    if not os.path.exists(pdf_path):
+    if not source_exists(pdf_path):
         raise FileNotFoundError(f"PDF 檔案不存在: {pdf_path}")
     
-    if not os.access(pdf_path, os.R_OK):
+    if not is_memory_file(pdf_path) and not os.access(pdf_path, os.R_OK):
         raise PermissionError(f"無法讀取 PDF 檔案: {pdf_path}")
     
+    index = load_pdf_index(pdf_path)
+    if index is not None and index.total_pages > 0:
+        logger.debug(f"PDF 檔案驗證成功（解析索引）: {index.total_pages} 頁")
+        return {
+            'valid': True,
+            'total_pages': index.total_pages,
+            'file_size': source_size(pdf_path),
+            'can_extract': True
+        }
+    
     try:
-        with open(pdf_path, 'rb') as pdf_file:
-            reader = PdfReader(pdf_file)
+        probe_result = probe_pdf(pdf_path)
+        if probe_result['total_pages'] > 0:
+            logger.debug(f"PDF 檔案驗證成功（快速探測）: {probe_result['total_pages']} 頁")
+            return {
+                'valid': True,
+                'total_pages': probe_result['total_pages'],
+                'file_size': probe_result['file_size'],
+                'can_extract': True
+            }
+    except PdfProbeError as e:
+        logger.debug(f"快速探測失敗，改用完整解析: {str(e)}")
+    
+    try:
+        with acquire_pdf_reader(pdf_path) as reader:
             total_pages = len(reader.pages)
             
             if total_pages == 0:
@@ -62,7 +121,7 @@ def validate_pdf_for_splitting(pdf_path: str) -> Dict[str, Any]:
             return {
                 'valid': True,
                 'total_pages': total_pages,
-                'file_size': os.path.getsize(pdf_path),
+                'file_size': source_size(pdf_path),
                 'can_extract': True
             }
             
@@ -108,6 +167,32 @@ def validate_split_points(split_points: List[int], total_pages: int) -> List[int
     logger.debug(f"正規化後的分割點: {unique_points}")
     return unique_points
 
+def get_split_segments(validated_split_points: List[int], total_pages: int) -> List[Tuple[int, int, int]]:
+    """
+    根據正規化後的分割點計算每個分割段的頁面範圍
+    
+    Args:
+        validated_split_points: 正規化後的分割點列表（頁碼，1-based）
+        total_pages: PDF 總頁數
+        
+    Returns:
+        List[Tuple[int, int, int]]: (分割段索引 0-based, 起始頁, 結束頁) 列表，已跳過空範圍
+    """
+    segments = []
+    
+    for i, start_page in enumerate(validated_split_points):
+        # 確定結束頁面
+        if i + 1 < len(validated_split_points):
+            end_page = validated_split_points[i + 1] - 1
+        else:
+            end_page = total_pages
+        
+        # 跳過空範圍
+        if start_page <= end_page:
+            segments.append((i, start_page, end_page))
+    
+    return segments
+
 def generate_split_filename(base_name: str, start_page: int, end_page: int, index: int) -> str:
     """
     生成分割檔案名稱
@@ -133,7 +218,310 @@ def generate_split_filename(base_name: str, start_page: int, end_page: int, inde
     
     return filename
 
-def split_pdf(pdf_path: str, split_points: List[int], output_dir: Optional[str] = None) -> Dict[str, Any]:
+def create_raw_copier(pdf_path: str, reader: PdfReader) -> Optional[RawObjectCopier]:
+    """
+    為原始物件複製引擎建立複製器
+    
+    Args:
+        pdf_path: 原始 PDF 檔案路徑
+        reader: 已解析的 PDF 讀取器
+        
+    Returns:
+        Optional[RawObjectCopier]: 複製器，如果此 PDF 不支援原始複製則返回 None（改用 pypdf 引擎）
+    """
+    try:
+        return RawObjectCopier(pdf_path, reader)
+    except RawCopyError as e:
+        logger.warning(f"無法使用原始物件複製引擎，改用 pypdf 引擎: {str(e)}")
+        return None
+
+@contextmanager
+def open_private_reader(pdf_path: str) -> Iterator[PdfReader]:
+    """
+    開啟不放入讀取器快取的 PdfReader（上下文管理器）
+
+    不佔用共用讀取器的鎖，適合低優先權的背景工作，不會延遲同一文件的其他分割任務。
+
+    Args:
+        pdf_path: PDF 檔案路徑
+
+    Yields:
+        PdfReader: 只供呼叫端使用的讀取器
+    """
+    with open_source(pdf_path) as stream:
+        yield PdfReader(stream)
+
+def _write_output(output_path: str, render: Callable[[Any], Any], keep_bytes: bool,
+                  in_memory: bool = False) -> Optional[bytes]:
+    """
+    將 render(stream) 的輸出寫入檔案
+    
+    keep_bytes 為 True 時先寫入記憶體緩衝區再寫入檔案，並返回檔案內容，
+    讓後續處理（例如 ZIP）不必再從磁碟讀回。
+    in_memory 為 True 時輸出保存為記憶體檔案，記憶體層拒絕時才寫入磁碟（必要時建立輸出目錄）。
+    """
+    if not keep_bytes and not in_memory:
+        with open(output_path, 'wb') as output_file:
+            render(output_file)
+        return None
+    
+    buffer = io.BytesIO()
+    render(buffer)
+    data = buffer.getvalue()
+    if in_memory and put_memory_file(output_path, data):
+        return data
+    if in_memory:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'wb') as output_file:
+        output_file.write(data)
+    return data
+
+def write_split_segment(reader: PdfReader, index: int, start_page: int, end_page: int,
+                        base_name: str, output_dir: str,
+                        on_page: Optional[Callable[[], None]] = None,
+                        copier: Optional[RawObjectCopier] = None,
+                        on_written: Optional[Callable[[Dict[str, Any], bytes], None]] = None,
+                        in_memory: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    將一個分割段的頁面寫入獨立的 PDF 檔案
+    
+    Args:
+        reader: 已開啟的原始 PDF 讀取器
+        index: 分割段索引（0-based）
+        start_page: 起始頁面（1-based）
+        end_page: 結束頁面（1-based，包含）
+        base_name: 原始檔案的基本名稱（無副檔名）
+        output_dir: 輸出目錄
+        on_page: 每處理一頁時呼叫的回調函數
+        copier: 原始物件複製器，提供時使用 raw 引擎寫入（失敗時退回 pypdf 引擎）
+        on_written: 分割檔案寫入後呼叫的回調函數，參數為分割檔案資訊與檔案內容
+            （提供時分割檔案先在記憶體中產生）
+        in_memory: 是否將分割檔案保存為記憶體檔案（記憶體層拒絕時寫入磁碟）
+        
+    Returns:
+        Optional[Dict]: 分割檔案資訊，如果沒有成功添加任何頁面則返回 None
+        
+    Raises:
+        PDFSplittingError: 無法寫入分割檔案
+    """
+    # 生成輸出檔案名稱
+    output_filename = generate_split_filename(base_name, start_page, end_page, index + 1)
+    output_path = os.path.join(output_dir, output_filename)
+    
+    if copier is not None:
+        try:
+            page_indices = list(range(start_page - 1, end_page))
+            data = _write_output(output_path, lambda stream: copier.write_pages_to_stream(page_indices, stream),
+                                 on_written is not None, in_memory)
+            output_size = source_size(output_path)
+            pages_added = end_page - start_page + 1
+            if on_page is not None:
+                for _ in range(pages_added):
+                    on_page()
+            
+            logger.debug(f"創建分割檔案（raw 引擎）: {output_filename} ({pages_added} 頁)")
+            
+            split_info = {
+                'index': index + 1,
+                'filename': output_filename,
+                'filepath': output_path,
+                'start_page': start_page,
+                'end_page': end_page,
+                'page_count': pages_added,
+                'file_size': output_size,
+                'size_mb': round(output_size / 1024 / 1024, 2)
+            }
+        except (RawCopyError, OSError) as e:
+            logger.warning(f"分割段 {index + 1} 原始物件複製失敗，改用 pypdf 引擎: {str(e)}")
+        else:
+            if on_written is not None:
+                on_written(split_info, data)
+            return split_info
+    
+    # 創建新的 PDF 寫入器
+    writer = PdfWriter()
+    
+    # 添加指定範圍的頁面
+    pages_added = 0
+    for page_num in range(start_page - 1, end_page):  # 轉換為 0-based
+        try:
+            page = reader.pages[page_num]
+            writer.add_page(page)
+            pages_added += 1
+        except Exception as e:
+            logger.warning(f"無法添加頁面 {page_num + 1}: {str(e)}")
+            continue
+        finally:
+            if on_page is not None:
+                on_page()
+    
+    if pages_added == 0:
+        logger.warning(f"分割段 {index + 1} 沒有成功添加任何頁面")
+        return None
+    
+    # 寫入檔案
+    try:
+        data = _write_output(output_path, writer.write, on_written is not None, in_memory)
+        
+        # 獲取輸出檔案資訊
+        output_size = source_size(output_path)
+        
+        logger.debug(f"創建分割檔案: {output_filename} ({pages_added} 頁)")
+        
+        split_info = {
+            'index': index + 1,
+            'filename': output_filename,
+            'filepath': output_path,
+            'start_page': start_page,
+            'end_page': end_page,
+            'page_count': pages_added,
+            'file_size': output_size,
+            'size_mb': round(output_size / 1024 / 1024, 2)
+        }
+        
+    except Exception as e:
+        logger.error(f"寫入分割檔案時發生錯誤: {str(e)}")
+        raise PDFSplittingError(f"無法寫入分割檔案 {output_filename}: {str(e)}")
+    
+    if on_written is not None:
+        on_written(split_info, data)
+    return split_info
+
+def fetch_cached_segment(part_cache: PartCache, source_hash: str, engine: str, index: int,
+                         start_page: int, end_page: int, base_name: str,
+                         output_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    從分割檔案快取取出相同來源與頁面範圍的分割段
+    
+    Args:
+        part_cache: 分割檔案快取
+        source_hash: 原始 PDF 的 sha256
+        engine: 分割引擎
+        index: 分割段索引（0-based）
+        start_page: 起始頁面（1-based）
+        end_page: 結束頁面（1-based，包含）
+        base_name: 原始檔案的基本名稱（無副檔名）
+        output_dir: 輸出目錄
+        
+    Returns:
+        Optional[Dict]: 分割檔案資訊，如果快取中沒有則返回 None
+    """
+    output_filename = generate_split_filename(base_name, start_page, end_page, index + 1)
+    output_path = os.path.join(output_dir, output_filename)
+    
+    output_size = part_cache.fetch(make_part_key(source_hash, start_page, end_page, engine), output_path)
+    if output_size is None:
+        return None
+    
+    logger.debug(f"使用快取的分割檔案: {output_filename}")
+    
+    return {
+        'index': index + 1,
+        'filename': output_filename,
+        'filepath': output_path,
+        'start_page': start_page,
+        'end_page': end_page,
+        'page_count': end_page - start_page + 1,
+        'file_size': output_size,
+        'size_mb': round(output_size / 1024 / 1024, 2)
+    }
+
+def chunk_segments(segments: List[Tuple[int, int, int]], workers: int) -> List[List[Tuple[int, int, int]]]:
+    """
+    按頁數將分割段平均分配給工作進程（最長處理時間優先）
+    
+    Args:
+        segments: (分割段索引, 起始頁, 結束頁) 列表
+        workers: 工作進程數量
+        
+    Returns:
+        List[List]: 每個工作進程負責的分割段列表（不含空列表）
+    """
+    chunks = [[] for _ in range(workers)]
+    loads = [(0, worker) for worker in range(workers)]
+    
+    # 頁數多的分割段先分配，每次交給目前負擔最輕的工作進程
+    for segment in sorted(segments, key=lambda seg: seg[2] - seg[1], reverse=True):
+        load, worker = heapq.heappop(loads)
+        chunks[worker].append(segment)
+        heapq.heappush(loads, (load + segment[2] - segment[1] + 1, worker))
+    
+    return [chunk for chunk in chunks if chunk]
+
+def _write_segments_worker(pdf_path: str, segments: List[Tuple[int, int, int]],
+                           base_name: str, output_dir: str,
+                           engine: str = ENGINE_PYPDF) -> List[Tuple[int, int, int, Optional[Dict[str, Any]]]]:
+    """進程池工作函數：開啟獨立的 PdfReader 並寫入分配到的分割段"""
+    results = []
+    
+    with open(pdf_path, 'rb') as pdf_file:
+        reader = PdfReader(pdf_file)
+        copier = create_raw_copier(pdf_path, reader) if engine == ENGINE_RAW else None
+        
+        try:
+            for i, start_page, end_page in segments:
+                split_info = write_split_segment(reader, i, start_page, end_page, base_name, output_dir,
+                                                 copier=copier)
+                results.append((i, start_page, end_page, split_info))
+        finally:
+            if copier is not None:
+                copier.close()
+    
+    return results
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+def get_split_process_pool(max_workers: int = DEFAULT_PROCESS_WORKERS) -> Tuple[ProcessPoolExecutor, int]:
+    """
+    取得共用的分割進程池（第一次呼叫時建立，之後所有分割任務共用同一組工作進程）
+    
+    Args:
+        max_workers: 建立進程池時的工作進程數量（進程池已存在時不影響大小）
+        
+    Returns:
+        Tuple: (進程池, 工作進程數量)
+    """
+    global _process_pool, _process_pool_workers
+    
+    with _process_pool_lock:
+        if _process_pool is None:
+            context = multiprocessing.get_context(PROCESS_START_METHOD)
+            if PROCESS_START_METHOD == 'forkserver':
+                # 預先在 forkserver 中匯入分割模組，工作進程不必各自重新匯入 PyPDF2
+                context.set_forkserver_preload([__name__])
+            _process_pool_workers = max(1, max_workers)
+            _process_pool = ProcessPoolExecutor(max_workers=_process_pool_workers, mp_context=context)
+            logger.info(f"建立分割進程池: {_process_pool_workers} 個工作進程（{PROCESS_START_METHOD}）")
+        return _process_pool, _process_pool_workers
+
+def _discard_split_process_pool(pool: ProcessPoolExecutor):
+    """捨棄已損壞的進程池（例如工作進程被終止），下次分割時重新建立"""
+    global _process_pool
+    
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+def shutdown_split_process_pool():
+    """關閉共用的分割進程池"""
+    global _process_pool
+    
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+def split_pdf(pdf_path: str, split_points: List[int], output_dir: Optional[str] = None,
+              progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+              parallel: bool = False, max_workers: Optional[int] = None,
+              engine: str = ENGINE_PYPDF, use_cache: bool = False,
+              part_consumer: Optional[Callable[[Dict[str, Any], bytes], None]] = None,
+              should_stop: Optional[Callable[[], bool]] = None,
+              base_name: Optional[str] = None, in_memory: bool = False,
+              private_reader: bool = False) -> Dict[str, Any]:
     """
     分割 PDF 檔案到指定的分割點
     
@@ -141,6 +529,27 @@ def split_pdf(pdf_path: str, split_points: List[int], output_dir: Optional[str]
         pdf_path: 原始 PDF 檔案路徑
         split_points: 分割點列表（頁碼，1-based）
         output_dir: 輸出目錄，如果為 None 則創建臨時目錄
+        progress_callback: 進度回調函數，每處理一頁及每寫入一個分割檔案時呼叫，
+            參數為包含 stage、pages_done、total_pages、parts_done、total_parts、
+            bytes_written、elapsed_time 的字典（並行模式下每完成一組分割段呼叫一次）
+        parallel: 是否使用共用進程池並行寫入分割段（頁數少於 PARALLEL_MIN_PAGES 時仍使用順序模式）
+        max_workers: 並行模式的最大工作進程數量，如果為 None 則使用 DEFAULT_PROCESS_WORKERS
+            （不超過共用進程池的大小，進程池在第一次並行分割時以此數量建立）
+        engine: 分割引擎，'pypdf'（PdfWriter 重新序列化）或 'raw'（逐位元組複製來源物件，
+            串流不解碼；不支援的檔案自動退回 pypdf）
+        use_cache: 是否使用分割檔案快取（以來源內容雜湊與頁面範圍為鍵，跨 session 共用），
+            快取中已有的分割段直接取出，只寫入缺少的頁面範圍
+        part_consumer: 分割檔案完成時呼叫的回調函數（依分割段順序），參數為分割檔案資訊與檔案內容，
+            可用於在分割進行中同時建立 ZIP；順序模式下內容直接來自記憶體，
+            並行模式與快取命中的分割段則讀取剛寫入的檔案
+        should_stop: 順序模式下寫入每個分割段前與每處理一頁後呼叫，返回 True 時停止分割
+            （寫入中的分割段直接放棄）；已寫入的分割段仍會加入快取，之後拋出 SplitCancelledError
+        base_name: 分割檔案名稱使用的基本名稱（無副檔名），如果為 None 則使用來源檔案名稱
+            （來源以內容雜湊命名時由呼叫端提供上傳時的檔案名稱）
+        in_memory: 是否將分割檔案保存為記憶體檔案（小型文件使用；只使用順序模式且不使用分割檔案快取，
+            輸出目錄在有分割檔案需要寫入磁碟時才建立）
+        private_reader: 順序模式下是否使用獨立的 PdfReader 而不是讀取器快取中共用的讀取器
+            （不佔用共用讀取器的鎖，背景的推測分割使用）
         
     Returns:
         Dict: 包含分割結果的字典
@@ -154,12 +563,16 @@ def split_pdf(pdf_path: str, split_points: List[int], output_dir: Optional[str]
     Raises:
         PDFSplittingError: 分割過程中的錯誤
         InvalidSplitPointError: 無效的分割點
+        SplitCancelledError: should_stop 要求停止分割
     """
     start_time = time.time()
     
     try:
         logger.info(f"開始分割 PDF: {pdf_path}")
         
+        if engine not in SPLIT_ENGINES:
+            raise PDFSplittingError(f"不支援的分割引擎: {engine}")
+        
         # 驗證 PDF 檔案
         pdf_info = validate_pdf_for_splitting(pdf_path)
         total_pages = pdf_info['total_pages']
@@ -167,81 +580,184 @@ def split_pdf(pdf_path: str, split_points: List[int], output_dir: Optional[str]
         # 驗證分割點
         validated_split_points = validate_split_points(split_points, total_pages)
         
-        # 創建輸出目錄
-        if output_dir is None:
+        # 創建輸出目錄（記憶體模式只決定路徑，分割檔案以此路徑保存為記憶體檔案）
+        if in_memory:
+            if output_dir is None:
+                output_dir = os.path.join(tempfile.gettempdir(), f'pdf_split_{uuid.uuid4().hex}')
+            use_cache = False
+            parallel = False
+        elif output_dir is None:
             output_dir = tempfile.mkdtemp(prefix='pdf_split_')
             logger.debug(f"創建臨時目錄: {output_dir}")
         else:
             os.makedirs(output_dir, exist_ok=True)
         
         # 獲取原始檔案名稱（無副檔名）
-        base_name = Path(pdf_path).stem
+        if base_name is None:
+            base_name = Path(pdf_path).stem
         
-        # 開啟原始 PDF
-        with open(pdf_path, 'rb') as pdf_file:
-            reader = PdfReader(pdf_file)
-            
-            split_files = []
-            
-            # 為每個分割段創建 PDF
-            for i, start_page in enumerate(validated_split_points):
-                # 確定結束頁面
-                if i + 1 < len(validated_split_points):
-                    end_page = validated_split_points[i + 1] - 1
-                else:
-                    end_page = total_pages
-                
-                # 跳過空範圍
-                if start_page > end_page:
+        # 計算每個分割段的頁面範圍
+        segments = get_split_segments(validated_split_points, total_pages)
+        
+        # 進度追蹤
+        progress = {
+            'stage': 'split',
+            'pages_done': 0,
+            'total_pages': sum(end - start + 1 for _, start, end in segments),
+            'parts_done': 0,
+            'total_parts': len(segments),
+            'bytes_written': 0,
+            'elapsed_time': 0.0
+        }
+        
+        def report_progress():
+            if progress_callback is not None:
+                progress['elapsed_time'] = time.time() - start_time
+                try:
+                    progress_callback(dict(progress))
+                except Exception as e:
+                    logger.warning(f"進度回調失敗: {str(e)}")
+        
+        report_progress()
+        
+        # 依分割段順序將完成的分割檔案交給 part_consumer（並行模式下完成順序不固定）
+        ready_parts: Dict[int, Tuple[Optional[Dict[str, Any]], Optional[bytes]]] = {}
+        delivery_order = [i for i, _, _ in segments]
+        delivered = 0
+        
+        def deliver_part(index: int, split_info: Optional[Dict[str, Any]], data: Optional[bytes] = None):
+            nonlocal delivered
+            if part_consumer is None:
+                return
+            ready_parts[index] = (split_info, data)
+            while delivered < len(delivery_order) and delivery_order[delivered] in ready_parts:
+                info, payload = ready_parts.pop(delivery_order[delivered])
+                delivered += 1
+                if info is None:
                     continue
-                
-                # 創建新的 PDF 寫入器
-                writer = PdfWriter()
-                
-                # 添加指定範圍的頁面
-                pages_added = 0
-                for page_num in range(start_page - 1, end_page):  # 轉換為 0-based
-                    try:
-                        page = reader.pages[page_num]
-                        writer.add_page(page)
-                        pages_added += 1
-                    except Exception as e:
-                        logger.warning(f"無法添加頁面 {page_num + 1}: {str(e)}")
-                        continue
-                
-                if pages_added == 0:
-                    logger.warning(f"分割段 {i + 1} 沒有成功添加任何頁面")
+                if payload is None:
+                    with open_source(info['filepath']) as part_file:
+                        payload = part_file.read()
+                part_consumer(info, payload)
+        
+        # 先從快取取出相同頁面範圍的分割段，只寫入缺少的部分
+        split_files = []
+        cache_hits = 0
+        pending_segments = segments
+        part_cache = get_part_cache() if use_cache else None
+        source_hash = None
+        
+        if part_cache is not None:
+            source_hash = compute_file_hash(pdf_path)
+            pending_segments = []
+            for i, start_page, end_page in segments:
+                split_info = fetch_cached_segment(part_cache, source_hash, engine, i, start_page, end_page,
+                                                  base_name, output_dir)
+                if split_info is None:
+                    pending_segments.append((i, start_page, end_page))
                     continue
                 
-                # 生成輸出檔案名稱
-                output_filename = generate_split_filename(base_name, start_page, end_page, i + 1)
-                output_path = os.path.join(output_dir, output_filename)
+                split_files.append(split_info)
+                deliver_part(i, split_info)
+                cache_hits += 1
+                progress['pages_done'] += split_info['page_count']
+                progress['parts_done'] += 1
+                progress['bytes_written'] += split_info['file_size']
+            
+            if cache_hits:
+                logger.info(f"分割檔案快取命中: {cache_hits}/{len(segments)} 個分割段")
+                report_progress()
+        
+        pending_pages = sum(end - start + 1 for _, start, end in pending_segments)
+        
+        # 決定實際使用的工作進程數量
+        workers = 1
+        if parallel and len(pending_segments) > 1 and pending_pages >= PARALLEL_MIN_PAGES:
+            workers = min(max_workers or DEFAULT_PROCESS_WORKERS, len(pending_segments))
+        
+        written_files = []
+        cancelled = False
+        
+        if workers > 1:
+            pool, pool_workers = get_split_process_pool(max_workers or DEFAULT_PROCESS_WORKERS)
+            chunks = chunk_segments(pending_segments, min(workers, pool_workers))
+            logger.info(f"並行分割模式: {len(pending_segments)} 個分割段分配到 {len(chunks)} 個工作進程")
+            
+            futures = [
+                pool.submit(_write_segments_worker, pdf_path, chunk, base_name, output_dir, engine)
+                for chunk in chunks
+            ]
+            try:
+                for future in as_completed(futures):
+                    for i, start_page, end_page, split_info in future.result():
+                        progress['pages_done'] += end_page - start_page + 1
+                        deliver_part(i, split_info)
+                        if split_info is not None:
+                            written_files.append(split_info)
+                            progress['parts_done'] += 1
+                            progress['bytes_written'] += split_info['file_size']
+                    report_progress()
+            except BrokenProcessPool:
+                _discard_split_process_pool(pool)
+                raise
+            finally:
+                # 失敗時取消此任務尚未開始的分割段，不佔用其他任務共用的工作進程
+                for future in futures:
+                    future.cancel()
+        elif pending_segments:
+            def on_page():
+                progress['pages_done'] += 1
+                report_progress()
+                # 大型分割段也能在預算用盡或取消時及時停止
+                if should_stop is not None and should_stop():
+                    raise SplitCancelledError("分割已在分割段中途停止")
+            
+            # 從快取取得已解析的原始 PDF（private_reader 時另外解析，不佔用共用讀取器）
+            reader_context = open_private_reader(pdf_path) if private_reader else acquire_pdf_reader(pdf_path)
+            with reader_context as reader:
+                copier = create_raw_copier(pdf_path, reader) if engine == ENGINE_RAW else None
                 
-                # 寫入檔案
                 try:
-                    with open(output_path, 'wb') as output_file:
-                        writer.write(output_file)
-                    
-                    # 獲取輸出檔案資訊
-                    output_size = os.path.getsize(output_path)
-                    
-                    split_info = {
-                        'index': i + 1,
-                        'filename': output_filename,
-                        'filepath': output_path,
-                        'start_page': start_page,
-                        'end_page': end_page,
-                        'page_count': pages_added,
-                        'file_size': output_size,
-                        'size_mb': round(output_size / 1024 / 1024, 2)
-                    }
-                    
-                    split_files.append(split_info)
-                    logger.debug(f"創建分割檔案: {output_filename} ({pages_added} 頁)")
-                    
-                except Exception as e:
-                    logger.error(f"寫入分割檔案時發生錯誤: {str(e)}")
-                    raise PDFSplittingError(f"無法寫入分割檔案 {output_filename}: {str(e)}")
+                    # 為每個分割段創建 PDF
+                    for i, start_page, end_page in pending_segments:
+                        if should_stop is not None and should_stop():
+                            cancelled = True
+                            break
+                        
+                        try:
+                            split_info = write_split_segment(
+                                reader, i, start_page, end_page, base_name, output_dir, on_page, copier,
+                                on_written=(lambda info, data, i=i: deliver_part(i, info, data)) if part_consumer else None,
+                                in_memory=in_memory
+                            )
+                        except SplitCancelledError:
+                            cancelled = True
+                            break
+                        if split_info is None:
+                            deliver_part(i, None)
+                            continue
+                        
+                        written_files.append(split_info)
+                        progress['parts_done'] += 1
+                        progress['bytes_written'] += split_info['file_size']
+                        report_progress()
+                finally:
+                    if copier is not None:
+                        copier.close()
+        
+        if part_cache is not None:
+            # 只快取完整的分割段（有頁面添加失敗的分割段不重複使用）
+            for split_info in written_files:
+                if split_info['page_count'] == split_info['end_page'] - split_info['start_page'] + 1:
+                    key = make_part_key(source_hash, split_info['start_page'], split_info['end_page'], engine)
+                    part_cache.store(key, split_info['filepath'])
+        
+        if cancelled:
+            raise SplitCancelledError(f"分割已取消: 完成 {len(written_files)}/{len(pending_segments)} 個分割段")
+        
+        # 保持原始分割段的檔案順序
+        split_files.extend(written_files)
+        split_files.sort(key=lambda f: f['index'])
         
         processing_time = time.time() - start_time
         
@@ -252,13 +768,15 @@ def split_pdf(pdf_path: str, split_points: List[int], output_dir: Optional[str]
             'total_parts': len(split_files),
             'processing_time': processing_time,
             'original_info': {
-                'filename': os.path.basename(pdf_path),
+                'filename': base_name + Path(pdf_path).suffix,
                 'total_pages': total_pages,
                 'file_size': pdf_info['file_size'],
                 'size_mb': round(pdf_info['file_size'] / 1024 / 1024, 2)
             },
             'split_summary': {
                 'split_points': validated_split_points,
+                'engine': engine,
+                'cache_hits': cache_hits,
                 'total_output_size': sum(f['file_size'] for f in split_files),
                 'average_pages_per_part': round(sum(f['page_count'] for f in split_files) / len(split_files), 1) if split_files else 0
             }
@@ -267,7 +785,7 @@ def split_pdf(pdf_path: str, split_points: List[int], output_dir: Optional[str]
         logger.info(f"PDF 分割完成: 創建了 {len(split_files)} 個檔案，耗時 {processing_time:.2f} 秒")
         return result
         
-    except (InvalidSplitPointError, FileNotFoundError, PermissionError):
+    except (InvalidSplitPointError, SplitCancelledError, FileNotFoundError, PermissionError):
         # 重新拋出已知錯誤
         raise
         
@@ -279,13 +797,15 @@ def split_pdf(pdf_path: str, split_points: List[int], output_dir: Optional[str]
         logger.error(f"PDF 分割過程中發生未預期錯誤: {str(e)}", exc_info=True)
         raise PDFSplittingError(f"PDF 分割失敗: {str(e)}")
 
-def get_split_preview(pdf_path: str, split_points: List[int]) -> Dict[str, Any]:
+def get_split_preview(pdf_path: str, split_points: List[int],
+                      base_name: Optional[str] = None) -> Dict[str, Any]:
     """
     預覽分割結果而不實際分割檔案
     
     Args:
         pdf_path: PDF 檔案路徑
         split_points: 分割點列表
+        base_name: 分割檔案名稱使用的基本名稱，如果為 None 則使用來源檔案名稱
         
     Returns:
         Dict: 預覽資訊
@@ -300,26 +820,20 @@ def get_split_preview(pdf_path: str, split_points: List[int]) -> Dict[str, Any]:
         
         # 計算每個分割段的資訊
         preview_parts = []
-        base_name = Path(pdf_path).stem
-        
-        for i, start_page in enumerate(validated_split_points):
-            # 確定結束頁面
-            if i + 1 < len(validated_split_points):
-                end_page = validated_split_points[i + 1] - 1
-            else:
-                end_page = total_pages
+        if base_name is None:
+            base_name = Path(pdf_path).stem
+        
+        for i, start_page, end_page in get_split_segments(validated_split_points, total_pages):
+            filename = generate_split_filename(base_name, start_page, end_page, i + 1)
+            page_count = end_page - start_page + 1
             
-            if start_page <= end_page:
-                filename = generate_split_filename(base_name, start_page, end_page, i + 1)
-                page_count = end_page - start_page + 1
-                
-                preview_parts.append({
-                    'index': i + 1,
-                    'filename': filename,
-                    'start_page': start_page,
-                    'end_page': end_page,
-                    'page_count': page_count
-                })
+            preview_parts.append({
+                'index': i + 1,
+                'filename': filename,
+                'start_page': start_page,
+                'end_page': end_page,
+                'page_count': page_count
+            })
         
         return {
             'success': True,
@@ -0,0 +1,263 @@
+"""
+推測分割模組
+書籤分析完成後，在背景以低優先權預先分割匹配模式的書籤並存入分割檔案快取，
+使用者直接提交預設選擇時，正式的分割任務可以從快取取出已完成的分割檔案
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from pdf_splitter import split_pdf, SplitCancelledError
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# 推測分割狀態
+SPECULATION_QUEUED = 'queued'
+SPECULATION_RUNNING = 'running'
+SPECULATION_DONE = 'done'
+SPECULATION_CANCELLED = 'cancelled'
+SPECULATION_FAILED = 'failed'
+
+# 每次推測分割可使用的 CPU 時間（秒，可透過環境變數調整），每處理一頁檢查
+DEFAULT_CPU_BUDGET_SECONDS = float(os.environ.get('SPECULATIVE_SPLIT_CPU_SECONDS', 20))
+
+# 同時執行的推測分割數量
+DEFAULT_MAX_WORKERS = int(os.environ.get('SPECULATIVE_SPLIT_WORKERS', 1))
+
+# 推測分割線程的 nice 值（讓正式的分割任務優先使用 CPU）
+SPECULATION_NICE = 19
+
+# 正式分割等待推測分割停止的最長時間（秒）
+DEFAULT_SETTLE_TIMEOUT = 30
+
+def _lower_thread_priority():
+    """降低目前線程的排程優先權（只有 Linux 的 setpriority 可以指定單一線程）"""
+    if not sys.platform.startswith('linux') or not hasattr(threading, 'get_native_id'):
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), SPECULATION_NICE)
+    except OSError as e:
+        logger.debug(f"無法降低推測分割線程的優先權: {str(e)}")
+
+class SpeculativeSplitter:
+    """推測分割管理器 - 每個會話最多保留一個推測分割，結果透過分割檔案快取重複使用"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 cpu_budget_seconds: float = DEFAULT_CPU_BUDGET_SECONDS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='speculative_split',
+                                            initializer=_lower_thread_priority)
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._cpu_budget_seconds = cpu_budget_seconds
+        self._stats = {'started': 0, 'completed': 0, 'cancelled': 0, 'over_budget': 0,
+                       'failed': 0, 'reused': 0}
+
+    def start(self, session_id: str, pdf_path: str, split_points: List[int], engine: str) -> bool:
+        """
+        開始推測分割（取代同一會話之前的推測分割）
+
+        Args:
+            session_id: 會話 ID
+            pdf_path: PDF 檔案路徑
+            split_points: 預設選擇的分割點（頁碼，1-based）
+            engine: 分割引擎（需與正式分割相同，快取鍵包含引擎）
+
+        Returns:
+            bool: 是否已提交
+        """
+        self.cancel(session_id)
+
+        task = {
+            'split_points': sorted(set(split_points)),
+            'engine': engine,
+            'state': SPECULATION_QUEUED,
+            'cancel_event': threading.Event(),
+            'finished_event': threading.Event(),
+            'cpu_time': 0.0,
+            'total_parts': 0,
+            'stop_reason': None
+        }
+        with self._lock:
+            self._tasks[session_id] = task
+            self._stats['started'] += 1
+
+        try:
+            self._executor.submit(self._run, task, pdf_path)
+        except RuntimeError as e:
+            logger.warning(f"無法提交推測分割: {str(e)}")
+            with self._lock:
+                self._tasks.pop(session_id, None)
+            return False
+
+        logger.info(f"提交推測分割: {len(task['split_points'])} 個分割點 (會話: {session_id})")
+        return True
+
+    def _run(self, task: Dict[str, Any], pdf_path: str):
+        """在低優先權線程中執行推測分割"""
+        with self._lock:
+            if task['state'] != SPECULATION_QUEUED:
+                return
+            task['state'] = SPECULATION_RUNNING
+
+        cpu_start = time.thread_time()
+
+        def should_stop() -> bool:
+            if task['cancel_event'].is_set():
+                task['stop_reason'] = 'cancelled'
+                return True
+            if time.thread_time() - cpu_start > self._cpu_budget_seconds:
+                task['stop_reason'] = 'cpu_budget'
+                return True
+            return False
+
+        output_dir = tempfile.mkdtemp(prefix='speculative_split_')
+        try:
+            # 分割檔案存入快取後即可刪除輸出目錄（快取保留自己的硬連結或副本）；
+            # 使用獨立的讀取器，低優先權的推測分割不會佔住同一文件共用讀取器的鎖
+            result = split_pdf(pdf_path, task['split_points'], output_dir=output_dir,
+                               engine=task['engine'], use_cache=True, should_stop=should_stop,
+                               private_reader=True)
+            state = SPECULATION_DONE
+            task['total_parts'] = result['total_parts']
+        except SplitCancelledError as e:
+            state = SPECULATION_CANCELLED
+            logger.info(f"推測分割已停止（{task['stop_reason']}）: {str(e)}")
+        except Exception as e:
+            state = SPECULATION_FAILED
+            logger.warning(f"推測分割失敗: {str(e)}")
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+        with self._lock:
+            task['state'] = state
+            task['cpu_time'] = round(time.thread_time() - cpu_start, 3)
+            if state == SPECULATION_DONE:
+                self._stats['completed'] += 1
+            elif state == SPECULATION_FAILED:
+                self._stats['failed'] += 1
+            elif task['stop_reason'] == 'cpu_budget':
+                self._stats['over_budget'] += 1
+            else:
+                self._stats['cancelled'] += 1
+        task['finished_event'].set()
+
+    def _detach(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """移除會話的推測分割並要求停止（尚未開始的推測分割直接標記為已取消）"""
+        with self._lock:
+            task = self._tasks.pop(session_id, None)
+            if task is None:
+                return None
+            task['cancel_event'].set()
+            if task['state'] == SPECULATION_QUEUED:
+                task['state'] = SPECULATION_CANCELLED
+                task['stop_reason'] = 'cancelled'
+                self._stats['cancelled'] += 1
+                task['finished_event'].set()
+        return task
+
+    def cancel(self, session_id: str) -> bool:
+        """
+        取消會話的推測分割（不等待停止）
+
+        Args:
+            session_id: 會話 ID
+
+        Returns:
+            bool: 是否有推測分割被取消
+        """
+        return self._detach(session_id) is not None
+
+    def settle(self, session_id: str, split_points: List[int],
+               timeout: float = DEFAULT_SETTLE_TIMEOUT) -> Optional[Dict[str, Any]]:
+        """
+        正式分割前結束推測分割
+
+        仍在執行的推測分割會在處理完目前的頁面後停止（寫入中的分割段放棄），
+        已完成的分割段已存入快取，正式分割只需要寫入剩下的頁面範圍。
+
+        Args:
+            session_id: 會話 ID
+            split_points: 正式分割的分割點
+            timeout: 等待推測分割停止的最長時間（秒）
+
+        Returns:
+            Optional[Dict]: 推測分割的狀態（matched 表示分割點與推測相同），沒有推測分割時返回 None
+        """
+        task = self._detach(session_id)
+        if task is None:
+            return None
+
+        task['finished_event'].wait(timeout)
+        matched = task['split_points'] == sorted(set(split_points))
+
+        with self._lock:
+            if matched and task['state'] == SPECULATION_DONE:
+                self._stats['reused'] += 1
+            return {
+                'state': task['state'],
+                'matched': matched,
+                'cpu_time': task['cpu_time'],
+                'total_parts': task['total_parts'],
+                'stop_reason': task['stop_reason']
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        獲取推測分割統計資訊
+
+        Returns:
+            Dict: 統計資訊
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['active'] = sum(1 for task in self._tasks.values()
+                                  if task['state'] in (SPECULATION_QUEUED, SPECULATION_RUNNING))
+            stats['cpu_budget_seconds'] = self._cpu_budget_seconds
+            return stats
+
+# 全局推測分割管理器實例
+_global_speculative_splitter = SpeculativeSplitter()
+
+def start_speculative_split(session_id: str, pdf_path: str, split_points: List[int], engine: str) -> bool:
+    """
+    開始推測分割（使用全局管理器）
+
+    Returns:
+        bool: 是否已提交
+    """
+    return _global_speculative_splitter.start(session_id, pdf_path, split_points, engine)
+
+def settle_speculative_split(session_id: str, split_points: List[int]) -> Optional[Dict[str, Any]]:
+    """
+    正式分割前結束推測分割（使用全局管理器）
+
+    Returns:
+        Optional[Dict]: 推測分割的狀態
+    """
+    return _global_speculative_splitter.settle(session_id, split_points)
+
+def cancel_speculative_split(session_id: str) -> bool:
+    """
+    取消會話的推測分割（使用全局管理器）
+
+    Returns:
+        bool: 是否有推測分割被取消
+    """
+    return _global_speculative_splitter.cancel(session_id)
+
+def get_speculative_split_stats() -> Dict[str, Any]:
+    """
+    獲取推測分割統計資訊
+
+    Returns:
+        Dict: 統計資訊
+    """
+    return _global_speculative_splitter.get_stats()
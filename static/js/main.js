@@ -36,6 +36,11 @@ function initializePageSpecificFeatures() {
         console.log('非首頁，跳過檔案上傳功能初始化');
     }
     
+    // 書籤選擇頁面：逐層載入書籤樹
+    if (document.getElementById('bookmarkTree')) {
+        setupBookmarkSelector();
+    }
+    
     // 顯示歡迎訊息（所有頁面通用）
     showWelcomeMessage();
 }
@@ -141,11 +146,98 @@ function setupFileUpload() {
             return;
         }
         
+        // 大型檔案改用分段上傳，連線中斷時只需補傳缺少的分段
+        if (file.size >= CHUNKED_UPLOAD_THRESHOLD && form.dataset.chunkedUrl) {
+            e.preventDefault();
+            showLoading('正在上傳檔案...');
+            uploadFileInChunks(form.dataset.chunkedUrl, file)
+                .then(redirectUrl => {
+                    window.location.href = redirectUrl;
+                })
+                .catch(error => {
+                    hideLoading();
+                    showError(`上傳失敗：${error.message}`);
+                });
+            return;
+        }
+        
         // 顯示載入狀態
         showLoading('正在上傳並處理檔案...');
     });
 }
 
+// 大於此大小的檔案使用分段上傳
+const CHUNKED_UPLOAD_THRESHOLD = 32 * 1024 * 1024;
+
+// 每個分段上傳失敗時的最多嘗試次數
+const CHUNK_MAX_ATTEMPTS = 5;
+
+/**
+ * 分段上傳檔案（同一檔案再次上傳時沿用未完成的上傳，只補傳缺少的範圍）
+ *
+ * @returns {Promise<string>} 上傳完成後的重定向網址
+ */
+async function uploadFileInChunks(initUrl, file) {
+    const resumeKey = `chunked-upload:${file.name}:${file.size}:${file.lastModified}`;
+    let upload = null;
+    
+    const savedId = localStorage.getItem(resumeKey);
+    if (savedId) {
+        // 上傳已過期或已被清理時重新建立
+        upload = await fetchJsonApi(`${initUrl}/${savedId}`).catch(() => null);
+    }
+    if (!upload) {
+        upload = await fetchJsonApi(initUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+        localStorage.setItem(resumeKey, upload.upload_id);
+    }
+    
+    let uploadedBytes = upload.received_bytes;
+    for (const [start, end] of upload.missing) {
+        for (let offset = start; offset < end; offset += upload.chunk_size) {
+            const chunk = file.slice(offset, Math.min(offset + upload.chunk_size, end));
+            await uploadChunk(upload.chunk_url, offset, chunk);
+            uploadedBytes += chunk.size;
+            showLoading(`正在上傳檔案... ${Math.floor(uploadedBytes * 100 / file.size)}%`);
+        }
+    }
+    
+    showLoading('正在處理檔案...');
+    const result = await fetchJsonApi(upload.finalize_url, { method: 'POST' });
+    localStorage.removeItem(resumeKey);
+    return result.redirect_url;
+}
+
+/**
+ * 上傳單一分段（附上 sha256，網路錯誤或伺服器錯誤時重試）
+ */
+async function uploadChunk(chunkUrl, offset, chunk) {
+    const body = await chunk.arrayBuffer();
+    const headers = { 'Content-Type': 'application/octet-stream' };
+    
+    // crypto.subtle 只在安全連線（HTTPS 或 localhost）下可用
+    if (window.crypto && window.crypto.subtle) {
+        const digest = await window.crypto.subtle.digest('SHA-256', body);
+        headers['X-Chunk-Sha256'] = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+    }
+    
+    for (let attempt = 1; ; attempt++) {
+        try {
+            return await fetchJsonApi(`${chunkUrl}?offset=${offset}`, { method: 'PUT', headers: headers, body: body });
+        } catch (error) {
+            // 只重試網路錯誤、伺服器錯誤與校驗失敗（400）
+            const retryable = !error.status || error.status >= 500 || error.status === 400;
+            if (!retryable || attempt >= CHUNK_MAX_ATTEMPTS) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, attempt * 1000));
+        }
+    }
+}
+
 /**
  * 設定 Flash 訊息功能
  */
@@ -294,4 +386,594 @@ function createFlashContainer() {
     }
     
     return flashContainer;
-} 
\ No newline at end of file
+} 
+
+// ===== 書籤選擇頁面 =====
+
+// 已選擇的書籤 id（書籤樹逐層載入，尚未載入的書籤也可能已被選擇）
+const selectedBookmarkIds = new Set();
+
+// 篩選條件每次改變時遞增，用來忽略過時的分頁回應
+let bookmarkFilterVersion = 0;
+
+// 分割預覽使用的書籤頁碼（索引為書籤 id - 1，0 表示無效頁碼），只在頁面載入時取得一次
+let bookmarkPageNumbers = null;
+
+// 分割預覽最多列出的檔案數量
+const SPLIT_PREVIEW_MAX_ITEMS = 50;
+
+/**
+ * 設定書籤選擇頁面：載入最上層的書籤樹並預先選擇匹配模式的書籤
+ */
+function setupBookmarkSelector() {
+    const tree = document.getElementById('bookmarkTree');
+    const selectionForm = document.querySelector('.bookmark-selection-form');
+    
+    selectionForm.addEventListener('submit', function(e) {
+        if (selectedBookmarkIds.size === 0) {
+            e.preventDefault();
+            return;
+        }
+        
+        // 依選擇狀態產生表單欄位
+        const inputs = document.getElementById('selectedBookmarkInputs');
+        inputs.replaceChildren();
+        selectedBookmarkIds.forEach(id => {
+            const input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = 'selected_bookmarks';
+            input.value = id;
+            inputs.appendChild(input);
+        });
+        
+        // 提交後禁用按鈕，避免重複提交分割任務
+        const submitButton = selectionForm.querySelector('button[type="submit"]');
+        submitButton.disabled = true;
+        submitButton.innerHTML = '<span class="btn-icon">⏳</span>正在提交分割任務...';
+    });
+    
+    applyBookmarkSelection('matched');
+    setupSplitPreview();
+    
+    // 輸入停頓後才查詢，避免每個按鍵都發出請求
+    let searchTimer = null;
+    document.getElementById('bookmarkSearch').addEventListener('input', function() {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(refreshBookmarkView, 300);
+    });
+    
+    const status = tree.querySelector('.outline-status');
+    loadOutlineNodes(tree, 0, 0)
+        .then(() => status.remove())
+        .catch(error => {
+            status.textContent = `載入書籤失敗：${error.message}`;
+        });
+}
+
+/**
+ * 呼叫 JSON API 並檢查回應（書籤 API 由瀏覽器依 ETag 重新驗證快取）
+ */
+function fetchJsonApi(url, options = {}) {
+    const headers = Object.assign({ 'Accept': 'application/json' }, options.headers);
+    return fetch(url, Object.assign({ credentials: 'same-origin' }, options, { headers: headers }))
+        .then(response => response.json().then(data => {
+            if (!response.ok || !data.success) {
+                const error = new Error(data.error || '請求失敗');
+                error.status = response.status;
+                throw error;
+            }
+            return data;
+        }));
+}
+
+/**
+ * 載入父書籤的子書籤並加入容器（超過單次上限時顯示「載入更多」）
+ */
+function loadOutlineNodes(container, parentId, offset) {
+    const tree = document.getElementById('bookmarkTree');
+    const params = new URLSearchParams({ parent: parentId, offset: offset });
+    
+    return fetchJsonApi(`${tree.dataset.outlineUrl}?${params}`).then(data => {
+        renderOutlineNodes(container, data.nodes);
+        
+        if (data.next_offset !== null) {
+            appendLoadMoreButton(container, data.total_children - data.next_offset,
+                                 () => loadOutlineNodes(container, parentId, data.next_offset));
+        }
+    });
+}
+
+/**
+ * 在容器最後加入「載入更多」按鈕，載入成功後移除按鈕
+ */
+function appendLoadMoreButton(container, remaining, loadNext) {
+    const loadMore = document.createElement('button');
+    loadMore.type = 'button';
+    loadMore.className = 'btn btn-secondary outline-load-more';
+    loadMore.textContent = `載入更多（還有 ${remaining} 個書籤）`;
+    loadMore.addEventListener('click', function() {
+        loadMore.disabled = true;
+        loadNext()
+            .then(() => loadMore.remove())
+            .catch(error => {
+                loadMore.disabled = false;
+                showError(error.message);
+            });
+    });
+    container.appendChild(loadMore);
+}
+
+/**
+ * 依搜尋文字與「只顯示匹配」切換書籤樹與分頁列表
+ */
+function refreshBookmarkView() {
+    const tree = document.getElementById('bookmarkTree');
+    const results = document.getElementById('bookmarkResults');
+    const query = document.getElementById('bookmarkSearch').value.trim();
+    const showOnlyMatched = document.getElementById('showOnlyMatched').checked;
+    const version = ++bookmarkFilterVersion;
+    
+    if (!query && !showOnlyMatched) {
+        results.hidden = true;
+        results.replaceChildren();
+        tree.hidden = false;
+        return;
+    }
+    
+    const filters = new URLSearchParams();
+    if (query) filters.set('q', query);
+    if (showOnlyMatched) filters.set('matches_pattern', 'true');
+    
+    tree.hidden = true;
+    results.hidden = false;
+    results.replaceChildren();
+    
+    loadBookmarkPage(results, filters, 0, version).catch(error => {
+        if (version === bookmarkFilterVersion) {
+            showError(error.message);
+        }
+    });
+}
+
+/**
+ * 載入符合篩選條件的一頁書籤並加入列表
+ */
+function loadBookmarkPage(container, filters, offset, version) {
+    const params = new URLSearchParams(filters);
+    params.set('offset', offset);
+    
+    return fetchJsonApi(`${container.dataset.bookmarksUrl}?${params}`).then(data => {
+        if (version !== bookmarkFilterVersion) {
+            return; // 篩選條件已改變
+        }
+        
+        if (data.total === 0) {
+            const status = document.createElement('div');
+            status.className = 'outline-status';
+            status.textContent = '沒有符合條件的書籤';
+            container.appendChild(status);
+            return;
+        }
+        
+        renderOutlineNodes(container, data.bookmarks);
+        
+        if (data.next_offset !== null) {
+            appendLoadMoreButton(container, data.total - data.next_offset,
+                                 () => loadBookmarkPage(container, filters, data.next_offset, version));
+        }
+    });
+}
+
+/**
+ * 將書籤節點（含已一併返回的子書籤）加入容器
+ */
+function renderOutlineNodes(container, nodes) {
+    const fragment = document.createDocumentFragment();
+    nodes.forEach(node => fragment.appendChild(createOutlineNode(node)));
+    container.appendChild(fragment);
+}
+
+/**
+ * 建立單一書籤節點（標題以 textContent 設定，避免書籤標題被當作 HTML）
+ */
+function createOutlineNode(node) {
+    const item = document.createElement('div');
+    item.className = 'bookmark-item';
+    if (node.matches_pattern) item.classList.add('matched');
+    if (!node.valid) item.classList.add('invalid');
+    item.dataset.matches = node.matches_pattern ? 'true' : 'false';
+    
+    const content = document.createElement('div');
+    content.className = 'bookmark-content';
+    
+    // 展開按鈕（沒有子書籤時保留空位對齊）
+    const toggle = document.createElement(node.child_count ? 'button' : 'span');
+    toggle.className = 'outline-toggle';
+    content.appendChild(toggle);
+    
+    const label = document.createElement('label');
+    label.className = 'bookmark-label';
+    
+    // 頁碼無效的書籤只作為樹狀結構顯示，不能選擇
+    if (node.valid) {
+        const checkbox = document.createElement('input');
+        checkbox.type = 'checkbox';
+        checkbox.dataset.bookmarkId = node.id;
+        checkbox.checked = selectedBookmarkIds.has(node.id);
+        checkbox.addEventListener('change', function() {
+            if (checkbox.checked) {
+                selectedBookmarkIds.add(node.id);
+            } else {
+                selectedBookmarkIds.delete(node.id);
+            }
+            // 同一書籤可能同時出現在書籤樹與搜尋結果中
+            document.querySelectorAll(`.bookmarks-list input[data-bookmark-id="${node.id}"]`).forEach(other => {
+                other.checked = checkbox.checked;
+            });
+            updateSelectionCount();
+        });
+        label.appendChild(checkbox);
+    }
+    
+    const info = document.createElement('div');
+    info.className = 'bookmark-info';
+    
+    const titleRow = document.createElement('div');
+    titleRow.className = 'bookmark-title-row';
+    
+    const title = document.createElement('span');
+    title.className = 'bookmark-title';
+    title.textContent = node.title;
+    titleRow.appendChild(title);
+    
+    const badges = document.createElement('div');
+    badges.className = 'bookmark-badges';
+    if (node.matches_pattern) {
+        const matchedBadge = document.createElement('span');
+        matchedBadge.className = 'badge badge-matched';
+        matchedBadge.title = `匹配模式: ${node.matched_pattern}`;
+        matchedBadge.textContent = node.matched_pattern;
+        badges.appendChild(matchedBadge);
+    }
+    const pageBadge = document.createElement('span');
+    pageBadge.className = 'badge badge-page';
+    pageBadge.textContent = node.valid ? `第 ${node.page_num} 頁` : '無效頁碼';
+    badges.appendChild(pageBadge);
+    titleRow.appendChild(badges);
+    info.appendChild(titleRow);
+    
+    const levelParts = [];
+    if (node.level > 0) levelParts.push(`Level ${node.level}`);
+    if (node.child_count) levelParts.push(`${node.child_count} 個子書籤`);
+    if (levelParts.length) {
+        const levelRow = document.createElement('div');
+        levelRow.className = 'bookmark-level';
+        const levelIndicator = document.createElement('span');
+        levelIndicator.className = 'level-indicator';
+        levelIndicator.textContent = levelParts.join(' · ');
+        levelRow.appendChild(levelIndicator);
+        info.appendChild(levelRow);
+    }
+    
+    label.appendChild(info);
+    content.appendChild(label);
+    item.appendChild(content);
+    
+    if (node.child_count) {
+        const children = document.createElement('div');
+        children.className = 'bookmark-children';
+        item.appendChild(children);
+        
+        let loaded = Array.isArray(node.children);
+        if (loaded) {
+            renderOutlineNodes(children, node.children);
+        } else {
+            children.hidden = true;
+        }
+        toggle.type = 'button';
+        toggle.textContent = loaded ? '▼' : '▶';
+        toggle.title = loaded ? '收合' : '展開';
+        
+        toggle.addEventListener('click', function() {
+            if (!loaded) {
+                // 第一次展開時才向伺服器查詢子書籤
+                toggle.disabled = true;
+                loadOutlineNodes(children, node.id, 0)
+                    .then(() => {
+                        loaded = true;
+                        children.hidden = false;
+                        toggle.textContent = '▼';
+                        toggle.title = '收合';
+                    })
+                    .catch(error => showError(error.message))
+                    .finally(() => { toggle.disabled = false; });
+                return;
+            }
+            children.hidden = !children.hidden;
+            toggle.textContent = children.hidden ? '▶' : '▼';
+            toggle.title = children.hidden ? '展開' : '收合';
+        });
+    }
+    
+    return item;
+}
+
+/**
+ * 依伺服器返回的書籤 id 批次加入選擇（包含尚未載入的書籤）
+ *
+ * @returns {Promise<number>} 加入的書籤數量
+ */
+function applyBookmarkSelection(mode, level = null) {
+    const tree = document.getElementById('bookmarkTree');
+    const params = new URLSearchParams({ mode: mode });
+    if (level !== null) params.set('level', level);
+    
+    return fetchJsonApi(`${tree.dataset.selectionUrl}?${params}`)
+        .then(data => {
+            data.ids.forEach(id => selectedBookmarkIds.add(id));
+            refreshBookmarkCheckboxes();
+            updateSelectionCount();
+            return data.ids.length;
+        })
+        .catch(error => {
+            showError(error.message);
+            return 0;
+        });
+}
+
+/**
+ * 讓已載入的複選框與選擇狀態一致
+ */
+function refreshBookmarkCheckboxes() {
+    document.querySelectorAll('.bookmarks-list input[data-bookmark-id]').forEach(checkbox => {
+        checkbox.checked = selectedBookmarkIds.has(Number(checkbox.dataset.bookmarkId));
+    });
+}
+
+// 選擇所有匹配模式的書籤
+function selectMatched() {
+    applyBookmarkSelection('matched');
+}
+
+// 全選所有書籤
+function selectAll() {
+    applyBookmarkSelection('all');
+}
+
+// 清除所有選擇
+function clearSelection() {
+    selectedBookmarkIds.clear();
+    refreshBookmarkCheckboxes();
+    updateSelectionCount();
+}
+
+// 按層級選擇書籤
+function selectByLevel() {
+    const levelSelect = document.getElementById('levelSelect');
+    const selectedLevel = levelSelect.value;
+    
+    if (selectedLevel === '') {
+        return; // 沒有選擇層級，不執行任何操作
+    }
+    
+    // 重置下拉選單
+    levelSelect.value = '';
+    
+    applyBookmarkSelection('level', selectedLevel).then(selectedCount => {
+        // 顯示選擇結果訊息
+        if (selectedCount > 0) {
+            const levelText = selectedLevel === '0' ? 'Level 0 (根目錄)' : `Level ${selectedLevel}`;
+            showSelectionMessage(`已選擇 ${selectedCount} 個 ${levelText} 的書籤`);
+        } else {
+            showSelectionMessage(`Level ${selectedLevel} 沒有找到書籤`);
+        }
+    });
+}
+
+// 顯示選擇結果訊息
+function showSelectionMessage(message) {
+    // 移除現有的訊息
+    const existingMessage = document.querySelector('.selection-message');
+    if (existingMessage) {
+        existingMessage.remove();
+    }
+    
+    // 創建新的訊息元素
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'selection-message';
+    messageDiv.style.cssText = `
+        background: #e3f2fd;
+        border: 1px solid #2196f3;
+        color: #1976d2;
+        padding: 8px 12px;
+        border-radius: 4px;
+        margin: 10px 0;
+        font-size: 14px;
+        animation: fadeInOut 3s ease-in-out;
+    `;
+    messageDiv.textContent = message;
+    
+    // 添加淡入淡出動畫
+    const style = document.createElement('style');
+    style.textContent = `
+        @keyframes fadeInOut {
+            0% { opacity: 0; transform: translateY(-10px); }
+            20% { opacity: 1; transform: translateY(0); }
+            80% { opacity: 1; transform: translateY(0); }
+            100% { opacity: 0; transform: translateY(-10px); }
+        }
+    `;
+    document.head.appendChild(style);
+    
+    // 插入到控制區域後面
+    const controlsRow = document.querySelector('.controls-row');
+    controlsRow.parentNode.insertBefore(messageDiv, controlsRow.nextSibling);
+    
+    // 3秒後自動移除
+    setTimeout(() => {
+        if (messageDiv.parentNode) {
+            messageDiv.remove();
+        }
+        if (style.parentNode) {
+            style.remove();
+        }
+    }, 3000);
+}
+
+// 切換顯示模式（只顯示匹配的書籤）
+function toggleMatchedOnly() {
+    refreshBookmarkView();
+}
+
+/**
+ * 取得書籤頁碼後顯示分割預覽
+ */
+function setupSplitPreview() {
+    const preview = document.getElementById('splitPreview');
+    
+    fetchJsonApi(preview.dataset.pagesUrl)
+        .then(data => {
+            bookmarkPageNumbers = data.pages;
+            preview.hidden = false;
+            updateSplitPreview();
+        })
+        .catch(error => console.error('無法載入分割預覽：', error));
+}
+
+/**
+ * 生成分割檔案名稱（與 pdf_splitter.generate_split_filename 相同）
+ */
+function generateSplitFilename(baseName, startPage, endPage, index) {
+    // 清理檔案名稱，移除可能有問題的字元
+    let safeBaseName = Array.from(baseName).filter(c => /[\p{L}\p{N} _-]/u.test(c)).join('').trim();
+    if (!safeBaseName) {
+        safeBaseName = 'pdf_split';
+    }
+    
+    const part = String(index).padStart(2, '0');
+    if (startPage === endPage) {
+        return `${safeBaseName}_part_${part}_page_${startPage}.pdf`;
+    }
+    return `${safeBaseName}_part_${part}_pages_${startPage}-${endPage}.pdf`;
+}
+
+/**
+ * 計算分割預覽（與 pdf_splitter.get_split_preview 相同的規則）
+ *
+ * @param {number[]} splitPoints 分割點頁碼（1-based）
+ * @param {number} totalPages PDF 總頁數
+ * @param {string} baseName 原始檔案的基本名稱（無副檔名）
+ * @returns {Object} 預覽資訊
+ */
+function calculateSplitPreview(splitPoints, totalPages, baseName) {
+    if (splitPoints.length === 0) {
+        return { success: false, error: '分割點列表不能為空', total_parts: 0, parts: [] };
+    }
+    
+    // 移除重複並排序
+    const points = Array.from(new Set(splitPoints)).sort((a, b) => a - b);
+    for (const point of points) {
+        if (point < 1 || point > totalPages) {
+            return { success: false, error: `分割點 ${point} 超出頁面範圍 (1-${totalPages})`, total_parts: 0, parts: [] };
+        }
+    }
+    
+    // 確保第一頁總是在分割點中
+    if (points[0] !== 1) {
+        points.unshift(1);
+    }
+    
+    const parts = [];
+    points.forEach((startPage, i) => {
+        const endPage = i + 1 < points.length ? points[i + 1] - 1 : totalPages;
+        if (startPage <= endPage) {
+            parts.push({
+                index: i + 1,
+                filename: generateSplitFilename(baseName, startPage, endPage, i + 1),
+                start_page: startPage,
+                end_page: endPage,
+                page_count: endPage - startPage + 1
+            });
+        }
+    });
+    
+    return {
+        success: true,
+        total_parts: parts.length,
+        parts: parts,
+        original_pages: totalPages,
+        split_points: points
+    };
+}
+
+/**
+ * 依目前的選擇更新分割預覽（不需要向伺服器發出請求）
+ */
+function updateSplitPreview() {
+    const preview = document.getElementById('splitPreview');
+    if (!preview || bookmarkPageNumbers === null) {
+        return;
+    }
+    
+    const splitPoints = [];
+    selectedBookmarkIds.forEach(id => {
+        const pageNum = bookmarkPageNumbers[id - 1];
+        if (pageNum) splitPoints.push(pageNum);
+    });
+    
+    const summary = preview.querySelector('.split-preview-summary');
+    const list = preview.querySelector('.split-preview-list');
+    list.replaceChildren();
+    summary.classList.remove('error');
+    
+    if (splitPoints.length === 0) {
+        summary.textContent = '請選擇至少一個書籤作為分割點';
+        return;
+    }
+    
+    const result = calculateSplitPreview(splitPoints, Number(preview.dataset.totalPages), preview.dataset.baseName);
+    if (!result.success) {
+        summary.textContent = result.error;
+        summary.classList.add('error');
+        return;
+    }
+    
+    summary.textContent = `將分割為 ${result.total_parts} 個檔案（共 ${result.original_pages} 頁）`;
+    
+    const fragment = document.createDocumentFragment();
+    result.parts.slice(0, SPLIT_PREVIEW_MAX_ITEMS).forEach(part => {
+        const item = document.createElement('li');
+        const filename = document.createElement('span');
+        filename.textContent = part.filename;
+        const pages = document.createElement('span');
+        pages.className = 'split-preview-pages';
+        pages.textContent = part.page_count === 1
+            ? `第 ${part.start_page} 頁`
+            : `第 ${part.start_page}-${part.end_page} 頁（${part.page_count} 頁）`;
+        item.appendChild(filename);
+        item.appendChild(pages);
+        fragment.appendChild(item);
+    });
+    if (result.total_parts > SPLIT_PREVIEW_MAX_ITEMS) {
+        const more = document.createElement('li');
+        more.textContent = `⋯ 另外 ${result.total_parts - SPLIT_PREVIEW_MAX_ITEMS} 個檔案`;
+        fragment.appendChild(more);
+    }
+    list.appendChild(fragment);
+}
+
+// 更新選擇計數
+function updateSelectionCount() {
+    const selectedCount = selectedBookmarkIds.size;
+    const submitButton = document.querySelector('.bookmark-selection-form button[type="submit"]');
+    
+    if (selectedCount > 0) {
+        submitButton.innerHTML = `<span class="btn-icon">✂️</span>分割 PDF (${selectedCount} 個分割點)`;
+        submitButton.disabled = false;
+    } else {
+        submitButton.innerHTML = '<span class="btn-icon">✂️</span>開始分割 PDF';
+        submitButton.disabled = true;
+    }
+    
+    updateSplitPreview();
+}
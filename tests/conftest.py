@@ -0,0 +1,8 @@
+"""
+測試共用設定：模組位於專案根目錄，測試直接匯入
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,123 @@
+"""
+測試用的 PDF 產生工具
+以指定的物件編號與內容組成 PDF，可以控制間接引用、交叉引用串流與物件串流等結構
+"""
+
+import zlib
+from typing import Dict, Iterable, Optional
+
+PDF_HEADER = b'%PDF-1.5\n%\xe2\xe3\xcf\xd3\n'
+
+def page_objects(total_pages: int, first_page: int = 3, pages_num: int = 2,
+                 count: Optional[bytes] = None, with_contents: bool = True) -> Dict[int, bytes]:
+    """
+    文件目錄（物件 1）、頁面樹根節點與頁面物件
+
+    Args:
+        total_pages: 頁數
+        first_page: 第一個頁面物件的編號（有內容串流時每頁使用兩個編號：頁面與內容串流）
+        pages_num: 頁面樹根節點的編號
+        count: /Count 的值（預設為直接寫入頁數，可傳入例如 b'15 0 R' 的間接引用）
+        with_contents: 是否為每頁加入內容串流
+
+    Returns:
+        Dict: 物件編號 -> 物件內容
+    """
+    objects = {1: b'<< /Type /Catalog /Pages %d 0 R >>' % pages_num}
+    kids = []
+    step = 2 if with_contents else 1
+    for i in range(total_pages):
+        page_num = first_page + i * step
+        kids.append(b'%d 0 R' % page_num)
+        page = b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 200 200]' % pages_num
+        if with_contents:
+            content = b'BT /F1 12 Tf 20 100 Td (Page %d) Tj ET' % (i + 1)
+            objects[page_num + 1] = b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content)
+            page += b' /Contents %d 0 R' % (page_num + 1)
+        objects[page_num] = page + b' >>'
+    objects[pages_num] = b'<< /Type /Pages /Kids [%s] /Count %s >>' % (
+        b' '.join(kids), count if count is not None else str(total_pages).encode('ascii'))
+    return objects
+
+def build_pdf(objects: Dict[int, bytes], root: int = 1) -> bytes:
+    """以傳統交叉引用表組成 PDF（沒有出現的物件編號記錄為 free）"""
+    out = bytearray(PDF_HEADER)
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = len(out)
+        out += b'%d 0 obj\n%s\nendobj\n' % (num, objects[num])
+
+    size = max(objects) + 1
+    xref_offset = len(out)
+    out += b'xref\n0 %d\n' % size
+    for num in range(size):
+        if num in offsets:
+            out += b'%010d 00000 n\r\n' % offsets[num]
+        else:
+            out += b'0000000000 65535 f\r\n'
+    out += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, root, xref_offset)
+    return bytes(out)
+
+def build_pdf_with_xref_stream(objects: Dict[int, bytes], root: int = 1, packed: Iterable[int] = (),
+                               objstm_num: Optional[int] = None, length_num: Optional[int] = None,
+                               compress: bool = True) -> bytes:
+    """
+    以交叉引用串流組成 PDF
+
+    Args:
+        objects: 物件編號 -> 物件內容
+        root: 文件目錄的物件編號
+        packed: 放入物件串流的物件編號
+        objstm_num: 物件串流的編號（預設為最大編號 + 1）
+        length_num: 提供時物件串流的 /Length 寫成指向此編號的間接引用
+        compress: 物件串流與交叉引用串流是否以 FlateDecode 壓縮
+    """
+    packed = sorted(packed)
+    objects = dict(objects)
+    entries = {}
+    if packed:
+        objstm_num = objstm_num or max(objects) + 1
+        header, body = [], bytearray()
+        for index, num in enumerate(packed):
+            header.append(b'%d %d' % (num, len(body)))
+            body += objects.pop(num) + b'\n'
+            entries[num] = (2, objstm_num, index)
+        prefix = b' '.join(header) + b'\n'
+        data = prefix + bytes(body)
+        filter_entry = b''
+        if compress:
+            data = zlib.compress(data)
+            filter_entry = b' /Filter /FlateDecode'
+        length = b'%d 0 R' % length_num if length_num else str(len(data)).encode('ascii')
+        objects[objstm_num] = b'<< /Type /ObjStm /N %d /First %d /Length %s%s >>\nstream\n%s\nendstream' % (
+            len(packed), len(prefix), length, filter_entry, data)
+        if length_num:
+            objects[length_num] = str(len(data)).encode('ascii')
+
+    out = bytearray(PDF_HEADER)
+    for num in sorted(objects):
+        entries[num] = (1, len(out), 0)
+        out += b'%d 0 obj\n%s\nendobj\n' % (num, objects[num])
+
+    xref_num = max(entries) + 1
+    xref_offset = len(out)
+    entries[xref_num] = (1, xref_offset, 0)
+    size = xref_num + 1
+    table = bytearray()
+    for num in range(size):
+        kind, field2, field3 = entries.get(num, (0, 0, 65535 if num == 0 else 0))
+        table += bytes([kind]) + field2.to_bytes(4, 'big') + field3.to_bytes(2, 'big')
+    filter_entry = b''
+    if compress:
+        table = zlib.compress(bytes(table))
+        filter_entry = b' /Filter /FlateDecode'
+    out += b'%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root %d 0 R /Length %d%s >>\nstream\n%s\nendstream\nendobj\n' % (
+        xref_num, size, root, len(table), filter_entry, bytes(table))
+    out += b'startxref\n%d\n%%%%EOF\n' % xref_offset
+    return bytes(out)
+
+def write_pdf(path, data: bytes) -> str:
+    """寫入 PDF 並返回路徑字串"""
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
@@ -0,0 +1,58 @@
+"""
+bookmark_store 測試：書籤資料檔案（BMS2）可以由其他 worker 讀回，其他版本與損壞的檔案被拒絕
+"""
+
+import marshal
+
+import pytest
+
+from bookmark_store import BookmarkStore, BookmarkStoreError, BOOKMARK_STORE_MAGIC, get_bookmark_data_path
+from bookmark_table import BookmarkTable
+
+def sample_result():
+    table = BookmarkTable()
+    chapter = table.append('第一章 總則', 1, 1, None)
+    table.append('第一條', 2, 2, chapter)
+    table.append('無效書籤', None, 1, None)
+    return {'success': True, 'total_pages': 4, 'bookmarks': table, 'matched_bookmarks': []}
+
+def saved_path(tmp_path):
+    path = get_bookmark_data_path(str(tmp_path / 'sample.pdf'))
+    BookmarkStore().save('writer', 'hash', sample_result(), path)
+    return path
+
+def test_round_trip_in_another_store(tmp_path):
+    path = saved_path(tmp_path)
+
+    stored = BookmarkStore().load('reader', 'hash', path)
+    assert stored.data['total_pages'] == 4
+    assert list(stored.table) == list(sample_result()['bookmarks'])
+    assert [bookmark['title'] for bookmark in stored.select([1, 2, 3, 9])] == ['第一章 總則', '第一條']
+
+def test_other_version_is_rejected(tmp_path):
+    path = saved_path(tmp_path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(b'BMS1' + data[len(BOOKMARK_STORE_MAGIC):])
+
+    with pytest.raises(BookmarkStoreError):
+        BookmarkStore().load('reader', 'hash', path)
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: data[:len(data) // 2],
+    lambda data: BOOKMARK_STORE_MAGIC + marshal.dumps(42),
+    lambda data: BOOKMARK_STORE_MAGIC + marshal.dumps({'bookmarks': {'titles': ['a']}}),
+    lambda data: BOOKMARK_STORE_MAGIC + marshal.dumps({'bookmarks': {
+        'titles': ['a', 'b'], 'levels': b'\x01\x00', 'pages': b'', 'parents': b'',
+        'patterns': b'', 'pattern_names': ()}}),
+])
+def test_corrupt_file_is_rejected(tmp_path, corrupt):
+    path = saved_path(tmp_path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(corrupt(data))
+
+    with pytest.raises(BookmarkStoreError):
+        BookmarkStore().load('reader', 'hash', path)
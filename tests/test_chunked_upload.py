@@ -0,0 +1,109 @@
+"""
+chunked_upload 測試：續傳（缺少的範圍）、校驗碼、完成上傳與建立上傳的上限
+"""
+
+import os
+import hashlib
+
+import pytest
+
+import chunked_upload
+from chunked_upload import (
+    ChunkedUpload, ChunkedUploadError, ChunkedUploadNotFoundError, ChunkedUploadLimitError,
+    MIN_CHUNK_SIZE, list_open_uploads
+)
+from upload_stream import UploadRejectedError
+
+CHUNK = MIN_CHUNK_SIZE
+
+def sample_pdf(size: int) -> bytes:
+    """產生 size 位元組、具有 PDF 檔頭與 %%EOF 標記的上傳內容（分段上傳只檢查這兩者）"""
+    head, tail = b'%PDF-1.5\n', b'\n%%EOF\n'
+    return head + os.urandom(size - len(head) - len(tail)) + tail
+
+def chunks_of(data: bytes):
+    for offset in range(0, len(data), CHUNK):
+        yield offset, data[offset:offset + CHUNK]
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    return str(tmp_path)
+
+def test_resume_reports_missing_ranges_and_finalizes(upload_dir, tmp_path):
+    data = sample_pdf(CHUNK * 3 + 1000)
+    upload = ChunkedUpload.create(upload_dir, 'session-a', 'big.pdf', len(data), CHUNK)
+    parts = list(chunks_of(data))
+    assert upload.total_chunks == 4
+
+    # 只上傳第 1 與第 3 個分段，模擬中斷
+    for offset, chunk in (parts[0], parts[2]):
+        upload.write_chunk(offset, chunk, hashlib.sha256(chunk).hexdigest())
+
+    resumed = ChunkedUpload.open(upload_dir, upload.upload_id, 'session-a')
+    status = resumed.status()
+    assert status['missing'] == [(CHUNK, CHUNK * 2), (CHUNK * 3, len(data))]
+    assert status['received_chunks'] == 2
+    with pytest.raises(ChunkedUploadError):
+        resumed.finalize()
+
+    for offset, chunk in (parts[1], parts[3]):
+        resumed.write_chunk(offset, chunk)
+    info = resumed.finalize()
+    assert info == {'sha256': hashlib.sha256(data).hexdigest(), 'file_size': len(data)}
+
+    dest = str(tmp_path / 'final.pdf')
+    resumed.commit(dest)
+    with open(dest, 'rb') as f:
+        assert f.read() == data
+    assert list_open_uploads(upload_dir) == []
+
+def test_checksum_mismatch_is_rejected_and_not_recorded(upload_dir):
+    data = sample_pdf(CHUNK + 100)
+    upload = ChunkedUpload.create(upload_dir, 'session-a', 'a.pdf', len(data), CHUNK)
+    with pytest.raises(ChunkedUploadError):
+        upload.write_chunk(0, data[:CHUNK], hashlib.sha256(b'other').hexdigest())
+    assert upload.status()['received_chunks'] == 0
+
+def test_chunk_length_and_offset_are_validated(upload_dir):
+    data = sample_pdf(CHUNK + 100)
+    upload = ChunkedUpload.create(upload_dir, 'session-a', 'a.pdf', len(data), CHUNK)
+    with pytest.raises(ChunkedUploadError):
+        upload.write_chunk(1, data[:CHUNK])
+    with pytest.raises(ChunkedUploadError):
+        upload.write_chunk(0, data[:CHUNK - 1])
+
+def test_first_chunk_without_pdf_header_is_rejected(upload_dir):
+    upload = ChunkedUpload.create(upload_dir, 'session-a', 'a.pdf', CHUNK, CHUNK)
+    with pytest.raises(UploadRejectedError):
+        upload.write_chunk(0, b'\0' * CHUNK)
+
+def test_other_session_cannot_open_upload(upload_dir):
+    upload = ChunkedUpload.create(upload_dir, 'session-a', 'a.pdf', CHUNK, CHUNK)
+    with pytest.raises(ChunkedUploadNotFoundError):
+        ChunkedUpload.open(upload_dir, upload.upload_id, 'session-b')
+
+def test_data_file_is_not_preallocated(upload_dir):
+    size = 64 * 1024 * 1024
+    upload = ChunkedUpload.create(upload_dir, 'session-a', 'a.pdf', size, CHUNK)
+    stat = os.stat(upload.data_path)
+    assert stat.st_size == size
+    assert stat.st_blocks * 512 < size
+
+def test_open_uploads_per_session_are_capped(upload_dir, monkeypatch):
+    monkeypatch.setattr(chunked_upload, 'MAX_OPEN_UPLOADS_PER_SESSION', 2)
+    first = ChunkedUpload.create(upload_dir, 'session-a', 'a.pdf', CHUNK, CHUNK)
+    ChunkedUpload.create(upload_dir, 'session-a', 'b.pdf', CHUNK, CHUNK)
+    with pytest.raises(ChunkedUploadLimitError):
+        ChunkedUpload.create(upload_dir, 'session-a', 'c.pdf', CHUNK, CHUNK)
+
+    # 其他會話不受影響；放棄一個上傳後可以再建立
+    ChunkedUpload.create(upload_dir, 'session-b', 'a.pdf', CHUNK, CHUNK)
+    first.discard()
+    ChunkedUpload.create(upload_dir, 'session-a', 'c.pdf', CHUNK, CHUNK)
+
+def test_total_reserved_bytes_are_capped(upload_dir, monkeypatch):
+    monkeypatch.setattr(chunked_upload, 'MAX_RESERVED_BYTES', CHUNK * 3)
+    ChunkedUpload.create(upload_dir, 'session-a', 'a.pdf', CHUNK * 2, CHUNK)
+    with pytest.raises(ChunkedUploadLimitError):
+        ChunkedUpload.create(upload_dir, 'session-b', 'b.pdf', CHUNK * 2, CHUNK)
+    assert len(list_open_uploads(upload_dir)) == 1
@@ -0,0 +1,77 @@
+"""
+file_cleanup 測試：過期索引、保留時間重設，以及去重上傳檔案的引用計數釋放
+"""
+
+import os
+import time
+
+import file_cleanup
+from file_cleanup import FileTracker, cleanup_expired_files
+
+def make_file(tmp_path, name='upload.pdf'):
+    path = tmp_path / name
+    path.write_bytes(b'%PDF-1.4\n%%EOF\n')
+    return str(path)
+
+def test_expired_files_in_deadline_order(tmp_path):
+    tracker = FileTracker()
+    now = time.time()
+    late = tracker.register_file(make_file(tmp_path, 'late.pdf'), 'a', max_age_minutes=10)
+    early = tracker.register_file(make_file(tmp_path, 'early.pdf'), 'b', max_age_minutes=1)
+    dropped = tracker.register_file(make_file(tmp_path, 'dropped.pdf'), 'b', max_age_minutes=1)
+    tracker.unregister_file(dropped)
+
+    assert tracker.get_expired_files(now) == []
+    assert [item['id'] for item in tracker.get_expired_files(now + 5 * 60)] == [early]
+    assert [item['id'] for item in tracker.get_expired_files(now + 11 * 60)] == [early, late]
+    # 取出的過期項目留在堆積中，清理失敗時下次仍會取出
+    assert tracker.get_stats(now + 11 * 60)['expired_count'] == 2
+
+def test_acquire_refreshes_expiry(tmp_path):
+    tracker = FileTracker()
+    path = make_file(tmp_path)
+    now = time.time()
+    file_id = tracker.acquire_file(path, 'session', max_age_minutes=1)
+    assert tracker.acquire_file(path, 'session', max_age_minutes=10) == file_id
+
+    assert tracker.get_expired_files(now + 5 * 60) == []
+    assert [item['id'] for item in tracker.get_expired_files(now + 11 * 60)] == [file_id]
+    assert tracker.get_stats()['total_files'] == 1
+
+def test_expiry_heap_is_compacted(tmp_path):
+    tracker = FileTracker()
+    path = make_file(tmp_path)
+    for _ in range(1000):
+        tracker.acquire_file(path, 'session')
+    assert tracker.get_stats()['expiry_heap_size'] <= FileTracker.HEAP_COMPACT_MIN_SIZE + 1
+
+def test_shared_file_removed_after_last_context(tmp_path):
+    tracker = FileTracker()
+    path = make_file(tmp_path)
+    tracker.acquire_file(path, 'first')
+    tracker.acquire_file(path, 'second')
+    assert tracker.get_stats()['shared_files'] == 1
+
+    assert tracker.cleanup_by_context('first') == [path]
+    assert os.path.exists(path)
+    assert tracker.get_stats()['shared_files'] == 0
+    assert tracker.get_stats()['contexts'] == ['second']
+
+    assert tracker.cleanup_by_context('second') == [path]
+    assert not os.path.exists(path)
+    assert tracker.get_stats()['total_files'] == 0
+
+def test_expired_reference_releases_only_its_share(tmp_path, monkeypatch):
+    tracker = FileTracker()
+    monkeypatch.setattr(file_cleanup, '_global_tracker', tracker)
+    path = make_file(tmp_path)
+    tracker.acquire_file(path, 'expired', max_age_minutes=-1)
+    kept = tracker.acquire_file(path, 'active', max_age_minutes=60)
+
+    assert cleanup_expired_files() == 1
+    assert os.path.exists(path)
+    assert tracker.get_stats()['contexts'] == ['active']
+
+    assert tracker.release_file(kept)
+    assert not os.path.exists(path)
+    assert cleanup_expired_files() == 0
@@ -0,0 +1,46 @@
+"""
+memory_tier 測試：預留與記憶體檔案共用同一個預算，拒絕、刪除與取代時正確釋放
+"""
+
+import pytest
+
+from memory_tier import MemoryTier
+
+@pytest.fixture
+def tier():
+    return MemoryTier(budget_bytes=100, max_file_bytes=40)
+
+def used(tier: MemoryTier) -> int:
+    return tier._used_bytes
+
+def test_reserve_within_limits(tier):
+    assert tier.reserve(40)
+    assert tier.reserve(40)
+    assert not tier.reserve(41)
+    assert not tier.reserve(30)
+    assert used(tier) == 80
+
+    tier.release(40)
+    assert tier.reserve(20)
+    assert used(tier) == 60
+    assert tier.get_stats()['spilled'] == 2
+
+def test_put_converts_reservation(tier):
+    assert tier.reserve(40)
+    assert tier.put('/upload/a.pdf', b'x' * 30, reserved=40)
+    assert used(tier) == 30
+    assert tier.get('/upload/a.pdf') == b'x' * 30
+
+    assert tier.put('/upload/a.pdf', b'y' * 10)
+    assert used(tier) == 10
+
+    assert tier.discard('/upload/a.pdf')
+    assert not tier.discard('/upload/a.pdf')
+    assert used(tier) == 0
+
+def test_rejected_put_releases_reservation(tier):
+    assert tier.reserve(40)
+    assert tier.reserve(40)
+    assert not tier.put('/upload/big.pdf', b'x' * 41, reserved=40)
+    assert tier.get('/upload/big.pdf') is None
+    assert used(tier) == 40
@@ -0,0 +1,34 @@
+"""
+part_cache 測試：檔案雜湊記錄有數量上限，檔案修改後重新計算
+"""
+
+import hashlib
+import os
+
+import part_cache
+from part_cache import compute_file_hash
+
+def test_file_hash_records_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(part_cache, 'FILE_HASH_CACHE_ENTRIES', 3)
+    part_cache._file_hashes.clear()
+    part_cache._file_hash_paths.clear()
+
+    paths = []
+    for i in range(5):
+        path = tmp_path / f'{i}.bin'
+        path.write_bytes(b'data %d' % i)
+        paths.append(str(path))
+        assert compute_file_hash(str(path)) == hashlib.sha256(b'data %d' % i).hexdigest()
+
+    assert len(part_cache._file_hashes) == 3
+    assert set(part_cache._file_hash_paths) == {os.path.realpath(p) for p in paths[2:]}
+
+def test_modified_file_replaces_its_record(tmp_path):
+    path = tmp_path / 'source.bin'
+    path.write_bytes(b'first')
+    assert compute_file_hash(str(path)) == hashlib.sha256(b'first').hexdigest()
+
+    path.write_bytes(b'second version')
+    assert compute_file_hash(str(path)) == hashlib.sha256(b'second version').hexdigest()
+    assert [key for key in part_cache._file_hashes if key[0] == os.path.realpath(path)] == [
+        part_cache._file_hash_paths[os.path.realpath(path)]]
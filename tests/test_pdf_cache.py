@@ -0,0 +1,46 @@
+"""
+pdf_cache 測試：已解析串流物件的資料計入記憶體估算，超過預算時淘汰最久未使用的讀取器
+"""
+
+from pdf_cache import ReaderCache
+from pdf_samples import page_objects, build_pdf, write_pdf
+
+CONTENT_BYTES = 512 * 1024
+
+def large_pdf(tmp_path, name: str, total_pages: int = 4) -> str:
+    """每頁的內容串流約 CONTENT_BYTES 位元組"""
+    objects = page_objects(total_pages)
+    for num in range(4, 4 + total_pages * 2, 2):
+        content = b'0 0 m 10 10 l S\n' * (CONTENT_BYTES // 16)
+        objects[num] = b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content)
+    return write_pdf(tmp_path / name, build_pdf(objects))
+
+def touch_contents(reader):
+    for page in reader.pages:
+        page['/Contents'].get_object().get_data()
+
+def test_estimate_counts_stream_data(tmp_path):
+    cache = ReaderCache(max_memory_mb=64)
+    path = large_pdf(tmp_path, 'a.pdf')
+    with cache.acquire(path) as reader:
+        touch_contents(reader)
+    assert cache.get_stats()['estimated_memory_mb'] >= 4 * CONTENT_BYTES / 1024 / 1024
+
+def test_readers_over_budget_are_evicted(tmp_path):
+    cache = ReaderCache(max_memory_mb=3)
+    first = large_pdf(tmp_path, 'first.pdf')
+    second = large_pdf(tmp_path, 'second.pdf')
+
+    with cache.acquire(first) as reader:
+        touch_contents(reader)
+    with cache.acquire(second) as reader:
+        touch_contents(reader)
+
+    stats = cache.get_stats()
+    assert stats['entries'] == 1
+    assert stats['evictions'] == 1
+
+    # 最近使用的讀取器仍在快取中
+    with cache.acquire(second):
+        pass
+    assert cache.get_stats()['hits'] == 1
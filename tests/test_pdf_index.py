@@ -0,0 +1,83 @@
+"""
+pdf_index 測試：索引檔案可以來回讀寫，其他版本、來源已改變與損壞的索引檔案都不會被使用
+"""
+
+import os
+import struct
+
+import pytest
+from PyPDF2 import PdfReader
+
+import pdf_index
+from pdf_index import (PdfIndex, PdfIndexError, INDEX_VERSION, build_pdf_index, load_pdf_index,
+                       get_index_path)
+from bookmark_table import BookmarkTable
+from pdf_samples import page_objects, build_pdf, write_pdf
+
+def sample_outline() -> BookmarkTable:
+    outline = BookmarkTable()
+    chapter = outline.append('第一章', 1, 1, None)
+    outline.append('1.1 節', 2, 2, chapter)
+    outline.append('附錄', None, 1, None)
+    return outline
+
+def indexed_pdf(tmp_path, bookmarks=None):
+    path = write_pdf(tmp_path / 'sample.pdf', build_pdf(page_objects(6)))
+    index = build_pdf_index(path, PdfReader(path), bookmarks, outline_errors=1, named_resolved=2)
+    assert index is not None
+    # 清除記憶體中的索引，強制由索引檔案讀取
+    pdf_index._index_cache.clear()
+    return path
+
+def test_index_file_round_trip(tmp_path):
+    path = indexed_pdf(tmp_path, sample_outline())
+    assert os.path.exists(get_index_path(path))
+
+    index = load_pdf_index(path)
+    assert index is not None
+    assert index.total_pages == 6
+    assert index.has_outline
+    assert index.outline_errors == 1
+    assert index.named_resolved == 2
+    assert list(index.outline) == list(sample_outline())
+
+def test_index_without_outline(tmp_path):
+    path = indexed_pdf(tmp_path)
+    index = load_pdf_index(path)
+    assert index is not None
+    assert not index.has_outline
+    assert len(index.outline) == 0
+
+def test_other_version_is_ignored(tmp_path):
+    path = indexed_pdf(tmp_path, sample_outline())
+    index_path = get_index_path(path)
+    with open(index_path, 'r+b') as f:
+        f.seek(6)
+        f.write(struct.pack('<H', INDEX_VERSION - 1))
+    assert load_pdf_index(path) is None
+
+def test_changed_source_is_ignored(tmp_path):
+    path = indexed_pdf(tmp_path, sample_outline())
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_pdf_index(path) is None
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: b'NOTIDX' + data[6:],
+    lambda data: data[:20],
+    lambda data: data[:-3],
+    lambda data: data + b'\0',
+])
+def test_corrupt_index_is_rejected(tmp_path, corrupt):
+    path = indexed_pdf(tmp_path, sample_outline())
+    index_path = get_index_path(path)
+    with open(index_path, 'rb') as f:
+        data = f.read()
+    stat = os.stat(path)
+
+    with pytest.raises(PdfIndexError):
+        PdfIndex.from_bytes(corrupt(data), stat.st_size, stat.st_mtime_ns)
+
+    with open(index_path, 'wb') as f:
+        f.write(corrupt(data))
+    assert load_pdf_index(path) is None
@@ -0,0 +1,63 @@
+"""
+pdf_probe 測試：快速探測的頁數必須與 PyPDF2 完整解析的結果相同
+"""
+
+import zlib
+
+import pytest
+from PyPDF2 import PdfReader
+
+from pdf_probe import probe_pdf, PdfProbe, PdfProbeError
+from pdf_samples import page_objects, build_pdf, build_pdf_with_xref_stream, write_pdf
+
+def assert_probe_matches_pypdf2(path: str, expected_pages: int):
+    assert len(PdfReader(path).pages) == expected_pages
+    assert probe_pdf(path)['total_pages'] == expected_pages
+
+def test_direct_count(tmp_path):
+    path = write_pdf(tmp_path / 'direct.pdf', build_pdf(page_objects(12)))
+    assert_probe_matches_pypdf2(path, 12)
+
+def test_indirect_count_with_multi_digit_object_number(tmp_path):
+    # /Count 15 0 R：之前的模式回溯成 /Count 1
+    objects = page_objects(12, count=b'15 0 R', with_contents=False)
+    objects[15] = b'12'
+    path = write_pdf(tmp_path / 'indirect_count.pdf', build_pdf(objects))
+    assert_probe_matches_pypdf2(path, 12)
+
+def test_indirect_count_in_object_stream(tmp_path):
+    objects = page_objects(7, count=b'40 0 R')
+    objects[40] = b'7'
+    data = build_pdf_with_xref_stream(objects, packed=[1, 2, 40])
+    path = write_pdf(tmp_path / 'objstm_count.pdf', data)
+    assert_probe_matches_pypdf2(path, 7)
+
+def test_object_stream_with_indirect_multi_digit_length(tmp_path):
+    # 物件串流的 /Length 123 0 R：之前的模式回溯成 /Length 12，截斷壓縮資料
+    objects = page_objects(9)
+    data = build_pdf_with_xref_stream(objects, packed=[1, 2], length_num=123)
+    path = write_pdf(tmp_path / 'indirect_length.pdf', data)
+    assert_probe_matches_pypdf2(path, 9)
+
+def test_uncompressed_xref_stream(tmp_path):
+    data = build_pdf_with_xref_stream(page_objects(4), packed=[2], compress=False)
+    path = write_pdf(tmp_path / 'plain_xref_stream.pdf', data)
+    assert_probe_matches_pypdf2(path, 4)
+
+def test_non_integer_indirect_count_is_rejected(tmp_path):
+    objects = page_objects(3, count=b'20 0 R')
+    objects[20] = b'(three)'
+    path = write_pdf(tmp_path / 'bad_count.pdf', build_pdf(objects))
+    with pytest.raises(PdfProbeError):
+        probe_pdf(path)
+
+def test_truncated_flate_stream_is_rejected():
+    probe = PdfProbe(b'')
+    compressed = zlib.compress(b'1 0 2 10 ' * 50)
+    with pytest.raises(PdfProbeError):
+        probe._decode_stream(b'<< /Filter /FlateDecode >>', compressed[:len(compressed) // 2])
+
+def test_missing_header_is_rejected(tmp_path):
+    path = write_pdf(tmp_path / 'junk.pdf', b'not a pdf' * 100)
+    with pytest.raises(PdfProbeError):
+        probe_pdf(path)
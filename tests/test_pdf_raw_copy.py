@@ -0,0 +1,88 @@
+"""
+pdf_raw_copy 測試：原始物件複製引擎輸出的分割檔案可以重新開啟、頁數正確，
+字串中的引用不會被追蹤，指向未複製物件的引用改寫為 null
+"""
+
+import pytest
+from PyPDF2 import PdfReader
+from PyPDF2.generic import IndirectObject, DictionaryObject, ArrayObject, NullObject
+
+from pdf_raw_copy import RawObjectCopier, _scan_references
+from pdf_splitter import split_pdf
+from pdf_samples import page_objects, build_pdf, build_pdf_with_xref_stream, write_pdf
+
+TOTAL_PAGES = 6
+LAST_PAGE_NUM = 3 + (TOTAL_PAGES - 1) * 2
+
+def linked_objects():
+    """第一頁的連結註解指向最後一頁，字串與註解中含有看似引用的文字"""
+    objects = page_objects(TOTAL_PAGES)
+    objects[3] = objects[3][:-2] + b' /Annots [50 0 R] >>'
+    objects[50] = (b'<< /Type /Annot /Subtype /Link /Rect [0 0 10 10] /Dest [%d 0 R /Fit]\n'
+                   b'/Contents (see 60 0 R \\) and (nested 61 0 R)) /NM <3632203020> %% 62 0 R\n'
+                   b'>>' % LAST_PAGE_NUM)
+    for num in (60, 61, 62):
+        data = b'x' * 1000
+        objects[num] = b'<< /Length %d >>\nstream\n%s\nendstream' % (len(data), data)
+    return objects
+
+def dangling_references(path: str):
+    """從 trailer 出發走訪所有引用，返回不存在於交叉引用中的物件編號"""
+    reader = PdfReader(path)
+    existing = set(reader.xref_objStm)
+    for entries in reader.xref.values():
+        existing.update(entries)
+
+    dangling, seen = set(), set()
+    stack = list(reader.trailer.values())
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, IndirectObject):
+            if obj.idnum not in existing:
+                dangling.add(obj.idnum)
+            elif obj.idnum not in seen:
+                seen.add(obj.idnum)
+                stack.append(obj.get_object())
+        elif isinstance(obj, DictionaryObject):
+            stack.extend(obj.values())
+        elif isinstance(obj, ArrayObject):
+            stack.extend(obj)
+    return dangling
+
+def test_scan_skips_strings_and_comments():
+    data = b'<< /A 5 0 R /S (x 6 0 R \\( (7 0 R)) /H <3820> % 9 0 R\n/K [10 0 R 11 0 R] /F12 0 R >>'
+    assert [num for _, _, num in _scan_references(data, 0, len(data))] == [5, 10, 11]
+
+@pytest.mark.parametrize('packed', [(), (50,)])
+def test_copied_part_has_no_dangling_references(tmp_path, packed):
+    objects = linked_objects()
+    if packed:
+        data = build_pdf_with_xref_stream(objects, packed=packed)
+    else:
+        data = build_pdf(objects)
+    path = write_pdf(tmp_path / 'linked.pdf', data)
+
+    output_path = str(tmp_path / 'part.pdf')
+    with RawObjectCopier(path, PdfReader(path)) as copier:
+        copier.write_pages([0, 1, 2], output_path)
+
+    with open(output_path, 'rb') as f:
+        output = f.read()
+    for num in (60, 61, 62):
+        assert b'\n%d 0 obj' % num not in output
+    assert dangling_references(output_path) == set()
+
+    reader = PdfReader(output_path)
+    assert len(reader.pages) == 3
+    annot = reader.pages[0]['/Annots'][0].get_object()
+    assert isinstance(annot['/Dest'][0], NullObject)
+    assert annot['/Contents'] == 'see 60 0 R ) and (nested 61 0 R)'
+
+def test_raw_split_parts_reopen_with_page_counts(tmp_path):
+    path = write_pdf(tmp_path / 'linked.pdf', build_pdf(linked_objects()))
+    result = split_pdf(path, [1, 3, 6], output_dir=str(tmp_path / 'parts'), engine='raw')
+
+    assert [part['page_count'] for part in result['split_files']] == [2, 3, 1]
+    for part in result['split_files']:
+        assert len(PdfReader(part['filepath']).pages) == part['page_count']
+        assert dangling_references(part['filepath']) == set()
@@ -0,0 +1,46 @@
+"""
+pdf_splitter 測試：並行分割共用同一個進程池，輸出的分割檔案頁數正確，停止要求在分割段中途生效
+"""
+
+import pytest
+from PyPDF2 import PdfReader
+
+import pdf_splitter
+from pdf_splitter import split_pdf, get_split_process_pool, PARALLEL_MIN_PAGES, SplitCancelledError
+from pdf_samples import page_objects, build_pdf, write_pdf
+
+def test_parallel_split_reuses_shared_process_pool(tmp_path):
+    total_pages = PARALLEL_MIN_PAGES + 10
+    path = write_pdf(tmp_path / 'long.pdf', build_pdf(page_objects(total_pages)))
+    split_points = [1, 11, 21, 31, 41]
+
+    first = split_pdf(path, split_points, output_dir=str(tmp_path / 'first'), parallel=True, max_workers=2)
+    pool, workers = get_split_process_pool()
+    second = split_pdf(path, split_points, output_dir=str(tmp_path / 'second'), parallel=True, max_workers=2)
+
+    assert get_split_process_pool() == (pool, workers)
+    assert pool._mp_context.get_start_method() != 'fork'
+    for result in (first, second):
+        assert [part['page_count'] for part in result['split_files']] == [10, 10, 10, 10, total_pages - 40]
+        for part in result['split_files']:
+            assert len(PdfReader(part['filepath']).pages) == part['page_count']
+
+def test_discarded_pool_is_recreated():
+    pool, _ = get_split_process_pool()
+    pdf_splitter._discard_split_process_pool(pool)
+    assert get_split_process_pool()[0] is not pool
+
+@pytest.mark.parametrize('engine', ['pypdf', 'raw'])
+def test_should_stop_is_checked_within_a_segment(tmp_path, engine):
+    path = write_pdf(tmp_path / 'single.pdf', build_pdf(page_objects(20)))
+    calls = []
+
+    def should_stop():
+        calls.append(1)
+        return len(calls) > 1
+
+    with pytest.raises(SplitCancelledError):
+        split_pdf(path, [1], output_dir=str(tmp_path / 'parts'), engine=engine, should_stop=should_stop,
+                  private_reader=True)
+    # 唯一的分割段在開始前通過檢查，之後在處理頁面時停止
+    assert len(calls) == 2
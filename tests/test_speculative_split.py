@@ -0,0 +1,92 @@
+"""
+speculative_split 測試：完成的推測分割可重複使用，取消與 CPU 預算會停止推測分割，
+推測分割不佔用共用讀取器的鎖
+"""
+
+import threading
+
+import pytest
+
+import part_cache
+from part_cache import PartCache
+from pdf_cache import acquire_pdf_reader
+from speculative_split import SpeculativeSplitter, SPECULATION_DONE, SPECULATION_CANCELLED
+from pdf_samples import page_objects, build_pdf, write_pdf
+
+SPLIT_POINTS = [1, 5, 9]
+
+@pytest.fixture(autouse=True)
+def isolated_part_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(part_cache, '_global_part_cache', PartCache(cache_dir=str(tmp_path / 'cache')))
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    return write_pdf(tmp_path / 'source.pdf', build_pdf(page_objects(12)))
+
+def blocked_splitter(**kwargs):
+    """唯一的工作線程被佔用，之後提交的推測分割停留在排隊狀態"""
+    splitter = SpeculativeSplitter(max_workers=1, **kwargs)
+    release = threading.Event()
+    splitter._executor.submit(release.wait)
+    return splitter, release
+
+def wait_finished(splitter: SpeculativeSplitter, session_id: str):
+    """等待推測分割自行結束（settle 會要求仍在執行的推測分割停止）"""
+    assert splitter._tasks[session_id]['finished_event'].wait(10)
+
+def test_completed_speculation_is_reused(pdf_path):
+    splitter = SpeculativeSplitter()
+    assert splitter.start('session', pdf_path, SPLIT_POINTS, 'pypdf')
+    wait_finished(splitter, 'session')
+
+    result = splitter.settle('session', list(reversed(SPLIT_POINTS)))
+    assert result['state'] == SPECULATION_DONE
+    assert result['matched']
+    assert result['total_parts'] == 3
+    assert part_cache.get_part_cache().get_stats()['entries'] == 3
+    assert splitter.get_stats()['reused'] == 1
+
+def test_cancel_queued_speculation(pdf_path):
+    splitter, release = blocked_splitter()
+    assert splitter.start('session', pdf_path, SPLIT_POINTS, 'pypdf')
+    assert splitter.get_stats()['active'] == 1
+
+    assert splitter.cancel('session')
+    assert not splitter.cancel('session')
+    assert splitter.settle('session', SPLIT_POINTS) is None
+    release.set()
+    splitter._executor.shutdown(wait=True)
+
+    stats = splitter.get_stats()
+    assert stats['cancelled'] == 1
+    assert stats['active'] == 0
+    assert part_cache.get_part_cache().get_stats()['entries'] == 0
+
+def test_settle_reports_queued_speculation_as_cancelled(pdf_path):
+    splitter, release = blocked_splitter()
+    splitter.start('session', pdf_path, SPLIT_POINTS, 'pypdf')
+
+    result = splitter.settle('session', [1, 6], timeout=1)
+    release.set()
+    assert result['state'] == SPECULATION_CANCELLED
+    assert result['stop_reason'] == 'cancelled'
+    assert not result['matched']
+
+def test_cpu_budget_stops_speculation(pdf_path):
+    splitter = SpeculativeSplitter(cpu_budget_seconds=-1)
+    splitter.start('session', pdf_path, SPLIT_POINTS, 'pypdf')
+    wait_finished(splitter, 'session')
+
+    result = splitter.settle('session', SPLIT_POINTS)
+    assert result['state'] == SPECULATION_CANCELLED
+    assert result['stop_reason'] == 'cpu_budget'
+    assert splitter.get_stats()['over_budget'] == 1
+
+def test_speculation_does_not_wait_for_shared_reader(pdf_path):
+    splitter = SpeculativeSplitter()
+    with acquire_pdf_reader(pdf_path):
+        # 正式分割持有同一文件的共用讀取器時，推測分割仍可以完成
+        splitter.start('session', pdf_path, SPLIT_POINTS, 'pypdf')
+        wait_finished(splitter, 'session')
+    result = splitter.settle('session', SPLIT_POINTS)
+    assert result['state'] == SPECULATION_DONE
@@ -0,0 +1,58 @@
+"""
+上傳串流測試：完整的上傳改名到最終位置，中途停止的上傳不留下臨時檔案也不佔用記憶體層預算
+"""
+
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import encode_multipart
+
+import app as app_module
+from upload_stream import UPLOAD_TEMP_PREFIX, UPLOAD_TEMP_SUFFIX
+from memory_tier import memory_file_limit, get_memory_tier_stats
+from pdf_samples import page_objects, build_pdf
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+def pdf_payload(size: int) -> bytes:
+    return b'%PDF-1.4\n' + os.urandom(size) + b'\n%%EOF\n'
+
+def post_upload(client, payload: bytes, truncate: bool = False):
+    """以 multipart 上傳，truncate 時請求內容在檔案部分中途結束（沒有結束邊界）"""
+    boundary, body = encode_multipart({'file': FileStorage(io.BytesIO(payload), 'upload.pdf')})
+    sent = body[:len(body) // 2] if truncate else body
+    return client.post('/upload', input_stream=io.BytesIO(sent),
+                       content_type=f'multipart/form-data; boundary={boundary}')
+
+def temp_files():
+    return [name for name in os.listdir(app_module.UPLOAD_FOLDER)
+            if name.startswith(UPLOAD_TEMP_PREFIX) and name.endswith(UPLOAD_TEMP_SUFFIX)]
+
+def test_complete_upload_is_committed(client):
+    payload = build_pdf(page_objects(3))
+    response = post_upload(client, payload)
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/upload-success')
+
+    with client.session_transaction() as session:
+        uploaded = session['uploaded_file']
+    assert uploaded['file_size'] == len(payload)
+    assert temp_files() == []
+
+def test_aborted_upload_leaves_no_temp_file(client):
+    # 送出的內容超過記憶體層的單檔上限，寫入上傳目錄的臨時檔案
+    response = post_upload(client, pdf_payload(2 * memory_file_limit() + 1024 * 1024), truncate=True)
+    assert response.status_code == 302
+    assert temp_files() == []
+
+def test_aborted_upload_releases_memory_reservation(client):
+    used_mb = get_memory_tier_stats()['used_mb']
+    for _ in range(3):
+        # 送出的內容在記憶體層的單檔上限內，依請求大小預留記憶體
+        response = post_upload(client, pdf_payload(2 * 1024 * 1024), truncate=True)
+        assert response.status_code == 302
+    assert get_memory_tier_stats()['used_mb'] == used_mb
@@ -0,0 +1,193 @@
+"""
+上傳串流模組
+上傳的檔案內容在接收時直接寫入上傳目錄的臨時檔案，同時計算 sha256 並檢查 PDF 檔頭與結尾標記，
+接收完成後以改名放到最終位置，不需要再複製一次
+
+小型上傳（Content-Length 不超過記憶體層門檻且預算足夠）在記憶體中接收，完成後成為記憶體檔案，
+不寫入磁碟
+"""
+
+import io
+import os
+import uuid
+import hashlib
+import logging
+from typing import Dict, Any, Optional
+
+from memory_tier import reserve_memory, release_memory, put_memory_file
+
+# 配置日誌記錄
+logger = logging.getLogger(__name__)
+
+# PDF 檔頭必須出現在檔案開頭的 1024 位元組內，結尾標記必須出現在最後 1024 位元組內
+PDF_HEADER = b'%PDF-'
+PDF_EOF_MARKER = b'%%EOF'
+HEADER_SEARCH_BYTES = 1024
+TRAILER_SEARCH_BYTES = 1024
+
+# 接收中的臨時檔案名稱前綴與副檔名（清理時可辨識）
+UPLOAD_TEMP_PREFIX = '.upload-'
+UPLOAD_TEMP_SUFFIX = '.part'
+
+class UploadRejectedError(Exception):
+    """上傳內容不是 PDF"""
+    pass
+
+class PdfUploadStream:
+    """
+    上傳檔案的串流容器 - 作為 Werkzeug 表單解析器的檔案串流使用
+
+    write() 在寫入臨時檔案的同時更新 sha256、檢查檔頭並保留最後的位元組以檢查結尾標記；
+    檔頭不正確時立即拋出 UploadRejectedError，表單解析隨即停止，不再接收剩下的內容。
+
+    提供 content_length 且記憶體層可以預留時改寫入記憶體緩衝區，內容超過預留大小時轉存到臨時檔案。
+    """
+
+    def __init__(self, upload_dir: str, content_length: Optional[int] = None):
+        self.temp_path = os.path.join(upload_dir, f"{UPLOAD_TEMP_PREFIX}{uuid.uuid4().hex}{UPLOAD_TEMP_SUFFIX}")
+        self._reserved = 0
+        if content_length is not None and reserve_memory(content_length):
+            self._reserved = content_length
+            self._file = io.BytesIO()
+        else:
+            self._file = open(self.temp_path, 'w+b')
+        self._hasher = hashlib.sha256()
+        self._head = b''
+        self._tail = b''
+        self._size = 0
+        self._header_checked = False
+        self._committed = False
+
+    def write(self, data: bytes) -> int:
+        """寫入一段上傳內容"""
+        if not self._header_checked:
+            self._head += data[:HEADER_SEARCH_BYTES]
+            if PDF_HEADER in self._head[:HEADER_SEARCH_BYTES]:
+                self._header_checked = True
+            elif len(self._head) >= HEADER_SEARCH_BYTES:
+                self.discard()
+                raise UploadRejectedError("檔案開頭沒有 PDF 檔頭")
+
+        self._hasher.update(data)
+        self._tail = (self._tail + data)[-TRAILER_SEARCH_BYTES:]
+        self._size += len(data)
+        if self._reserved and self._size > self._reserved:
+            self._spill()
+        return self._file.write(data)
+
+    @property
+    def in_memory(self) -> bool:
+        """內容是否保存在記憶體緩衝區"""
+        return self._reserved > 0
+
+    def _spill(self):
+        """將記憶體緩衝區的內容轉存到臨時檔案並釋放預留的記憶體"""
+        buffer = self._file
+        self._file = open(self.temp_path, 'w+b')
+        self._file.write(buffer.getbuffer())
+        buffer.close()
+        release_memory(self._reserved)
+        self._reserved = 0
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        完成接收並檢查檔案
+
+        Returns:
+            Dict: 檔案資訊（sha256 與大小）
+
+        Raises:
+            UploadRejectedError: 檔頭或結尾標記不正確（臨時檔案會被刪除）
+        """
+        if not self._header_checked and PDF_HEADER not in self._head:
+            self.discard()
+            raise UploadRejectedError("檔案開頭沒有 PDF 檔頭")
+        if PDF_EOF_MARKER not in self._tail:
+            self.discard()
+            raise UploadRejectedError("檔案結尾沒有 %%EOF 標記，上傳可能不完整")
+
+        self._file.flush()
+        return {'sha256': self._hasher.hexdigest(), 'file_size': self._size}
+
+    def commit(self, dest_path: str):
+        """
+        將臨時檔案改名為最終路徑（同一檔案系統內，不複製內容）；記憶體緩衝區則以最終路徑保存為記憶體檔案
+
+        Args:
+            dest_path: 最終檔案路徑（必須與上傳目錄位於同一檔案系統）
+        """
+        if self.in_memory:
+            reserved, self._reserved = self._reserved, 0
+            if put_memory_file(dest_path, self._file.getvalue(), reserved):
+                self._file.close()
+                self._committed = True
+                return
+            # 記憶體層拒絕（預留已釋放）：改寫入磁碟
+            buffer = self._file
+            self._file = open(self.temp_path, 'w+b')
+            self._file.write(buffer.getbuffer())
+            buffer.close()
+
+        self._file.close()
+        os.replace(self.temp_path, dest_path)
+        self._committed = True
+
+    def discard(self):
+        """放棄上傳內容並刪除臨時檔案"""
+        if self._committed:
+            return
+        self._file.close()
+        if self.in_memory:
+            release_memory(self._reserved)
+            self._reserved = 0
+        else:
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+        self._committed = True
+
+    def close(self):
+        """請求結束時由 Werkzeug 呼叫：沒有改名到最終位置的臨時檔案一律刪除"""
+        self.discard()
+
+    # Werkzeug 與 FileStorage 使用的檔案介面
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+def open_upload_stream(upload_dir: str, filename: Optional[str] = None,
+                       content_length: Optional[int] = None) -> PdfUploadStream:
+    """
+    建立上傳串流容器
+
+    Args:
+        upload_dir: 上傳目錄
+        filename: 用戶端提供的檔案名稱（僅用於日誌）
+        content_length: 上傳內容大小的上限（例如整個請求的 Content-Length），用於決定是否在記憶體中接收
+
+    Returns:
+        PdfUploadStream: 串流容器
+    """
+    stream = PdfUploadStream(upload_dir, content_length)
+    logger.debug(f"開始接收上傳檔案: {filename} -> {'記憶體' if stream.in_memory else stream.temp_path}")
+    return stream
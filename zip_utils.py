@@ -5,20 +5,339 @@ ZIP 壓縮工具模組
 
 import os
 import time
+import zlib
 import zipfile
 import tempfile
 import logging
-from typing import List, Dict, Any, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Set, Tuple, IO
 from pathlib import Path
 
+from memory_tier import is_memory_file, open_source, source_exists, source_size
+
 # 配置日誌記錄
 logger = logging.getLogger(__name__)
 
+# 串流 ZIP 時每次讀取的區塊大小
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# 並行壓縮的工作線程數量（zlib 壓縮時會釋放 GIL），設為 1 時逐一壓縮
+DEFAULT_COMPRESS_WORKERS = int(os.environ.get('ZIP_COMPRESS_WORKERS', os.cpu_count() or 1))
+
+# 並行壓縮結果超過此大小時暫存到磁碟，避免大型分割檔案佔用過多記憶體
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+# 壓縮策略
+COMPRESSION_AUTO = 'auto'    # 依取樣結果逐檔選擇儲存或壓縮
+COMPRESSION_STORE = 'store'  # 不壓縮
+COMPRESSION_FAST = 'fast'    # deflate 等級 1
+COMPRESSION_MAX = 'max'      # deflate 等級 9
+COMPRESSION_MODES = (COMPRESSION_AUTO, COMPRESSION_STORE, COMPRESSION_FAST, COMPRESSION_MAX)
+
+# 自動模式參數：取樣大小、壓縮後與原始大小比例高於此值時直接儲存、預設壓縮等級
+COMPRESSION_SAMPLE_SIZE = 16 * 1024
+STORE_RATIO_THRESHOLD = 0.95
+DEFAULT_COMPRESSLEVEL = 6
+
+# 自動模式下累積多少位元組的實際壓縮結果後，改用觀察到的壓縮比決定（不再取樣）
+OBSERVED_MIN_BYTES = 4 * 1024 * 1024
+
 class ZipCreationError(Exception):
     """ZIP 創建錯誤"""
     pass
 
-def create_zip_from_files(file_paths: List[str], zip_filename: Optional[str] = None, output_dir: Optional[str] = None) -> Dict[str, Any]:
+def _unique_arcname(filename: str, used_names: Set[str]) -> str:
+    """確保 ZIP 內部的檔案名稱是唯一的，並記錄到 used_names"""
+    unique_filename = filename
+    counter = 1
+    while unique_filename in used_names:
+        name, ext = os.path.splitext(filename)
+        unique_filename = f"{name}_{counter}{ext}"
+        counter += 1
+    used_names.add(unique_filename)
+    return unique_filename
+
+class CompressionPolicy:
+    """ZIP 壓縮策略 - 為每個項目選擇壓縮方式與等級"""
+    
+    def __init__(self, mode: str = COMPRESSION_AUTO):
+        """
+        Args:
+            mode: 壓縮策略（auto / store / fast / max）
+            
+        Raises:
+            ZipCreationError: 不支援的壓縮策略
+        """
+        if mode not in COMPRESSION_MODES:
+            raise ZipCreationError(f"不支援的壓縮策略: {mode}")
+        
+        self.mode = mode
+        self._observed_original = 0
+        self._observed_compressed = 0
+        self.stored_entries = 0
+        self.deflated_entries = 0
+    
+    def choose(self, file_path: Optional[str], data: Optional[bytes] = None) -> Tuple[int, Optional[int]]:
+        """
+        選擇檔案的壓縮方式
+        
+        Args:
+            file_path: 檔案路徑
+            data: 已在記憶體中的檔案內容（提供時從內容取樣，不讀取檔案）
+            
+        Returns:
+            Tuple: (compress_type, compresslevel)
+        """
+        if self.mode == COMPRESSION_STORE:
+            choice = (zipfile.ZIP_STORED, None)
+        elif self.mode == COMPRESSION_FAST:
+            choice = (zipfile.ZIP_DEFLATED, 1)
+        elif self.mode == COMPRESSION_MAX:
+            choice = (zipfile.ZIP_DEFLATED, 9)
+        elif self._estimate_ratio(file_path, data) > STORE_RATIO_THRESHOLD:
+            # 分割後的 PDF 多半是 Flate/DCT 串流，再壓縮只會浪費 CPU
+            choice = (zipfile.ZIP_STORED, None)
+        else:
+            choice = (zipfile.ZIP_DEFLATED, DEFAULT_COMPRESSLEVEL)
+        
+        if choice[0] == zipfile.ZIP_STORED:
+            self.stored_entries += 1
+        else:
+            self.deflated_entries += 1
+        return choice
+    
+    def _estimate_ratio(self, file_path: Optional[str], data: Optional[bytes] = None) -> float:
+        """估算壓縮後與原始大小的比例（優先使用已觀察到的結果，否則取樣檔案開頭與中段）"""
+        if self._observed_original >= OBSERVED_MIN_BYTES:
+            return self._observed_compressed / self._observed_original
+        
+        if data is not None:
+            sample = data[:COMPRESSION_SAMPLE_SIZE]
+            if len(data) > COMPRESSION_SAMPLE_SIZE * 2:
+                middle = len(data) // 2
+                sample += data[middle:middle + COMPRESSION_SAMPLE_SIZE]
+        else:
+            try:
+                file_size = source_size(file_path)
+                with open_source(file_path) as f:
+                    sample = f.read(COMPRESSION_SAMPLE_SIZE)
+                    if file_size > COMPRESSION_SAMPLE_SIZE * 2:
+                        f.seek(file_size // 2)
+                        sample += f.read(COMPRESSION_SAMPLE_SIZE)
+            except OSError:
+                return 0.0
+        
+        if not sample:
+            return 0.0
+        
+        compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+        compressed_size = len(compressor.compress(sample)) + len(compressor.flush())
+        return compressed_size / len(sample)
+    
+    def observe(self, original_size: int, compressed_size: int):
+        """
+        記錄實際壓縮結果，供後續項目參考
+        
+        Args:
+            original_size: 原始大小
+            compressed_size: 壓縮後大小（儲存的項目不列入）
+        """
+        self._observed_original += original_size
+        self._observed_compressed += compressed_size
+
+def generate_split_zip_filename(original_filename: str) -> str:
+    """
+    為分割結果生成有意義的 ZIP 檔案名稱
+    
+    Args:
+        original_filename: 原始 PDF 檔案名稱
+        
+    Returns:
+        str: ZIP 檔案名稱
+    """
+    base_name = Path(original_filename or 'pdf_split').stem
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    return f"{base_name}_split_{timestamp}.zip"
+
+def _zip_info_for(file_path: str, used_names: Set[str]) -> zipfile.ZipInfo:
+    """建立 ZIP 項目資訊（記憶體檔案沒有檔案系統屬性，使用目前時間）"""
+    arcname = _unique_arcname(os.path.basename(file_path), used_names)
+    if not is_memory_file(file_path):
+        return zipfile.ZipInfo.from_file(file_path, arcname)
+    
+    zinfo = zipfile.ZipInfo(arcname, time.localtime()[:6])
+    zinfo.external_attr = 0o600 << 16
+    zinfo.file_size = source_size(file_path)
+    return zinfo
+
+def _deflate_to_spool(file_path: str, compresslevel: Optional[int],
+                      chunk_size: int) -> Tuple[IO[bytes], int, int]:
+    """
+    在工作線程中將檔案壓縮為 raw deflate 資料
+
+    Returns:
+        Tuple: (壓縮資料暫存檔, CRC32, 原始大小)，暫存檔的位置停在資料結尾
+    """
+    level = DEFAULT_COMPRESSLEVEL if compresslevel is None else compresslevel
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    crc = 0
+    file_size = 0
+    
+    try:
+        with open_source(file_path) as source:
+            for chunk in iter(lambda: source.read(chunk_size), b''):
+                crc = zlib.crc32(chunk, crc)
+                file_size += len(chunk)
+                spool.write(compressor.compress(chunk))
+        spool.write(compressor.flush())
+    except Exception:
+        spool.close()
+        raise
+    
+    return spool, crc, file_size
+
+def _close_spool_result(future: Future):
+    """釋放已不需要的並行壓縮結果"""
+    if not future.cancelled() and future.exception() is None:
+        future.result()[0].close()
+
+def _write_precompressed(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, spool: IO[bytes], crc: int,
+                         file_size: int, chunk_size: int, force_zip64: bool = False) -> Iterator[None]:
+    """
+    將已壓縮的 raw deflate 資料寫入 ZIP，每寫入一個區塊產出一次
+
+    ZipFile 沒有公開寫入預先壓縮資料的方法，這裡依照 ZipFile._open_to_write 的流程
+    直接寫出本地檔頭與資料並登記項目（僅供單一寫入者使用）。
+    """
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = spool.tell()
+    zip64 = force_zip64 or file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    
+    zipf._writecheck(zinfo)
+    zipf._didModify = True
+    zinfo.header_offset = zipf.fp.tell()
+    zipf.fp.write(zinfo.FileHeader(zip64))
+    
+    spool.seek(0)
+    for chunk in iter(lambda: spool.read(chunk_size), b''):
+        zipf.fp.write(chunk)
+        yield
+    
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+    zipf.start_dir = zipf.fp.tell()
+
+def _iter_zip_writes(zipf: zipfile.ZipFile, file_paths: Iterable[str], policy: CompressionPolicy,
+                     workers: int, chunk_size: int,
+                     force_zip64: bool = False) -> Iterator[Optional[Tuple[str, Optional[zipfile.ZipInfo]]]]:
+    """
+    依序將檔案寫入 ZIP；需要壓縮的項目交給線程池預先壓縮，再依原始順序組合
+
+    Yields:
+        每寫入一個資料區塊產出 None；每完成一個檔案產出 (檔案路徑, ZipInfo)，
+        無法讀取而跳過的檔案 ZipInfo 為 None
+    """
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='zip_deflate') if workers > 1 else None
+    lookahead = workers * 2 if executor is not None else 1
+    pending: deque = deque()
+    paths = iter(file_paths)
+    used_names: Set[str] = set()
+    
+    try:
+        while True:
+            # 預先提交後續項目的壓縮工作（順序寫入時不預讀）
+            while len(pending) < lookahead:
+                file_path = next(paths, None)
+                if file_path is None:
+                    break
+                compress_type, compresslevel = policy.choose(file_path)
+                future: Optional[Future] = None
+                if executor is not None and compress_type != zipfile.ZIP_STORED:
+                    future = executor.submit(_deflate_to_spool, file_path, compresslevel, chunk_size)
+                pending.append((file_path, compress_type, compresslevel, future))
+            
+            if not pending:
+                break
+            
+            file_path, compress_type, compresslevel, future = pending.popleft()
+            
+            if future is not None:
+                try:
+                    spool, crc, file_size = future.result()
+                except OSError as e:
+                    logger.warning(f"無法讀取檔案，跳過: {file_path} ({str(e)})")
+                    yield file_path, None
+                    continue
+                
+                with spool:
+                    zinfo = _zip_info_for(file_path, used_names)
+                    yield from _write_precompressed(zipf, zinfo, spool, crc, file_size, chunk_size, force_zip64)
+            else:
+                try:
+                    source = open_source(file_path)
+                except OSError as e:
+                    logger.warning(f"無法讀取檔案，跳過: {file_path} ({str(e)})")
+                    yield file_path, None
+                    continue
+                
+                with source:
+                    zinfo = _zip_info_for(file_path, used_names)
+                    zinfo.compress_type = compress_type
+                    zinfo._compresslevel = compresslevel
+                    
+                    with zipf.open(zinfo, 'w', force_zip64=force_zip64) as entry:
+                        for chunk in iter(lambda: source.read(chunk_size), b''):
+                            entry.write(chunk)
+                            yield
+            
+            if zinfo.compress_type != zipfile.ZIP_STORED:
+                policy.observe(zinfo.file_size, zinfo.compress_size)
+            yield file_path, zinfo
+    finally:
+        # 中途停止（例如下載中斷）時取消尚未開始的壓縮工作並釋放暫存資料
+        for _, _, _, future in pending:
+            if future is not None and not future.cancel():
+                future.add_done_callback(_close_spool_result)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+def _build_zip_result(zip_path: str, files_added: int, total_original_size: int,
+                      policy: CompressionPolicy, start_time: float) -> Dict[str, Any]:
+    """整理已完成 ZIP 檔案的結果字典"""
+    zip_filename = os.path.basename(zip_path)
+    zip_size = os.path.getsize(zip_path)
+    compression_ratio = 1 - (zip_size / total_original_size) if total_original_size > 0 else 0
+    processing_time = time.time() - start_time
+    
+    result = {
+        'success': True,
+        'zip_path': zip_path,
+        'zip_filename': zip_filename,
+        'total_files': files_added,
+        'zip_size': zip_size,
+        'zip_size_mb': round(zip_size / 1024 / 1024, 2),
+        'original_total_size': total_original_size,
+        'original_size_mb': round(total_original_size / 1024 / 1024, 2),
+        'compression_ratio': round(compression_ratio * 100, 1),
+        'compression': policy.mode,
+        'stored_entries': policy.stored_entries,
+        'deflated_entries': policy.deflated_entries,
+        'processing_time': processing_time,
+        'output_directory': os.path.dirname(zip_path)
+    }
+    
+    logger.info(f"ZIP 創建成功: {zip_filename}, {files_added} 個檔案, "
+               f"壓縮率 {result['compression_ratio']}%, 耗時 {processing_time:.2f} 秒")
+    
+    return result
+
+def create_zip_from_files(file_paths: List[str], zip_filename: Optional[str] = None, output_dir: Optional[str] = None,
+                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          compression: str = COMPRESSION_AUTO, workers: Optional[int] = None) -> Dict[str, Any]:
     """
     從文件列表創建 ZIP 檔案
     
@@ -26,6 +345,10 @@ def create_zip_from_files(file_paths: List[str], zip_filename: Optional[str] = N
         file_paths: 要壓縮的檔案路徑列表
         zip_filename: ZIP 檔案名稱，如果為 None 則自動生成
         output_dir: 輸出目錄，如果為 None 則使用臨時目錄
+        progress_callback: 進度回調函數，每添加一個檔案時呼叫，
+            參數為包含 stage、files_done、total_files、bytes_done、total_bytes、elapsed_time 的字典
+        compression: 壓縮策略，'auto'（取樣後逐檔選擇儲存或 deflate）、'store'、'fast' 或 'max'
+        workers: 並行壓縮的工作線程數量，如果為 None 則使用 DEFAULT_COMPRESS_WORKERS
         
     Returns:
         Dict: 包含 ZIP 創建結果的字典
@@ -45,20 +368,22 @@ def create_zip_from_files(file_paths: List[str], zip_filename: Optional[str] = N
     try:
         logger.info(f"開始創建 ZIP 檔案，包含 {len(file_paths)} 個檔案")
         
+        policy = CompressionPolicy(compression)
+        
         # 驗證輸入檔案
         valid_files = []
         total_original_size = 0
         
         for file_path in file_paths:
-            if not os.path.exists(file_path):
+            if not source_exists(file_path):
                 logger.warning(f"檔案不存在，跳過: {file_path}")
                 continue
             
-            if not os.access(file_path, os.R_OK):
+            if not is_memory_file(file_path) and not os.access(file_path, os.R_OK):
                 logger.warning(f"無法讀取檔案，跳過: {file_path}")
                 continue
             
-            file_size = os.path.getsize(file_path)
+            file_size = source_size(file_path)
             if file_size == 0:
                 logger.warning(f"檔案大小為零，跳過: {file_path}")
                 continue
@@ -87,58 +412,49 @@ def create_zip_from_files(file_paths: List[str], zip_filename: Optional[str] = N
         
         zip_path = os.path.join(output_dir, zip_filename)
         
+        # 進度追蹤
+        progress = {
+            'stage': 'zip',
+            'files_done': 0,
+            'total_files': len(valid_files),
+            'bytes_done': 0,
+            'total_bytes': total_original_size,
+            'elapsed_time': 0.0
+        }
+        
+        def report_progress():
+            if progress_callback is not None:
+                progress['elapsed_time'] = time.time() - start_time
+                try:
+                    progress_callback(dict(progress))
+                except Exception as e:
+                    logger.warning(f"進度回調失敗: {str(e)}")
+        
+        report_progress()
+        
         # 創建 ZIP 檔案
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
             files_added = 0
             
-            for file_path in valid_files:
-                try:
-                    # 獲取檔案名稱（僅文件名，不包含路徑）
-                    filename = os.path.basename(file_path)
-                    
-                    # 確保 ZIP 內部的檔案名稱是唯一的
-                    unique_filename = filename
-                    counter = 1
-                    while unique_filename in [info.filename for info in zipf.infolist()]:
-                        name, ext = os.path.splitext(filename)
-                        unique_filename = f"{name}_{counter}{ext}"
-                        counter += 1
-                    
-                    # 添加檔案到 ZIP
-                    zipf.write(file_path, unique_filename)
-                    files_added += 1
-                    logger.debug(f"添加檔案到 ZIP: {unique_filename}")
-                    
-                except Exception as e:
-                    logger.warning(f"無法添加檔案 {file_path} 到 ZIP: {str(e)}")
+            # 依壓縮策略選擇儲存或壓縮，需要壓縮的項目由線程池並行處理後依序寫入
+            for event in _iter_zip_writes(zipf, valid_files, policy, workers or DEFAULT_COMPRESS_WORKERS,
+                                          STREAM_CHUNK_SIZE):
+                if event is None:
                     continue
+                
+                file_path, zinfo = event
+                if zinfo is not None:
+                    files_added += 1
+                    logger.debug(f"添加檔案到 ZIP: {zinfo.filename}")
+                
+                progress['files_done'] += 1
+                progress['bytes_done'] += source_size(file_path)
+                report_progress()
         
         if files_added == 0:
             raise ZipCreationError("沒有檔案成功添加到 ZIP")
         
-        # 獲取 ZIP 檔案資訊
-        zip_size = os.path.getsize(zip_path)
-        compression_ratio = 1 - (zip_size / total_original_size) if total_original_size > 0 else 0
-        processing_time = time.time() - start_time
-        
-        result = {
-            'success': True,
-            'zip_path': zip_path,
-            'zip_filename': zip_filename,
-            'total_files': files_added,
-            'zip_size': zip_size,
-            'zip_size_mb': round(zip_size / 1024 / 1024, 2),
-            'original_total_size': total_original_size,
-            'original_size_mb': round(total_original_size / 1024 / 1024, 2),
-            'compression_ratio': round(compression_ratio * 100, 1),
-            'processing_time': processing_time,
-            'output_directory': output_dir
-        }
-        
-        logger.info(f"ZIP 創建成功: {zip_filename}, {files_added} 個檔案, "
-                   f"壓縮率 {result['compression_ratio']}%, 耗時 {processing_time:.2f} 秒")
-        
-        return result
+        return _build_zip_result(zip_path, files_added, total_original_size, policy, start_time)
         
     except ZipCreationError:
         # 重新拋出已知錯誤
@@ -148,13 +464,19 @@ def create_zip_from_files(file_paths: List[str], zip_filename: Optional[str] = N
         logger.error(f"創建 ZIP 檔案時發生未預期錯誤: {str(e)}", exc_info=True)
         raise ZipCreationError(f"ZIP 創建失敗: {str(e)}")
 
-def create_zip_from_pdf_split_result(split_result: Dict[str, Any], custom_filename: Optional[str] = None) -> Dict[str, Any]:
+def create_zip_from_pdf_split_result(split_result: Dict[str, Any], custom_filename: Optional[str] = None,
+                                     progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                     compression: str = COMPRESSION_AUTO,
+                                     workers: Optional[int] = None) -> Dict[str, Any]:
     """
     從 PDF 分割結果創建 ZIP 檔案
     
     Args:
         split_result: PDF 分割結果字典
         custom_filename: 自定義 ZIP 檔案名稱
+        progress_callback: 進度回調函數，參見 create_zip_from_files
+        compression: 壓縮策略，參見 create_zip_from_files
+        workers: 並行壓縮的工作線程數量，參見 create_zip_from_files
         
     Returns:
         Dict: ZIP 創建結果
@@ -172,20 +494,186 @@ def create_zip_from_pdf_split_result(split_result: Dict[str, Any], custom_filena
         
         # 生成有意義的 ZIP 檔案名稱
         if custom_filename is None:
-            original_filename = split_result.get('original_info', {}).get('filename', 'pdf_split')
-            base_name = Path(original_filename).stem
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            custom_filename = f"{base_name}_split_{timestamp}.zip"
+            custom_filename = generate_split_zip_filename(
+                split_result.get('original_info', {}).get('filename', 'pdf_split'))
         
         # 使用分割結果的輸出目錄
         output_dir = split_result.get('output_directory')
         
-        return create_zip_from_files(file_paths, custom_filename, output_dir)
+        return create_zip_from_files(file_paths, custom_filename, output_dir, progress_callback,
+                                     compression, workers)
         
     except Exception as e:
         logger.error(f"從 PDF 分割結果創建 ZIP 時發生錯誤: {str(e)}")
         raise ZipCreationError(f"無法從分割結果創建 ZIP: {str(e)}")
 
+class ZipArchiveWriter:
+    """增量 ZIP 寫入器 - 逐一加入已在記憶體中的檔案內容（用於分割與壓縮管線）"""
+    
+    def __init__(self, zip_path: str, compression: str = COMPRESSION_AUTO):
+        """
+        Args:
+            zip_path: ZIP 檔案路徑
+            compression: 壓縮策略，參見 create_zip_from_files
+            
+        Raises:
+            ZipCreationError: 無法建立 ZIP 檔案
+        """
+        self.zip_path = zip_path
+        self._policy = CompressionPolicy(compression)
+        self._used_names: Set[str] = set()
+        self._files_added = 0
+        self._total_original_size = 0
+        self._start_time = time.time()
+        
+        try:
+            self._zipf = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6)
+        except OSError as e:
+            raise ZipCreationError(f"無法建立 ZIP 檔案: {str(e)}")
+    
+    def add(self, filename: str, data: bytes):
+        """
+        加入一個檔案
+        
+        Args:
+            filename: ZIP 內部的檔案名稱（重複時自動加上編號）
+            data: 檔案內容
+        """
+        zinfo = zipfile.ZipInfo(_unique_arcname(filename, self._used_names), date_time=time.localtime()[:6])
+        zinfo.external_attr = 0o644 << 16
+        zinfo.compress_type, zinfo._compresslevel = self._policy.choose(None, data)
+        
+        self._zipf.writestr(zinfo, data)
+        if zinfo.compress_type != zipfile.ZIP_STORED:
+            self._policy.observe(zinfo.file_size, zinfo.compress_size)
+        
+        self._files_added += 1
+        self._total_original_size += len(data)
+        logger.debug(f"添加檔案到 ZIP: {zinfo.filename}")
+    
+    def close(self) -> Dict[str, Any]:
+        """
+        完成 ZIP 檔案
+        
+        Returns:
+            Dict: ZIP 創建結果，格式與 create_zip_from_files 相同
+            
+        Raises:
+            ZipCreationError: 沒有任何檔案加入
+        """
+        self._zipf.close()
+        if self._files_added == 0:
+            self.abort()
+            raise ZipCreationError("沒有檔案成功添加到 ZIP")
+        
+        return _build_zip_result(self.zip_path, self._files_added, self._total_original_size,
+                                 self._policy, self._start_time)
+    
+    def abort(self):
+        """放棄 ZIP 檔案並刪除已寫入的內容"""
+        self._zipf.close()
+        try:
+            os.remove(self.zip_path)
+        except OSError:
+            pass
+
+class _ZipStreamBuffer:
+    """不可定位的寫入目標，暫存 ZipFile 寫出的位元組直到被取走"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        """取出目前暫存的所有位元組"""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_zip_from_files(file_paths: Iterable[str], chunk_size: int = STREAM_CHUNK_SIZE,
+                          compression: str = COMPRESSION_AUTO, workers: Optional[int] = None) -> Iterator[bytes]:
+    """
+    以串流方式產生 ZIP 內容，不在磁碟上暫存 ZIP 檔案
+    
+    file_paths 可以是延遲產生的迭代器，每取得一個檔案就立即寫出它的 ZIP 項目。
+    輸出目標不可定位，因此逐一寫出的項目使用資料描述符（data descriptor）記錄 CRC 與大小，
+    並行預先壓縮的項目則直接在本地檔頭寫入；所有項目都強制使用 ZIP64 以支援超過 4GB 的內容。
+    
+    Args:
+        file_paths: 要壓縮的檔案路徑（可迭代物件）
+        chunk_size: 每次讀取的區塊大小
+        compression: 壓縮策略，參見 create_zip_from_files
+        workers: 並行壓縮的工作線程數量，參見 create_zip_from_files
+        
+    Yields:
+        bytes: ZIP 檔案內容片段
+        
+    Raises:
+        ZipCreationError: 沒有任何檔案成功寫入
+    """
+    start_time = time.time()
+    policy = CompressionPolicy(compression)
+    buffer = _ZipStreamBuffer()
+    files_added = 0
+    total_original_size = 0
+    
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
+        for event in _iter_zip_writes(zipf, file_paths, policy, workers or DEFAULT_COMPRESS_WORKERS,
+                                      chunk_size, force_zip64=True):
+            if event is not None and event[1] is not None:
+                files_added += 1
+                total_original_size += event[1].file_size
+                logger.debug(f"串流 ZIP 項目: {event[1].filename}")
+            
+            data = buffer.drain()
+            if data:
+                yield data
+        
+        if files_added == 0:
+            raise ZipCreationError("沒有檔案成功添加到 ZIP")
+    
+    # 關閉 ZipFile 後寫出中央目錄
+    data = buffer.drain()
+    if data:
+        yield data
+    
+    logger.info(f"ZIP 串流完成: {files_added} 個檔案（儲存 {policy.stored_entries}、壓縮 {policy.deflated_entries}）, "
+               f"原始大小 {total_original_size} 位元組, 耗時 {time.time() - start_time:.2f} 秒")
+
+def describe_split_zip_stream(split_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    描述分割結果的串流 ZIP（下載時才即時產生，不預先建立檔案）
+    
+    Args:
+        split_result: PDF 分割結果字典
+        
+    Returns:
+        Dict: ZIP 資訊
+            - success: bool，是否有檔案可以壓縮
+            - streaming: bool，固定為 True
+            - zip_filename: str，下載時使用的 ZIP 檔案名稱
+            - total_files: int，檔案數量
+            - original_size_mb: float，原始檔案總大小
+    """
+    split_files = split_result.get('split_files', [])
+    if not split_result.get('success', False) or not split_files:
+        return {'success': False}
+    
+    return {
+        'success': True,
+        'streaming': True,
+        'zip_filename': generate_split_zip_filename(split_result.get('original_info', {}).get('filename', 'pdf_split')),
+        'total_files': len(split_files),
+        'original_size_mb': round(sum(f.get('file_size', 0) for f in split_files) / 1024 / 1024, 2)
+    }
+
 def validate_zip_file(zip_path: str) -> Dict[str, Any]:
     """
     驗證 ZIP 檔案的完整性